@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+# Default number of rows and columns of a tile of an archive
+TILE = 256
+
+# Directory of the files backing the shared matrices - a file system in memory where there is one
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def new_matrix(shape, dtype, path=None, shared=False):
+    """
+    Creates a matrix filled with zeros, in memory or backed by a file on the local disk, so matrices larger than the
+    memory can be filled - the operating system keeps only the recently used pages in memory.
+    :param shape: (tuple of int, int) Shape of the matrix.
+    :param dtype: (numpy dtype) Type of the cells.
+    :param path: (str or None) Path to the file backing the matrix, overwritten if it exists, None keeps the matrix in
+    memory.
+    :param shared: (bool) True backs a matrix without a path by a temporary file in SHARED_DIR, deleted together with
+    the matrix, so worker processes can map the file and fill the matrix in place.
+    :return: (numpy array or numpy memmap) Matrix of zeros.
+    """
+    if path is None and shared:
+        descriptor, path = tempfile.mkstemp(suffix=".matrix", dir=SHARED_DIR)
+        os.close(descriptor)
+        matrix = np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+        weakref.finalize(matrix, os.unlink, path)
+        return matrix
+    if path is None:
+        return np.zeros(shape, dtype=dtype)
+    if not isinstance(path, str):
+        raise TypeError('Path needs to be a string or None.')
+    return np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+
+
+def save_archive(path, matrix, seq1, seq2, traceback=(), aligned=("", ""), title="", tile=TILE):
+    """
+    Function saving the filled matrix and the traceback path into a compressed archive (.npz file), the matrix cut
+    into tiles stored as separate members, so a viewer can read only the tiles it shows. The tiles are written one by
+    one, a memory-mapped matrix is never loaded into memory as a whole.
+    :param path: (str) Path to the archive.
+    :param matrix: (numpy array) Filled matrix.
+    :param seq1: (str) Sequence of the rows.
+    :param seq2: (str) Sequence of the columns.
+    :param traceback: (iterable of tuples of int, int) Cells of the traceback path.
+    :param aligned: (tuple of str, str) Aligned sequences.
+    :param title: (str) Title of the alignment, for example the name of the algorithm.
+    :param tile: (int) Number of rows and columns of a tile.
+    :return: None.
+    """
+    if not isinstance(path, str):
+        raise TypeError('Path needs to be a string.')
+    if not isinstance(tile, int) or tile < 1:
+        raise ValueError('Tile size needs to be a positive integer.')
+    if matrix.shape != (len(seq1) + 1, len(seq2) + 1):
+        raise ValueError('Matrix needs to match the lengths of the sequences.')
+
+    meta = {"seq1": seq1, "seq2": seq2, "aligned": list(aligned), "title": title, "tile": tile,
+            "shape": list(matrix.shape), "dtype": matrix.dtype.str}
+    members = {"meta": np.array(json.dumps(meta)),
+               "traceback": np.array(list(traceback), dtype=np.int64).reshape(-1, 2)}
+    for row in range(0, matrix.shape[0], tile):
+        for col in range(0, matrix.shape[1], tile):
+            members[f"tile_{row // tile}_{col // tile}"] = matrix[row:row + tile, col:col + tile]
+    np.savez_compressed(path, **members)
+
+
+class MatrixArchive:
+    """
+    Class representing a matrix saved by save_archive. Indexing it with a pair of slices reads and decompresses only
+    the tiles overlapping the requested window, a limited number of recently used tiles is kept in memory.
+    """
+    def __init__(self, path, cached_tiles=64):
+        """
+        MatrixArchive initialization method.
+        :param path: (str) Path to the archive.
+        :param cached_tiles: (int) Number of decompressed tiles kept in memory.
+        """
+        if not isinstance(path, str):
+            raise TypeError('Path needs to be a string.')
+        if not isinstance(cached_tiles, int) or cached_tiles < 1:
+            raise ValueError('Number of cached tiles needs to be a positive integer.')
+
+        self.path = path
+        self.archive = np.load(path)
+        meta = json.loads(str(self.archive["meta"]))
+        self.seq1 = meta["seq1"]
+        self.seq2 = meta["seq2"]
+        self.aligned_1, self.aligned_2 = meta["aligned"]
+        self.title = meta["title"]
+        self.tile_size = meta["tile"]
+        self.shape = tuple(meta["shape"])
+        self.dtype = np.dtype(meta["dtype"])
+        self.traceback = [tuple(cell) for cell in self.archive["traceback"].tolist()]
+        self.cached_tiles = cached_tiles
+        self.loads = 0  # Number of tiles read from the archive
+        self._tiles = OrderedDict()
+
+    def tile(self, row, col):
+        """
+        Returns a tile of the matrix, reading it from the archive if it is not cached.
+        :param row: (int) Row of the tile.
+        :param col: (int) Column of the tile.
+        :return: (numpy array) Cells of the tile.
+        """
+        key = (row, col)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self.archive[f"tile_{row}_{col}"]
+            self.loads += 1
+            self._tiles[key] = tile
+            while len(self._tiles) > self.cached_tiles:
+                self._tiles.popitem(last=False)
+        self._tiles.move_to_end(key)
+        return tile
+
+    def __getitem__(self, index):
+        """
+        Returns a window of the matrix.
+        :param index: (tuple of slice, slice) Rows and columns of the window, with no step.
+        :return: (numpy array) Cells of the window.
+        """
+        if not isinstance(index, tuple) or len(index) != 2 or not all(isinstance(part, slice) for part in index):
+            raise TypeError('Archive needs to be indexed with a pair of slices.')
+        (row0, row1, row_step), (col0, col1, col_step) = (part.indices(size) for part, size in zip(index, self.shape))
+        if row_step != 1 or col_step != 1:
+            raise ValueError('Slices of the archive cannot have a step.')
+
+        size = self.tile_size
+        window = np.zeros((max(row1 - row0, 0), max(col1 - col0, 0)), dtype=self.dtype)
+        for row in range(row0 // size, (row1 - 1) // size + 1 if row1 > row0 else 0):
+            for col in range(col0 // size, (col1 - 1) // size + 1 if col1 > col0 else 0):
+                tile = self.tile(row, col)
+                top, left = row * size, col * size
+                rows = slice(max(row0, top), min(row1, top + size))
+                cols = slice(max(col0, left), min(col1, left + size))
+                window[rows.start - row0:rows.stop - row0, cols.start - col0:cols.stop - col0] = \
+                    tile[rows.start - top:rows.stop - top, cols.start - left:cols.stop - left]
+        return window
+
+    def close(self):
+        """
+        Closes the archive file.
+        :return: None.
+        """
+        self._tiles.clear()
+        self.archive.close()
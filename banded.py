@@ -0,0 +1,184 @@
+import numpy as np
+
+from frames import MOVE_DIAG, MOVE_LEFT, MOVE_UP
+from scoring import get_substitution_matrix
+
+# Margin added to the difference of lengths when the band width is not given
+BAND_MARGIN = 16
+
+
+def banded_fill(codes1, profile, gap, offset, k, local=False):
+    """
+    Function filling only a band of the matrix - the cells with column minus row between offset - k and offset + k.
+    The band is stored as (n + 1) x (2k + 1) array, cell (x, y) lies in band column y - x - offset + k, so the cost is
+    O(nk) instead of O(nm). Every row is computed with NumPy, the left moves as a running maximum.
+    :param codes1: (numpy array of uint8) Encoded sequence of the rows.
+    :param profile: (numpy array) Scores of every letter of the alphabet against the sequence of the columns.
+    :param gap: (int) Gap penalty value.
+    :param offset: (int) Diagonal (column minus row) in the middle of the band.
+    :param k: (int) Half width of the band.
+    :param local: (bool) True clips the scores at zero like in Smith-Waterman algorithm.
+    :return band: (numpy array) Filled band, cells out of the matrix hold a large negative value.
+    :return pointers: (numpy array of uint8) Pointers of the band cells.
+    """
+    if not isinstance(k, int) or k < 0:
+        raise ValueError('Band width needs to be a non-negative integer.')
+
+    n, m = len(codes1), profile.shape[1]
+    width = 2 * k + 1
+    largest = max(abs(gap), int(np.abs(profile).max()) if profile.size else 0, 1)
+    dtype = np.int32 if 4 * (n + m + width + 2) * largest < np.iinfo(np.int32).max else np.int64
+    out_of_matrix = np.iinfo(dtype).min // 2
+
+    band = np.full((n + 1, width), out_of_matrix, dtype=dtype)
+    pointers = np.zeros((n + 1, width), dtype=np.uint8)
+    steps = np.arange(width, dtype=dtype) * gap
+
+    # First row
+    start = offset - k  # Column of the first band cell of the row
+    lo, hi = max(0, -start), min(width, m - start + 1)
+    if lo < hi:
+        band[0, lo:hi] = 0 if local else np.arange(start + lo, start + hi) * gap
+        if not local:
+            pointers[0, max(lo, 1 - start):hi] = MOVE_LEFT
+
+    for x in range(1, n + 1):
+        start = x + offset - k
+        previous, row = band[x - 1], band[x]
+        if 0 <= -start < width:  # First column is in the band
+            row[-start] = 0 if local else x * gap
+            pointers[x, -start] = 0 if local else MOVE_UP
+        lo, hi = max(0, 1 - start), min(width, m - start + 1)  # Band cells with 1 <= column <= m
+        if lo >= hi:
+            continue
+
+        scores = profile[codes1[x - 1], start + lo - 1:start + hi - 1]
+        diagonal = previous[lo:hi] + scores
+        up = np.full(hi - lo, out_of_matrix, dtype=dtype)
+        up[:min(hi, width - 1) - lo] = previous[lo + 1:min(hi + 1, width)] + gap
+        best = np.maximum(diagonal, up)
+        if local:
+            np.maximum(best, 0, out=best)
+
+        # Left moves as a running maximum, started from the cell before the segment
+        before = row[lo - 1] if lo > 0 else out_of_matrix
+        chain = best - steps[lo:hi]
+        if lo > 0:
+            np.maximum(chain, before - steps[lo - 1], out=chain)
+        cells = np.maximum.accumulate(chain) + steps[lo:hi]
+        row[lo:hi] = cells
+
+        moves = (diagonal == cells) * np.uint8(MOVE_DIAG)
+        moves |= (up == cells) * np.uint8(MOVE_UP)
+        left = np.empty(hi - lo, dtype=dtype)
+        left[0] = before + gap
+        left[1:] = cells[:-1] + gap
+        moves |= (left == cells) * np.uint8(MOVE_LEFT)
+        if local:
+            moves[cells == 0] = 0
+        pointers[x, lo:hi] = moves
+
+    return band, pointers
+
+
+def banded_traceback(seq1, seq2, pointers, offset, k, x, y):
+    """
+    Walks the band pointers back from the cell, preferring the diagonal, then the up and then the left move.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param pointers: (numpy array of uint8) Pointers of the band cells.
+    :param offset: (int) Diagonal in the middle of the band.
+    :param k: (int) Half width of the band.
+    :param x: (int) Row of the cell the traceback starts from.
+    :param y: (int) Column of the cell the traceback starts from.
+    :return aligned_1: (str) Aligned sequence 1.
+    :return aligned_2: (str) Aligned sequence 2.
+    :return x: (int) Row of the cell the traceback stopped in.
+    :return y: (int) Column of the cell the traceback stopped in.
+    """
+    aligned_1, aligned_2 = [], []
+    x, y = int(x), int(y)
+    column = y - x - offset + k
+    move = pointers[x, column]
+    while move:
+        if move & MOVE_DIAG:
+            x -= 1
+            y -= 1
+            aligned_1.append(seq1[x])
+            aligned_2.append(seq2[y])
+        elif move & MOVE_UP:
+            x -= 1
+            column += 1
+            aligned_1.append(seq1[x])
+            aligned_2.append("-")
+        else:
+            y -= 1
+            column -= 1
+            aligned_1.append("-")
+            aligned_2.append(seq2[y])
+        move = pointers[x, column]
+
+    return "".join(reversed(aligned_1)), "".join(reversed(aligned_2)), x, y
+
+
+def outside_bound(n, m, k, best, gap):
+    """
+    Upper bound of the score of any global path leaving the band of half width k around the main diagonal. Such a path
+    reaches a diagonal (column minus row) of at least k + 1 in absolute value and comes back to diagonal m - n, every
+    gap moves it by one diagonal, so it has at least g = 2(k + 1) - |m - n| gaps and (n + m - g) / 2 diagonal moves.
+    The score is linear in the number of gaps, so the bound is taken at the fewest or at the most gaps possible.
+    :param n: (int) Length of sequence 1.
+    :param m: (int) Length of sequence 2.
+    :param k: (int) Half width of the band, at least |m - n|.
+    :param best: (int) Highest score of a pair of letters.
+    :param gap: (int) Gap penalty value.
+    :return: (int or None) Highest score a path out of the band could get, None if no path can leave the band.
+    """
+    fewest = 2 * (k + 1) - abs(m - n)
+    if (k >= n and k >= m) or fewest > n + m:
+        return None
+    bounds = []
+    for gaps in (fewest + (n + m - fewest) % 2, n + m):  # Both lengths minus the gaps is an even number
+        bounds.append((n + m - gaps) // 2 * best + gaps * gap)
+    return max(bounds)
+
+
+def banded_needleman_wunsch(seq1, seq2, match, missmatch, gap, band=None, substitution=None):
+    """
+    Function performing Needleman-Wunsch algorithm only in a band around the main diagonal, made for near-identical
+    sequences. The score of the band is optimal only when no path leaving the band can score higher - while its upper
+    bound from outside_bound is higher, the alignment is repeated with a twice wider band, up to the whole matrix.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param band: (int or None) Half width k of the first band, None derives it from the difference of lengths plus a
+    margin.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return aligned_1 (str): Output of sequence 1 - global alignment of sequence 1.
+    :return aligned_2 (str): Output of sequence 2 - global alignment of sequence 2.
+    :return score (int): Score of the alignment.
+    """
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+    if band is not None and (not isinstance(band, int) or band < 0):
+        raise ValueError('Band width needs to be a non-negative integer or None.')
+
+    n, m = len(seq1), len(seq2)
+    k = abs(m - n) + BAND_MARGIN if band is None else max(band, abs(m - n))
+    table = get_substitution_matrix(seq1, seq2, match, missmatch, substitution)
+    codes1 = table.encode(seq1)
+    profile = table.scores[:, table.encode(seq2)]
+    best = int(profile[np.unique(codes1)].max()) if n and m else 0
+
+    while True:
+        matrix, pointers = banded_fill(codes1, profile, gap, 0, k)
+        score = int(matrix[n, m - n + k])
+        bound = outside_bound(n, m, k, best, gap)
+        if bound is None or score >= bound:
+            aligned_1, aligned_2, _, _ = banded_traceback(seq1, seq2, pointers, 0, k, n, m)
+            return aligned_1, aligned_2, score
+        k = max(2 * k, 1)
@@ -0,0 +1,185 @@
+import numpy as np
+
+from frames import MOVE_DIAG, MOVE_LEFT, MOVE_UP
+from instrumentation import phase
+from pointers import pointer_traceback
+from scoring import get_substitution_matrix, score_dtype
+
+ALGORITHMS = {"nw": False, "sw": True}  # Name of the algorithm and whether the alignment is local
+
+# Largest number of pairs and of matrix cells filled together, bounding the memory taken by a chunk of pairs
+BATCH_PAIRS = 512
+BATCH_CELLS = 1 << 24
+
+
+def _pack(codes, starts, lengths):
+    """
+    Function cutting the encoded sequences out of their concatenation into the rows of a padded array.
+    :param codes: (numpy array of uint8) Codes of all the sequences one after another, followed by one padding code.
+    :param starts: (numpy array of int) Position of every sequence in the codes.
+    :param lengths: (numpy array of int) Length of every sequence.
+    :return: (numpy array of uint8) Sequences in the rows, padded with zeros to the longest one.
+    """
+    columns = np.arange(int(lengths.max()) if len(lengths) else 0)
+    inside = columns < lengths[:, None]
+    return np.where(inside, codes[np.where(inside, starts[:, None] + columns, len(codes) - 1)], 0).astype(np.uint8)
+
+
+def _chunks(lengths1, lengths2):
+    """
+    Generator splitting the pairs into chunks of pairs of similar lengths, so little of the padded matrices is wasted.
+    :param lengths1: (numpy array of int) Lengths of sequences 1.
+    :param lengths2: (numpy array of int) Lengths of sequences 2.
+    :return: (generator of numpy arrays of int) Indices of the pairs of every chunk.
+    """
+    order = np.lexsort((lengths2, lengths1))
+    start, rows, cols = 0, 0, 0
+    for end, pair in enumerate(order):
+        rows, cols = max(rows, int(lengths1[pair]) + 1), max(cols, int(lengths2[pair]) + 1)
+        if end > start and (end - start == BATCH_PAIRS or (end - start + 1) * rows * cols > BATCH_CELLS):
+            yield order[start:end]
+            start, rows, cols = end, int(lengths1[pair]) + 1, int(lengths2[pair]) + 1
+    if start < len(order):
+        yield order[start:]
+
+
+def _fill_packed(codes1, codes2, lengths1, lengths2, scores, gap, local, pointers=None):
+    """
+    Function filling the matrices of a chunk of pairs in lockstep - row x of every matrix is computed at once with
+    NumPy operations along the batch axis, with the running maximum of fill_row done row-wise. Only two rows of scores
+    are kept, the cells past the end of a shorter pair are computed too, but never read.
+    :param codes1: (numpy array of uint8) Padded sequences 1, one per row.
+    :param codes2: (numpy array of uint8) Padded sequences 2, one per row.
+    :param lengths1: (numpy array of int) Lengths of sequences 1.
+    :param lengths2: (numpy array of int) Lengths of sequences 2.
+    :param scores: (numpy array) Table of scores of the substitution matrix, of the type of the matrices.
+    :param gap: (int) Gap penalty value.
+    :param local: (bool) True for Smith-Waterman algorithm, False for Needleman-Wunsch algorithm.
+    :param pointers: (numpy array of uint8 or None) Pointer matrices of the pairs with the first row and column set,
+    filled with the moves, None skips recording the moves.
+    :return score: (numpy array of int64) Score of the optimal alignment of every pair.
+    :return ends_1: (numpy array of int) Row of the cell the traceback of every pair starts from.
+    :return ends_2: (numpy array of int) Column of the cell the traceback of every pair starts from.
+    """
+    count, cols = codes2.shape[0], codes2.shape[1] + 1
+    dtype = scores.dtype
+    pairs = np.arange(count)
+    steps = np.arange(cols, dtype=dtype) * dtype.type(gap)
+    row = np.zeros((count, cols), dtype=dtype) if local else np.tile(steps, (count, 1))
+    best = np.empty_like(row)
+
+    if local:
+        inside = np.arange(cols) <= lengths2[:, None]  # Columns of every pair
+        score = np.zeros(count, dtype=np.int64)
+        ends_1, ends_2 = np.zeros(count, dtype=np.int64), np.zeros(count, dtype=np.int64)
+    else:
+        score = row[pairs, lengths2].astype(np.int64)
+        ends_1, ends_2 = lengths1.copy(), lengths2.copy()
+
+    for x in range(1, codes1.shape[1] + 1):
+        diagonal = row[:, :-1] + scores[codes1[:, x - 1, None], codes2]
+        up = row[:, 1:] + dtype.type(gap)
+        best[:, 0] = 0 if local else x * gap
+        np.maximum(diagonal, up, out=best[:, 1:])
+        if local:
+            np.maximum(best, 0, out=best)
+        best -= steps
+        row = np.maximum.accumulate(best, axis=1)
+        row += steps
+
+        if pointers is not None:
+            cells = row[:, 1:]
+            moves = (diagonal == cells) * np.uint8(MOVE_DIAG)
+            moves |= (up == cells) * np.uint8(MOVE_UP)
+            moves |= (row[:, :-1] + dtype.type(gap) == cells) * np.uint8(MOVE_LEFT)
+            if local:
+                moves[cells == 0] = 0
+            pointers[:, x, 1:] = moves
+
+        if local:
+            # Strictly larger only, so every pair ends in the first best cell in the row-major order, like np.argmax
+            y = np.where(inside, row, -1).argmax(axis=1)
+            better = (row[pairs, y] > score) & (x <= lengths1)
+            score[better] = row[better, y[better]]
+            ends_1[better], ends_2[better] = x, y[better]
+        else:
+            done = lengths1 == x
+            score[done] = row[done, lengths2[done]]
+    return score, ends_1, ends_2
+
+
+def align_packed(pairs, match, missmatch, gap, local=False, substitution=None, score_only=False):
+    """
+    Function aligning many short pairs of sequences at once. The pairs are sorted by their lengths and cut into chunks,
+    the sequences of a chunk are encoded and padded into arrays and all their matrices are filled in lockstep, so the
+    cost of a Python call per cell row is shared by the whole chunk instead of paid for every pair.
+    :param pairs: (list of tuples of str, str) Pairs of sequences.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param local: (bool) True for Smith-Waterman algorithm, False for Needleman-Wunsch algorithm.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :param score_only: (bool) True skips the pointer matrices and the traceback and returns only the scores.
+    :return: (list of tuples of str, str, int, or list of int with score_only=True) Aligned sequences and score of
+    every pair, in the order of the pairs.
+    """
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+    pairs = list(pairs)
+    if not all(isinstance(pair, tuple) and len(pair) == 2 and isinstance(pair[0], str) and isinstance(pair[1], str)
+               for pair in pairs):
+        raise TypeError('Pairs need to be tuples of two strings.')
+    if not pairs:
+        return []
+
+    sequences_1, sequences_2 = ["".join(sequences) for sequences in zip(*pairs)]
+    table = get_substitution_matrix(sequences_1, sequences_2, match, missmatch, substitution)
+    lengths1 = np.array([len(seq1) for seq1, _ in pairs], dtype=np.int64)
+    lengths2 = np.array([len(seq2) for _, seq2 in pairs], dtype=np.int64)
+    starts1, starts2 = np.cumsum(lengths1) - lengths1, np.cumsum(lengths2) - lengths2
+    with phase("match_matrix"):
+        codes1 = np.append(table.encode(sequences_1), np.uint8(0))
+        codes2 = np.append(table.encode(sequences_2), np.uint8(0))
+
+    results = [None] * len(pairs)
+    for chunk in _chunks(lengths1, lengths2):
+        chunk_1, chunk_2 = lengths1[chunk], lengths2[chunk]
+        rows, cols = int(chunk_1.max()) + 1, int(chunk_2.max()) + 1
+        dtype = score_dtype(rows - 1, cols - 1, table.scores, gap)
+        pointers = None
+        if not score_only:
+            pointers = np.zeros((len(chunk), rows, cols), dtype=np.uint8)
+            if not local:
+                pointers[:, 1:, 0] = MOVE_UP
+                pointers[:, 0, 1:] = MOVE_LEFT
+
+        with phase("filling", int(chunk_1 @ chunk_2)):
+            score, ends_1, ends_2 = _fill_packed(_pack(codes1, starts1[chunk], chunk_1),
+                                                 _pack(codes2, starts2[chunk], chunk_2), chunk_1, chunk_2,
+                                                 table.scores.astype(dtype), gap, local, pointers)
+        if score_only:
+            for pair, value in zip(chunk.tolist(), score.tolist()):
+                results[pair] = value
+            continue
+        with phase("traceback"):
+            for index, pair in enumerate(chunk.tolist()):
+                aligned_1, aligned_2, _, _ = pointer_traceback(*pairs[pair], pointers[index], ends_1[index],
+                                                               ends_2[index])
+                results[pair] = (aligned_1, aligned_2, int(score[index]))
+    return results
+
+
+def align_batch(pairs, algorithm, match, missmatch, gap, substitution=None):
+    """
+    Function aligning a batch of pairs of sequences with the same algorithm and scoring parameters.
+    :param pairs: (list of tuples of str, str) Pairs of sequences.
+    :param algorithm: (str) "nw" for Needleman-Wunsch algorithm, "sw" for Smith-Waterman algorithm.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return: (list of tuples of str, str, int) Aligned sequences and score of every pair, in the order of the pairs.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f'Algorithm needs to be one of: {", ".join(ALGORITHMS)}.')
+    return align_packed(pairs, match, missmatch, gap, local=ALGORITHMS[algorithm], substitution=substitution)
@@ -0,0 +1,275 @@
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from frames import MOVE_NONE
+from needleman_wunsch import _needleman_wunsch_border, _needleman_wunsch_filling, \
+    _needleman_wunsch_initialization, _needleman_wunsch_traceback
+from pointers import new_pointer_matrix
+from scoring import alignment_score, score_dtype
+from smith_waterman import _smith_waterman_filling, _smith_waterman_initialization, _smith_waterman_traceback, \
+    match_matrix
+from wavefront import wavefront_fill
+
+ALPHABETS = {"dna": "ACGT", "protein": "ACDEFGHIKLMNPQRSTVWY"}
+
+# Ways of running the phases - the python engine recording the frames, the same loops without recording them, and
+# the vectorized wavefront engine
+MODES = ("frames", "no-frames", "wavefront")
+
+MATCH, MISSMATCH, GAP = 1, -1, -2
+
+
+class _MatrixWriter:
+    """
+    Class standing in for FrameRecorder - writes the values into the matrix without recording the steps, so the fill
+    loops can be timed with frame recording off.
+    """
+    def __init__(self, matrix):
+        """
+        _MatrixWriter initialization method.
+        :param matrix: (numpy array) Matrix which is going to be filled.
+        """
+        self.matrix = matrix
+
+    def set(self, row, col, value, move=MOVE_NONE):
+        self.matrix[row, col] = value
+
+
+def reference_matrix(seq1, seq2, match, missmatch, gap, local=False):
+    """
+    Function filling the matrix with the plain recurrence of the original implementation, on Python lists, to check
+    the optimized phases against.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param local: (bool) True for Smith-Waterman algorithm, False for Needleman-Wunsch algorithm.
+    :return: (numpy array) Filled matrix.
+    """
+    matrix = [[0] * (len(seq2) + 1) for _ in range(len(seq1) + 1)]
+    if not local:
+        for x in range(len(seq1) + 1):
+            matrix[x][0] = x * gap
+        for y in range(len(seq2) + 1):
+            matrix[0][y] = y * gap
+    for x in range(1, len(seq1) + 1):
+        for y in range(1, len(seq2) + 1):
+            diagonal = matrix[x - 1][y - 1] + (match if seq1[x - 1] == seq2[y - 1] else missmatch)
+            value = max(diagonal, matrix[x - 1][y] + gap, matrix[x][y - 1] + gap)
+            matrix[x][y] = max(value, 0) if local else value
+    return np.array(matrix, dtype=np.int64)
+
+
+def make_pair(length, alphabet, identity, rng):
+    """
+    Creates a random sequence and a mutated copy of it.
+    :param length: (int) Length of the sequences.
+    :param alphabet: (str) Letters of the sequences.
+    :param identity: (float) Probability of a position of the copy to keep the letter of the original.
+    :param rng: (random.Random) Random number generator.
+    :return: (tuple of str, str) Sequence and its mutated copy.
+    """
+    seq1 = "".join(rng.choice(alphabet) for _ in range(length))
+    seq2 = "".join(letter if rng.random() < identity else rng.choice(alphabet.replace(letter, ""))
+                   for letter in seq1)
+    return seq1, seq2
+
+
+def _phases(algorithm, mode, seq1, seq2):
+    """
+    Generator running the phases of the algorithm one by one, so the caller can measure each of them.
+    :param algorithm: (str) "nw" or "sw".
+    :param mode: (str) One of MODES.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :return: (generator) First a dict which gets the filled matrix and the aligned sequences under "matrix" and
+    "aligned" keys at the end, then the name of every phase after it has finished.
+    """
+    local = algorithm == "sw"
+    state = {}
+    yield state
+
+    matrix_is_match = match_matrix(seq1, seq2, MATCH, MISSMATCH, profile=mode == "wavefront")
+    dtype = score_dtype(len(seq1), len(seq2), matrix_is_match, GAP)
+    yield "match_matrix"
+
+    pointers = new_pointer_matrix(len(seq1) + 1, len(seq2) + 1, local)
+    if mode == "frames":
+        if local:
+            matrix, frames = _smith_waterman_initialization(seq1, seq2, dtype=dtype)
+        else:
+            matrix, frames = _needleman_wunsch_initialization(seq1, seq2, GAP, dtype=dtype)
+    else:
+        matrix = np.zeros((len(seq1) + 1, len(seq2) + 1), dtype=dtype)
+        frames = _MatrixWriter(matrix)
+        if not local:
+            for x, y, value, move in _needleman_wunsch_border(seq1, seq2, GAP):
+                frames.set(x, y, value, move)
+    yield "initialization"
+
+    if mode == "wavefront":
+        matrix = wavefront_fill(matrix, matrix_is_match, GAP, local, pointers)
+    elif local:
+        _smith_waterman_filling(seq1, seq2, matrix, matrix_is_match, GAP, frames, pointers)
+    else:
+        _needleman_wunsch_filling(seq1, seq2, matrix, matrix_is_match, GAP, frames, pointers)
+    yield "filling"
+
+    if local:
+        aligned = _smith_waterman_traceback(seq1, seq2, matrix, pointers)
+    else:
+        aligned = _needleman_wunsch_traceback(seq1, seq2, pointers)
+    state.update(matrix=matrix, aligned=aligned)
+    yield "traceback"
+
+
+def run_case(algorithm, mode, seq1, seq2, repeat=3, check=True):
+    """
+    Times every phase of one case (the best of the repeats), then measures the peak of memory allocated in every
+    phase with tracemalloc in a separate run, so tracing does not slow down the timed runs.
+    :param algorithm: (str) "nw" or "sw".
+    :param mode: (str) One of MODES.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param repeat: (int) Number of timed runs.
+    :param check: (bool) True compares the filled matrix and the score of the alignment with the reference
+    implementation.
+    :return: (dict) Seconds and peak bytes of every phase, cells per second of the filling and the correctness.
+    """
+    phases = {}
+    for _ in range(repeat):
+        gc.collect()
+        steps = _phases(algorithm, mode, seq1, seq2)
+        state = next(steps)
+        start = time.perf_counter()
+        for name in steps:
+            end = time.perf_counter()
+            timing = phases.setdefault(name, {"seconds": float("inf")})
+            timing["seconds"] = min(timing["seconds"], end - start)
+            start = time.perf_counter()
+
+    gc.collect()
+    tracemalloc.start()
+    steps = _phases(algorithm, mode, seq1, seq2)
+    next(steps)
+    tracemalloc.reset_peak()
+    for name in steps:
+        phases[name]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+    tracemalloc.stop()
+
+    correct = None
+    if check:
+        expected = reference_matrix(seq1, seq2, MATCH, MISSMATCH, GAP, local=algorithm == "sw")
+        best = expected.max() if algorithm == "sw" else expected[-1, -1]
+        correct = bool(np.array_equal(state["matrix"], expected) and
+                       alignment_score(*state["aligned"], MATCH, MISSMATCH, GAP) == int(best))
+    cells = len(seq1) * len(seq2)
+    return {"phases": phases, "total_seconds": sum(phase["seconds"] for phase in phases.values()),
+            "fill_cells_per_second": cells / phases["filling"]["seconds"] if phases["filling"]["seconds"] else None,
+            "correct": correct}
+
+
+def run_grid(algorithms, modes, lengths, alphabets, identities, repeat=3, check_limit=250000, seed=0, log=None):
+    """
+    Runs every combination of the parameters.
+    :param algorithms: (list of str) Algorithms, "nw" and/or "sw".
+    :param modes: (list of str) Modes, see MODES.
+    :param lengths: (list of int) Lengths of the sequences.
+    :param alphabets: (list of str) Names of the alphabets, keys of ALPHABETS.
+    :param identities: (list of float) Identities of the sequences.
+    :param repeat: (int) Number of timed runs of every case.
+    :param check_limit: (int) Largest number of cells checked against the reference implementation.
+    :param seed: (int) Seed of the random sequences.
+    :param log: (file or None) File the progress is written to.
+    :return: (list of dicts) Parameters and results of every case.
+    """
+    results = []
+    for length in lengths:
+        for alphabet in alphabets:
+            for identity in identities:
+                seq1, seq2 = make_pair(length, ALPHABETS[alphabet], identity, random.Random(seed))
+                for algorithm in algorithms:
+                    for mode in modes:
+                        result = {"algorithm": algorithm, "mode": mode, "length": length, "alphabet": alphabet,
+                                  "identity": identity}
+                        result.update(run_case(algorithm, mode, seq1, seq2, repeat, length * length <= check_limit))
+                        results.append(result)
+                        if log is not None:
+                            print(f"{algorithm} {mode:9} {alphabet:7} n={length:<6} identity={identity:<4} "
+                                  f"{result['total_seconds']:9.4f} s  correct={result['correct']}", file=log)
+    return results
+
+
+def compare(old, new):
+    """
+    Pairs the cases of two runs and computes the speedup of every phase.
+    :param old: (dict) Results of the older run.
+    :param new: (dict) Results of the newer run.
+    :return: (list of str) Lines of the comparison.
+    """
+    def case(result):
+        return tuple(result[key] for key in ("algorithm", "mode", "length", "alphabet", "identity"))
+
+    previous = {case(result): result for result in old["results"]}
+    lines = []
+    for result in new["results"]:
+        before = previous.get(case(result))
+        if before is None:
+            continue
+        speedups = " ".join(f"{name}={before['phases'][name]['seconds'] / phase['seconds']:.2f}x"
+                            for name, phase in result["phases"].items()
+                            if name in before["phases"] and phase["seconds"] > 0)
+        lines.append(" ".join(map(str, case(result))) + f": {speedups}")
+    return lines
+
+
+def main(argv=None):
+    """
+    Entry point of the benchmark.
+    :param argv: (list of str or None) Arguments, None reads them from sys.argv.
+    :return: (int) Exit status - 0 if all the checked cases are correct, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Times and memory-profiles the phases of the alignment algorithms.")
+    parser.add_argument("--algorithms", nargs="+", choices=("nw", "sw"), default=["nw", "sw"])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--lengths", nargs="+", type=int, default=[50, 200, 500])
+    parser.add_argument("--alphabets", nargs="+", choices=tuple(ALPHABETS), default=list(ALPHABETS))
+    parser.add_argument("--identities", nargs="+", type=float, default=[0.5, 0.9])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs of every case, the best one is kept")
+    parser.add_argument("--check-limit", type=int, default=250000,
+                        help="largest number of cells checked against the reference implementation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file of the results, printed to the standard output if not given")
+    parser.add_argument("--compare", metavar="JSON", help="results of an earlier run to print the speedups against")
+    args = parser.parse_args(argv)
+
+    results = run_grid(args.algorithms, args.modes, args.lengths, args.alphabets, args.identities, args.repeat,
+                       args.check_limit, args.seed, log=sys.stderr)
+    report = {"meta": {"date": datetime.now(timezone.utc).isoformat(), "python": platform.python_version(),
+                       "numpy": np.__version__, "platform": platform.platform(), "arguments": vars(args)},
+              "results": results}
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            print("\n".join(compare(json.load(file), report)), file=sys.stderr)
+    return 0 if all(result["correct"] is not False for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from needleman_wunsch import needleman_wunsch_algorithm
+from scoring import SubstitutionMatrix, alignment_score, load_substitution_matrix
+from smith_waterman import smith_waterman_algorithm
+
+# Cached result of an alignment, matrix is None unless the final matrix was stored
+CachedAlignment = namedtuple("CachedAlignment", ["aligned_1", "aligned_2", "score", "matrix"])
+
+ALGORITHMS = {"nw": needleman_wunsch_algorithm, "sw": smith_waterman_algorithm}
+
+
+class AlignmentCache:
+    """
+    Class representing a cache of alignment results, keyed by a SHA-256 hash of the sequences and all the parameters.
+    Recent results are kept in an in-memory LRU of a limited size, all of them optionally in an SQLite database shared
+    by threads and processes - every process opens its own connection, the database runs in WAL mode and writers wait
+    for each other instead of failing.
+    """
+    def __init__(self, path=None, maxsize=1024, store_matrix=False):
+        """
+        AlignmentCache initialization method.
+        :param path: (str or None) Path to the SQLite database file, None keeps the results only in memory.
+        :param maxsize: (int) Maximal number of results in the in-memory LRU.
+        :param store_matrix: (bool) True keeps also the compressed final matrix, available for the "python" engine.
+        """
+        if path is not None and not isinstance(path, str):
+            raise TypeError('Path needs to be a string or None.')
+        if not isinstance(maxsize, int) or maxsize < 0:
+            raise ValueError('Size of the cache needs to be a non-negative integer.')
+
+        self.path = path
+        self.maxsize = maxsize
+        self.store_matrix = store_matrix
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def key(self, algorithm, seq1, seq2, match, missmatch, gap, **options):
+        """
+        Computes the content hash of an alignment.
+        :param algorithm: (str) "nw" for Needleman-Wunsch algorithm, "sw" for Smith-Waterman algorithm.
+        :param seq1: (str) Input sequence.
+        :param seq2: (str) Input sequence.
+        :param match: (int) Match value.
+        :param missmatch: (int) Missmatch value.
+        :param gap: (int) Gap penalty value.
+        :param options: Other keyword arguments of the algorithm, see align.
+        :return: (str) Hexadecimal SHA-256 hash.
+        """
+        options = dict(options)
+        substitution = options.pop("substitution", None)
+        if isinstance(substitution, str):
+            substitution = load_substitution_matrix(substitution)
+        if isinstance(substitution, SubstitutionMatrix):
+            # Hashed by its contents, so an edited matrix file does not hit the results of the old one
+            substitution = [substitution.alphabet, substitution.scores.tolist()]
+        content = json.dumps([algorithm, seq1, seq2, match, missmatch, gap, substitution, sorted(options.items())])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def align(self, algorithm, seq1, seq2, match, missmatch, gap, engine="wavefront", substitution=None,
+              gap_open=None, gap_extend=None, band=None):
+        """
+        Returns the cached alignment, or performs the alignment and caches it.
+        :param algorithm: (str) "nw" for Needleman-Wunsch algorithm, "sw" for Smith-Waterman algorithm.
+        :param seq1: (str) Input sequence.
+        :param seq2: (str) Input sequence.
+        :param match: (int) Match value.
+        :param missmatch: (int) Missmatch value.
+        :param gap: (int) Gap penalty value.
+        :param engine: (str) Engine of the algorithm.
+        :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+        :param gap_open: (int or None) Penalty of the first char of a gap, switches to affine gap penalties.
+        :param gap_extend: (int or None) Penalty of every next char of a gap, switches to affine gap penalties.
+        :param band: (int or None) Half width of the band of the "banded" engine, only for Needleman-Wunsch algorithm.
+        :return: (CachedAlignment) Aligned sequences, score and the final matrix (or None).
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f'Algorithm needs to be one of: {", ".join(ALGORITHMS)}.')
+
+        options = {"engine": engine, "gap_open": gap_open, "gap_extend": gap_extend}
+        if algorithm == "nw":
+            options["band"] = band
+        key = self.key(algorithm, seq1, seq2, match, missmatch, gap, substitution=substitution, **options)
+        result = self.get(key)
+        if result is not None and (result.matrix is not None or not self.store_matrix or engine != "python"):
+            return result
+
+        aligned_1, aligned_2, frames = ALGORITHMS[algorithm](seq1, seq2, match, missmatch, gap,
+                                                             substitution=substitution, **options)
+        score = alignment_score(aligned_1, aligned_2, match, missmatch, gap, substitution, gap_open, gap_extend)
+        matrix = frames.matrix if self.store_matrix and frames is not None else None
+        result = CachedAlignment(aligned_1, aligned_2, score, matrix)
+        self.put(key, result)
+        return result
+
+    def get(self, key):
+        """
+        Looks the result up in memory, then in the database.
+        :param key: (str) Content hash of the alignment.
+        :return: (CachedAlignment or None) Cached result, None if there is none.
+        """
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return result
+            row = None
+            if self.path is not None:
+                row = self._connect().execute("SELECT aligned_1, aligned_2, score, matrix FROM alignments "
+                                              "WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            result = CachedAlignment(row[0], row[1], row[2], None if row[3] is None else _decompress(row[3]))
+            self._remember(key, result)
+            return result
+
+    def put(self, key, result):
+        """
+        Stores the result in memory and in the database.
+        :param key: (str) Content hash of the alignment.
+        :param result: (CachedAlignment) Result to be stored.
+        :return: None.
+        """
+        with self._lock:
+            self._remember(key, result)
+            if self.path is not None:
+                matrix = None if result.matrix is None else _compress(result.matrix)
+                with self._connect() as connection:
+                    connection.execute("INSERT OR REPLACE INTO alignments VALUES (?, ?, ?, ?, ?)",
+                                       (key, result.aligned_1, result.aligned_2, result.score, matrix))
+
+    def stats(self):
+        """
+        Returns the statistics of this cache object in this process.
+        :return: (dict) Numbers of memory hits, disk hits and misses, hit rate and number of results in memory.
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                    "size": len(self._memory)}
+
+    def clear(self):
+        """
+        Removes all the results from memory and from the database.
+        :return: None.
+        """
+        with self._lock:
+            self._memory.clear()
+            if self.path is not None:
+                with self._connect() as connection:
+                    connection.execute("DELETE FROM alignments")
+
+    def close(self):
+        """
+        Closes the connection to the database of this process.
+        :return: None.
+        """
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def _remember(self, key, result):
+        """
+        Puts the result into the in-memory LRU, dropping the least recently used one if it is full. Called with the
+        lock.
+        :param key: (str) Content hash of the alignment.
+        :param result: (CachedAlignment) Result to be remembered.
+        :return: None.
+        """
+        if self.maxsize == 0:
+            return
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _connect(self):
+        """
+        Returns the connection to the database, opening a new one in a new process - a connection inherited from the
+        parent process must not be used. Called with the lock.
+        :return: (sqlite3.Connection) Connection to the database.
+        """
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS alignments (key TEXT PRIMARY KEY, aligned_1 TEXT, "
+                                     "aligned_2 TEXT, score INTEGER, matrix BLOB)")
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+    def __getstate__(self):
+        # Sent to worker processes without the lock, the connection, the results in memory and the statistics
+        state = self.__dict__.copy()
+        state.update(hits=0, disk_hits=0, misses=0, _memory=OrderedDict(), _lock=None, _connection=None, _pid=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def _compress(matrix):
+    """
+    Compresses the matrix to the bytes of an .npz file.
+    :param matrix: (numpy array) Matrix to be compressed.
+    :return: (bytes) Compressed matrix.
+    """
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, matrix=matrix)
+    return buffer.getvalue()
+
+
+def _decompress(data):
+    """
+    Decompresses the matrix from the bytes of an .npz file.
+    :param data: (bytes) Compressed matrix.
+    :return: (numpy array) Matrix.
+    """
+    with np.load(io.BytesIO(data)) as archive:
+        return archive["matrix"]
@@ -0,0 +1,237 @@
+import argparse
+import contextlib
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import zip_longest
+
+from cache import AlignmentCache
+from fasta import read_fasta
+from instrumentation import Instrumentation, instrument
+from needleman_wunsch import ENGINES as NW_ENGINES, needleman_wunsch_algorithm
+from scoring import alignment_score, load_substitution_matrix
+from smith_waterman import ENGINES as SW_ENGINES, smith_waterman_algorithm
+from validation import check_input
+
+_settings = None  # Algorithm and scoring parameters of the run, set once in every worker process
+
+
+def read_pairs(path):
+    """
+    Generator reading pairs of sequences from a TSV file, one pair per line - either "seq1<TAB>seq2" or
+    "name1<TAB>seq1<TAB>name2<TAB>seq2". Empty lines and lines starting with "#" are skipped.
+    :param path: (str) Path to the TSV file, "-" reads the standard input.
+    :return: (generator of tuples of 4 str) Name and sequence of both sequences of every pair.
+    """
+    if not isinstance(path, str):
+        raise TypeError('Path needs to be a string.')
+
+    with (contextlib.nullcontext(sys.stdin) if path == "-" else open(path)) as file:
+        for number, line in enumerate(file, 1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            if len(fields) == 2:
+                yield f"{number}.1", fields[0].strip().upper(), f"{number}.2", fields[1].strip().upper()
+            elif len(fields) == 4:
+                yield fields[0], fields[1].strip().upper(), fields[2], fields[3].strip().upper()
+            else:
+                raise ValueError(f'Line {number} of "{path}" needs to have 2 or 4 tab separated fields.')
+
+
+def fasta_pairs(paths):
+    """
+    Generator pairing the records of FASTA files - the n-th record of the first file with the n-th record of the
+    second one, or every two consecutive records of a single file. A record left without a pair raises ValueError
+    once the pairs before it are generated.
+    :param paths: (list of 1 or 2 str) Paths to the FASTA files.
+    :return: (generator of tuples of 4 str) Name and sequence of both sequences of every pair.
+    """
+    if len(paths) == 1:
+        records = read_fasta(paths[0])
+        for name1, seq1 in records:
+            second = next(records, None)
+            if second is None:
+                raise ValueError(f'File "{paths[0]}" has an odd number of records, the last one ("{name1}") has no '
+                                 f'pair.')
+            yield name1, seq1, *second
+        return
+
+    for number, (first, second) in enumerate(zip_longest(read_fasta(paths[0]), read_fasta(paths[1])), 1):
+        if first is None or second is None:
+            raise ValueError(f'Files "{paths[0]}" and "{paths[1]}" have different numbers of records, record {number} '
+                             f'of "{paths[0] if second is None else paths[1]}" has no pair.')
+        yield *first, *second
+
+
+def _init_settings(settings):
+    """
+    Initializer of a worker process, stores the parameters of the run once instead of sending them with every pair.
+    :param settings: (dict) Algorithm and scoring parameters.
+    :return: None.
+    """
+    global _settings
+    _settings = settings
+
+
+def _align_pair(pair):
+    """
+    Aligns one pair of sequences with the parameters of the run, instrumenting the phases if timings are requested.
+    :param pair: (tuple of 4 str) Name and sequence of both sequences.
+    :return: (dict) Result of the pair, see _align, with the statistics of the phases under "timings" key if
+    requested.
+    """
+    if not _settings["timings"]:
+        return _align(pair)
+    with instrument(memory=_settings["timings"] == "memory") as instrumentation:
+        result = _align(pair)
+    result["timings"] = instrumentation.phases
+    return result
+
+
+def _align(pair):
+    """
+    Aligns one pair of sequences with the parameters of the run, without the animation frames.
+    :param pair: (tuple of 4 str) Name and sequence of both sequences.
+    :return: (dict) Names, score and, unless only the score is computed, aligned sequences, or names and an error.
+    """
+    name1, seq1, name2, seq2 = pair
+    settings = _settings
+    if not check_input(seq1) or not check_input(seq2):
+        return {"name1": name1, "name2": name2, "error": "sequences need to be non-empty, without numbers or "
+                                                         "special chars"}
+
+    algorithm = needleman_wunsch_algorithm if settings["algorithm"] == "nw" else smith_waterman_algorithm
+    scoring = (settings["match"], settings["mismatch"], settings["gap"])
+    options = {key: settings[key] for key in ("engine", "substitution", "gap_open", "gap_extend")}
+    if settings["algorithm"] == "nw":
+        options["band"] = settings["band"]
+    try:
+        if settings["score_only"]:
+            score = algorithm(seq1, seq2, *scoring, score_only=True, **options)
+            return {"name1": name1, "name2": name2, "score": score}
+        if settings["cache"] is not None:
+            aligned_1, aligned_2, score, _ = settings["cache"].align(settings["algorithm"], seq1, seq2, *scoring,
+                                                                     **options)
+        else:
+            aligned_1, aligned_2, _ = algorithm(seq1, seq2, *scoring, **options)
+            score = alignment_score(aligned_1, aligned_2, *scoring, settings["substitution"], settings["gap_open"],
+                                    settings["gap_extend"])
+    except ValueError as error:
+        return {"name1": name1, "name2": name2, "error": str(error)}
+    return {"name1": name1, "name2": name2, "score": score, "aligned_1": aligned_1, "aligned_2": aligned_2}
+
+
+def align_pairs(pairs, settings, jobs=1):
+    """
+    Generator aligning a stream of pairs, in order. With more jobs the pairs are aligned by a pool of worker processes,
+    at most twice as many pairs as workers are in flight at once, so memory does not grow with the input.
+    :param pairs: (iterable of tuples of 4 str) Name and sequence of both sequences of every pair.
+    :param settings: (dict) Algorithm and scoring parameters.
+    :param jobs: (int) Number of worker processes, 1 aligns in this process.
+    :return: (generator of dicts) Result of every pair, see _align_pair.
+    """
+    if not isinstance(jobs, int) or jobs < 1:
+        raise ValueError('Number of jobs needs to be a positive integer.')
+
+    if jobs == 1:
+        _init_settings(settings)
+        yield from map(_align_pair, pairs)
+        return
+
+    with ProcessPoolExecutor(jobs, initializer=_init_settings, initargs=(settings,)) as pool:
+        pending = deque()
+        for pair in pairs:
+            pending.append(pool.submit(_align_pair, pair))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def build_parser():
+    """
+    Creates the parser of the command line arguments.
+    :return: (argparse.ArgumentParser) Parser of the arguments.
+    """
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Aligns pairs of sequences without the "
+                                     "graphical interface, streaming one result per line.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--fasta", nargs="+", metavar="FILE", help="one FASTA file aligning consecutive records, or "
+                        "two FASTA files aligning their records in order")
+    source.add_argument("--pairs", metavar="FILE", help='TSV file of "seq1 seq2" or "name1 seq1 name2 seq2" lines, '
+                        '"-" reads the standard input')
+    parser.add_argument("--algorithm", choices=("nw", "sw"), default="nw",
+                        help="nw - global Needleman-Wunsch, sw - local Smith-Waterman (default: nw)")
+    parser.add_argument("--engine", choices=NW_ENGINES, default="wavefront",
+                        help="filling engine, sw supports only python, wavefront and tiled (default: wavefront)")
+    parser.add_argument("--match", type=int, default=1, help="match value (default: 1)")
+    parser.add_argument("--mismatch", type=int, default=-1, help="mismatch value (default: -1)")
+    parser.add_argument("--gap", type=int, default=-2, help="gap penalty value (default: -2)")
+    parser.add_argument("--gap-open", type=int, help="penalty of the first char of a gap, switches to affine gaps")
+    parser.add_argument("--gap-extend", type=int, help="penalty of every next char of a gap, switches to affine gaps")
+    parser.add_argument("--band", type=int, help="half width of the band of the banded engine")
+    parser.add_argument("--substitution", help="substitution matrix name (BLOSUM62, PAM250) or path")
+    parser.add_argument("--score-only", action="store_true", help="compute only the scores, in linear memory")
+    parser.add_argument("--format", choices=("tsv", "json"), default="tsv", help="output format (default: tsv)")
+    parser.add_argument("--cache", metavar="FILE", help="SQLite file caching the alignments between runs, shared by "
+                        "the workers (not used with --score-only)")
+    parser.add_argument("--timings", action="store_const", const="time", help="print wall time, cells per second "
+                        "and frames of every phase to the standard error")
+    parser.add_argument("--trace-memory", dest="timings", action="store_const", const="memory",
+                        help="like --timings, with peak bytes allocated in every phase (slower)")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes (default: 1)")
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of the command line interface.
+    :param argv: (list of str or None) Arguments, None reads them from sys.argv.
+    :return: (int) Exit status - 0 if all the pairs were aligned, 1 if some of them were not.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.algorithm == "sw" and args.engine not in SW_ENGINES:
+        parser.error(f'--algorithm sw supports only engines: {", ".join(SW_ENGINES)}')
+    if args.fasta is not None and len(args.fasta) > 2:
+        parser.error('--fasta takes one or two files')
+    if args.jobs < 1:
+        parser.error('--jobs needs to be a positive integer')
+    try:
+        substitution = None if args.substitution is None else load_substitution_matrix(args.substitution)
+    except ValueError as error:
+        parser.error(str(error))
+
+    settings = {"algorithm": args.algorithm, "engine": args.engine, "match": args.match, "mismatch": args.mismatch,
+                "gap": args.gap, "gap_open": args.gap_open, "gap_extend": args.gap_extend, "band": args.band,
+                "substitution": substitution, "score_only": args.score_only,
+                "cache": None if args.cache is None else AlignmentCache(args.cache), "timings": args.timings}
+    pairs = fasta_pairs(args.fasta) if args.fasta is not None else read_pairs(args.pairs)
+    columns = ["name1", "name2", "score"] + ([] if args.score_only else ["aligned_1", "aligned_2"])
+
+    status = 0
+    instrumentation = Instrumentation(memory=args.timings == "memory")
+    if args.format == "tsv":
+        print("\t".join(columns))
+    try:
+        for result in align_pairs(pairs, settings, args.jobs):
+            instrumentation.merge(result.pop("timings", {}))
+            if "error" in result:
+                print(f'{result["name1"]}\t{result["name2"]}: {result["error"]}', file=sys.stderr)
+                status = 1
+            elif args.format == "tsv":
+                print("\t".join(str(result[column]) for column in columns))
+            else:
+                print(json.dumps(result))
+    except (OSError, ValueError) as error:
+        parser.error(str(error))  # Unreadable or malformed input files
+    if args.timings:
+        print(instrumentation.report(), file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import heapq
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from fasta import read_fasta
+from scoring import load_substitution_matrix
+from smith_waterman import smith_waterman_algorithm, smith_waterman_score
+
+_search = None  # Query and scoring parameters of the search run by the worker process
+
+
+def _init_search(query, match, missmatch, gap, substitution):
+    """
+    Initializer of a worker process, stores the query and scoring parameters once instead of sending them with every
+    chunk of records.
+    :param query: (str) Query sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param substitution: (SubstitutionMatrix or None) Substitution matrix replacing match and missmatch values.
+    :return: None.
+    """
+    global _search
+    _search = (query, match, missmatch, gap, substitution)
+
+
+def _score_chunk(chunk, top_n):
+    """
+    Scores every record of the chunk against the query with score-only Smith-Waterman algorithm.
+    :param chunk: (list of tuples of int, str, str) Index, name and sequence of the records.
+    :param top_n: (int) Number of best hits to return.
+    :return: (list of tuples of int, int, str, str) Score, negated index, name and sequence of the best hits of the
+    chunk, negated index makes the earlier record win a tie.
+    """
+    query, match, missmatch, gap, substitution = _search
+    scored = ((smith_waterman_score(sequence, query, match, missmatch, gap, substitution), -index, name, sequence)
+              for index, name, sequence in chunk)
+    return heapq.nlargest(top_n, scored)
+
+
+def _align_hit(hit):
+    """
+    Runs Smith-Waterman algorithm with traceback for a hit.
+    :param hit: (tuple of int, int, str, str) Score, negated index, name and sequence of the hit.
+    :return: (tuple of int, str, str, str) Score, name, aligned query and aligned target sequence.
+    """
+    query, match, missmatch, gap, substitution = _search
+    score, _, name, sequence = hit
+    aligned_query, aligned_target, _ = smith_waterman_algorithm(query, sequence, match, missmatch, gap,
+                                                                engine="wavefront", substitution=substitution)
+    return score, name, aligned_query, aligned_target
+
+
+def _keep_best(best, hits, top_n):
+    """
+    Merges the hits into the bounded min-heap of the best hits.
+    :param best: (list) Heap of at most top_n best hits so far.
+    :param hits: (iterable of tuples) Hits to be merged.
+    :param top_n: (int) Size of the heap.
+    :return: None.
+    """
+    for hit in hits:
+        if len(best) < top_n:
+            heapq.heappush(best, hit)
+        elif hit > best[0]:
+            heapq.heapreplace(best, hit)
+
+
+def search_database(query, path, match, missmatch, gap, top_n=10, jobs=None, chunk_size=64, substitution=None):
+    """
+    Function searching a multi-FASTA file for the records most similar to the query. Records are streamed in chunks to
+    a pool of worker processes scoring them with score-only Smith-Waterman algorithm, only a bounded heap of the best
+    hits is kept, and the full traceback is run just for them.
+    :param query: (str) Query sequence.
+    :param path: (str) Path to the (multi-)FASTA file with target sequences.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param top_n: (int) Number of best hits to be returned.
+    :param jobs: (int or None) Number of worker processes, None uses all the CPUs, 1 searches in this process.
+    :param chunk_size: (int) Number of records sent to a worker at once.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return: (list of tuples of int, str, str, str) Score, name, aligned query and aligned target of the best hits,
+    from the best one.
+    """
+    if not isinstance(query, str):
+        raise TypeError('Query needs to be a type of string.')
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+    for value in (top_n, chunk_size) + ((jobs,) if jobs is not None else ()):
+        if not isinstance(value, int) or value < 1:
+            raise ValueError('Number of hits, chunk size and number of jobs need to be positive integers.')
+
+    if isinstance(substitution, str):
+        substitution = load_substitution_matrix(substitution)  # Loaded once, not by every worker for every record
+    jobs = jobs or os.cpu_count() or 1
+    search = (query.upper(), match, missmatch, gap, substitution)
+    records = ((index, name, sequence) for index, (name, sequence) in enumerate(read_fasta(path)))
+    chunks = iter(lambda: list(itertools.islice(records, chunk_size)), [])
+    best = []
+
+    if jobs == 1:
+        _init_search(*search)
+        for chunk in chunks:
+            _keep_best(best, _score_chunk(chunk, top_n), top_n)
+        return [_align_hit(hit) for hit in sorted(best, reverse=True)]
+
+    with ProcessPoolExecutor(jobs, initializer=_init_search, initargs=search) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_score_chunk, chunk, top_n))
+            if len(pending) >= 2 * jobs:  # Bounded number of chunks in flight keeps the memory bounded
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _keep_best(best, future.result(), top_n)
+        for future in pending:
+            _keep_best(best, future.result(), top_n)
+        return list(pool.map(_align_hit, sorted(best, reverse=True)))
@@ -0,0 +1,32 @@
+import gzip
+
+
+def read_fasta(path):
+    """
+    Generator reading a (multi-)FASTA file record by record, so only one record is held in memory at a time. Files
+    ending with ".gz" are decompressed on the fly.
+    :param path: (str) Path to the FASTA file.
+    :return: (generator of tuples of str, str) Name (first word of the header line) and upper-cased sequence of every
+    record.
+    """
+    if not isinstance(path, str):
+        raise TypeError('Path needs to be a string.')
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as file:
+        name, parts = None, []
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith(";"):
+                continue
+            if line.startswith(">"):
+                if name is not None:
+                    yield name, "".join(parts).upper()
+                header = line[1:].split()
+                name, parts = header[0] if header else "", []
+            elif name is None:
+                raise ValueError(f'File "{path}" is not in FASTA format - sequence found before the first header.')
+            else:
+                parts.append(line)
+        if name is not None:
+            yield name, "".join(parts).upper()
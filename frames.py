@@ -0,0 +1,150 @@
+import array
+from collections import namedtuple
+
+import numpy as np
+
+from instrumentation import phase
+
+# Predecessor (move) codes stored for each recorded step
+MOVE_NONE = 0
+MOVE_DIAG = 1
+MOVE_UP = 2
+MOVE_LEFT = 4
+
+# Phases of the algorithms reported by the step events
+PHASE_INITIALIZATION = "initialization"
+PHASE_FILLING = "filling"
+PHASE_TRACEBACK = "traceback"
+
+# Single event of the animation - the cell (row, col) got the value in the phase, coming from the move
+Step = namedtuple("Step", ["phase", "row", "col", "value", "move"])
+
+
+class FrameRecorder:
+    """
+    Class recording the animation of filling a matrix as a compact log of steps instead of a full copy of the matrix
+    per step. Every step stores only the changed cell, its new and previous value and the chosen predecessor, any
+    frame is rebuilt on demand - from the nearest keyframe if keyframes are kept, otherwise from the final matrix.
+    """
+    def __init__(self, matrix, keyframe_interval=None):
+        """
+        FrameRecorder initialization method.
+        :param matrix: (numpy array) Matrix which is going to be filled, the recorder writes into it.
+        :param keyframe_interval: (int or None) Every how many steps a full copy of the matrix is kept, None keeps no
+        copies and rebuilds the frames from the final matrix.
+        """
+        if not isinstance(matrix, np.ndarray) or matrix.ndim != 2:
+            raise TypeError('Matrix needs to be a two dimensional numpy array.')
+        if keyframe_interval is not None and (not isinstance(keyframe_interval, int) or keyframe_interval < 1):
+            raise ValueError('Keyframe interval needs to be a positive integer or None.')
+
+        self.matrix = matrix
+        self.keyframe_interval = keyframe_interval
+        self.rows = array.array('i')
+        self.cols = array.array('i')
+        self.values = array.array(matrix.dtype.char)
+        self.previous = array.array(matrix.dtype.char)
+        self.moves = array.array('B')
+        self.keyframes = {}
+        if keyframe_interval is not None:
+            self.keyframes[-1] = matrix.copy()
+
+    def set(self, row, col, value, move=MOVE_NONE):
+        """
+        Writes the value into the matrix and records it as a single step of the animation.
+        :param row: (int) Row of the cell.
+        :param col: (int) Column of the cell.
+        :param value: (int or float) New value of the cell.
+        :param move: (int) Move code of the chosen predecessor.
+        :return: None.
+        """
+        self.rows.append(row)
+        self.cols.append(col)
+        self.previous.append(self.matrix[row, col])
+        self.values.append(value)
+        self.moves.append(move)
+        self.matrix[row, col] = value
+        if self.keyframe_interval is not None and len(self.rows) % self.keyframe_interval == 0:
+            self.keyframes[len(self.rows) - 1] = self.matrix.copy()
+
+    def step(self, index):
+        """
+        Returns the recorded step.
+        :param index: (int) Index of the step.
+        :return: (tuple of int, int, value, int) Row, column, new value and move code of the step.
+        """
+        return self.rows[index], self.cols[index], self.values[index], self.moves[index]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        """
+        Rebuilds the matrix as it looked right after the given step.
+        :param index: (int) Index of the frame, negative indices count from the end.
+        :return: (numpy array) Rebuilt frame.
+        """
+        if not isinstance(index, (int, np.integer)):
+            raise TypeError('Frame index needs to be an integer.')
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Frame index out of range.')
+
+        with phase("frames", frames=1):
+            if self.keyframe_interval is not None:
+                start = max(key for key in self.keyframes if key <= index)
+                frame = self.keyframes[start].copy()
+                self._apply(frame, start + 1, index + 1)
+            else:
+                frame = self.matrix.copy()
+                self._undo(frame, index + 1, len(self))
+        return frame
+
+    def __iter__(self):
+        """
+        Iterates over all the frames, applying the steps one after another.
+        :return: (generator of numpy arrays) Frames of the animation.
+        """
+        if not len(self):
+            return
+        frame = self[0]
+        yield frame.copy()
+        for index in range(1, len(self)):
+            with phase("frames", frames=1):
+                frame[self.rows[index], self.cols[index]] = self.values[index]
+                copy = frame.copy()
+            yield copy
+
+    def _apply(self, frame, start, stop):
+        """
+        Writes the new values of the steps from start to stop into the frame.
+        :param frame: (numpy array) Frame to be modified.
+        :param start: (int) First step to apply.
+        :param stop: (int) Step at which to stop (exclusive).
+        :return: None.
+        """
+        if start >= stop:
+            return
+        rows = np.frombuffer(self.rows, dtype=np.int32)[start:stop]
+        cols = np.frombuffer(self.cols, dtype=np.int32)[start:stop]
+        values = np.frombuffer(self.values, dtype=frame.dtype)[start:stop]
+        # With repeated cells the last assigned value is kept, which is the latest step
+        frame[rows, cols] = values
+
+    def _undo(self, frame, start, stop):
+        """
+        Restores the previous values of the steps from start to stop in the frame.
+        :param frame: (numpy array) Frame to be modified.
+        :param start: (int) First step to undo.
+        :param stop: (int) Step at which to stop (exclusive).
+        :return: None.
+        """
+        if start >= stop:
+            return
+        # Reversed, so the value from before the earliest step is the one kept - copied, because NumPy may assign
+        # through a view with negative strides in the memory order, which would keep the latest one
+        rows = np.frombuffer(self.rows, dtype=np.int32)[start:stop][::-1].copy()
+        cols = np.frombuffer(self.cols, dtype=np.int32)[start:stop][::-1].copy()
+        previous = np.frombuffer(self.previous, dtype=frame.dtype)[start:stop][::-1].copy()
+        frame[rows, cols] = previous
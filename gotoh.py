@@ -0,0 +1,154 @@
+import numpy as np
+
+from scoring import get_substitution_matrix
+
+# Bits of the Gotoh pointer matrix
+FROM_MATCH = 1  # Best of match and vertical gap states comes from the match state
+NOT_HORIZONTAL = 2  # Cell does not end with a horizontal gap
+VERTICAL_OPEN = 4  # Vertical gap is opened here, not extended
+HORIZONTAL_OPEN = 8  # Horizontal gap is opened here, not extended
+LOCAL_START = 16  # Local alignment starts here, the best of match and vertical gap states is zero
+
+# Value of the cells out of the matrix, far from any score but safe to add penalties to
+_OUT_OF_MATRIX = -(1 << 60)
+
+
+def gotoh_fill(codes1, profile, gap_open, gap_extend, local=False):
+    """
+    Function filling the three Gotoh matrices row by row - M (chars aligned), Ix (gap in sequence 2, vertical) and Iy
+    (gap in sequence 1, horizontal). Ix depends only on the previous row, and since opening a gap does not cost less
+    than extending it, Iy of a whole row is a running maximum over the row, so every row is a few NumPy operations.
+    Only two rows of values and the pointer matrix are kept.
+    :param codes1: (numpy array of uint8) Encoded sequence of the rows.
+    :param profile: (numpy array) Scores of every letter of the alphabet against the sequence of the columns.
+    :param gap_open: (int) Penalty of the first char of a gap.
+    :param gap_extend: (int) Penalty of every next char of a gap.
+    :param local: (bool) True clips the scores at zero like in Smith-Waterman algorithm.
+    :return pointers: (numpy array of uint8) Pointer matrix with FROM_MATCH, NOT_HORIZONTAL, VERTICAL_OPEN,
+    HORIZONTAL_OPEN and LOCAL_START bits.
+    :return score: (int) Score of the bottom right cell, or of the best cell for local alignment.
+    :return end: (tuple of ints) Cell the traceback starts from.
+    """
+    n, m = len(codes1), profile.shape[1]
+    steps = np.arange(m + 1, dtype=np.int64) * gap_extend
+    pointers = np.zeros((n + 1, m + 1), dtype=np.uint8)
+
+    # First row, a single horizontal gap for global alignment
+    best = np.zeros(m + 1, dtype=np.int64)
+    if not local:
+        best[1:] = gap_open - gap_extend + steps[1:]
+    vertical = np.full(m + 1, _OUT_OF_MATRIX, dtype=np.int64)
+    score, end = (0, (0, 0)) if local else (int(best[-1]), (n, m))
+
+    for x in range(1, n + 1):
+        match = np.empty(m + 1, dtype=np.int64)
+        match[0] = _OUT_OF_MATRIX
+        np.add(best[:-1], profile[codes1[x - 1]], out=match[1:])
+        opened = best + gap_open
+        vertical = np.maximum(opened, vertical + gap_extend)
+        no_horizontal = np.maximum(match, vertical)
+        # First column, a single vertical gap for global alignment
+        no_horizontal[0] = 0 if local else gap_open + (x - 1) * gap_extend
+        vertical[0] = _OUT_OF_MATRIX if local else no_horizontal[0]
+        if local:
+            np.maximum(no_horizontal, 0, out=no_horizontal)
+
+        horizontal = np.empty(m + 1, dtype=np.int64)
+        horizontal[0] = _OUT_OF_MATRIX
+        horizontal[1:] = np.maximum.accumulate(no_horizontal[:-1] - steps[:-1]) + (gap_open - gap_extend) + steps[1:]
+        best = np.maximum(no_horizontal, horizontal)
+
+        row = pointers[x]
+        row[:] = (no_horizontal == match) * np.uint8(FROM_MATCH)
+        row |= (best == no_horizontal) * np.uint8(NOT_HORIZONTAL)
+        row |= (vertical == opened) * np.uint8(VERTICAL_OPEN)
+        row[1:] |= (horizontal[1:] == no_horizontal[:-1] + gap_open) * np.uint8(HORIZONTAL_OPEN)
+
+        if local:
+            row |= (no_horizontal == 0) * np.uint8(LOCAL_START)
+            y = int(np.argmax(best))
+            if best[y] > score:
+                score, end = int(best[y]), (x, y)
+        elif x == n:
+            score = int(best[-1])
+
+    return pointers, score, end
+
+
+def gotoh_traceback(seq1, seq2, pointers, x, y, local=False):
+    """
+    Walks the Gotoh pointer matrix back from the cell, switching between the match, vertical and horizontal gap states.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param pointers: (numpy array of uint8) Pointer matrix after filling phase.
+    :param x: (int) Row of the cell the traceback starts from.
+    :param y: (int) Column of the cell the traceback starts from.
+    :param local: (bool) True stops at the first cell with zero score, False walks to the top left corner.
+    :return aligned_1: (str) Aligned sequence 1.
+    :return aligned_2: (str) Aligned sequence 2.
+    """
+    aligned_1, aligned_2 = [], []
+    state = "best"
+    while True:
+        if x == 0 or y == 0:
+            if not local:
+                # Border of the global alignment matrix - a single gap up to the corner
+                aligned_1.extend(reversed(seq1[:x]))
+                aligned_2.extend("-" * x)
+                aligned_1.extend("-" * y)
+                aligned_2.extend(reversed(seq2[:y]))
+            break
+        move = pointers[x, y]
+        if state == "best":
+            state = "no_horizontal" if move & NOT_HORIZONTAL else "horizontal"
+        if state == "no_horizontal":
+            if local and move & LOCAL_START:
+                break
+            state = "match" if move & FROM_MATCH else "vertical"
+        if state == "match":
+            x, y = x - 1, y - 1
+            aligned_1.append(seq1[x])
+            aligned_2.append(seq2[y])
+            state = "best"
+        elif state == "vertical":
+            x -= 1
+            aligned_1.append(seq1[x])
+            aligned_2.append("-")
+            state = "best" if move & VERTICAL_OPEN else "vertical"
+        else:
+            y -= 1
+            aligned_1.append("-")
+            aligned_2.append(seq2[y])
+            state = "no_horizontal" if move & HORIZONTAL_OPEN else "horizontal"
+
+    return "".join(reversed(aligned_1)), "".join(reversed(aligned_2))
+
+
+def gotoh_algorithm(seq1, seq2, match, missmatch, gap_open, gap_extend, local=False, substitution=None):
+    """
+    Function performing alignment with affine gap penalties (Gotoh algorithm) - a gap of length L costs
+    gap_open + (L - 1) * gap_extend. Global like Needleman-Wunsch algorithm, or local like Smith-Waterman algorithm.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap_open: (int) Penalty of the first char of a gap.
+    :param gap_extend: (int) Penalty of every next char of a gap.
+    :param local: (bool) True performs local alignment, False global.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return aligned_1 (str): Output of sequence 1.
+    :return aligned_2 (str): Output of sequence 2.
+    :return score (int): Score of the alignment.
+    """
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+    if not all(isinstance(value, int) for value in (match, missmatch, gap_open, gap_extend)):
+        raise TypeError('Match value, missmatch value and gap penalties need to be integers.')
+    if gap_open > gap_extend:
+        raise ValueError('Gap open penalty cannot be smaller than gap extend penalty.')
+
+    table = get_substitution_matrix(seq1, seq2, match, missmatch, substitution)
+    profile = table.scores[:, table.encode(seq2)].astype(np.int64)
+    pointers, score, (x, y) = gotoh_fill(table.encode(seq1), profile, gap_open, gap_extend, local)
+    aligned_1, aligned_2 = gotoh_traceback(seq1, seq2, pointers, x, y, local)
+    return aligned_1, aligned_2, score
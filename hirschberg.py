@@ -0,0 +1,104 @@
+import numpy as np
+
+from pointers import new_pointer_matrix, pointer_traceback
+from rowwise import fill_row
+from scoring import get_substitution_matrix
+
+# Sub-problems with at most this many cells are aligned with a full matrix and pointer traceback
+FULL_MATRIX_CELLS = 1 << 16
+
+
+def _last_row(codes1, profile, gap):
+    """
+    Function computing the last row of the Needleman-Wunsch matrix keeping only two rows in memory.
+    :param codes1: (numpy array of uint8) Encoded sequence of the rows.
+    :param profile: (numpy array) Scores of every letter of the alphabet against the sequence of the columns.
+    :param gap: (int) Gap penalty value.
+    :return row: (numpy array of int64) Last row of the matrix.
+    """
+    steps = np.arange(profile.shape[1] + 1, dtype=np.int64) * gap
+    row = steps.copy()
+    for x, code in enumerate(codes1, 1):
+        row = fill_row(row, profile[code], gap, x * gap, steps=steps)
+    return row
+
+
+def _hirschberg(seq1, seq2, codes1, profile, gap, bounds, aligned_1, aligned_2):
+    """
+    Function aligning seq1[x0:x1] with seq2[y0:y1] by dividing the problem at the middle row, the column where the
+    optimal alignment crosses that row is found from the forward and the reversed last rows.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param codes1: (numpy array of uint8) Encoded sequence 1.
+    :param profile: (numpy array) Scores of every letter of the alphabet against sequence 2.
+    :param gap: (int) Gap penalty value.
+    :param bounds: (tuple of 4 ints) Rows x0, x1 and columns y0, y1 to be aligned.
+    :param aligned_1: (list of str) Parts of aligned sequence 1, appended in order.
+    :param aligned_2: (list of str) Parts of aligned sequence 2, appended in order.
+    :return: None.
+    """
+    x0, x1, y0, y1 = bounds
+    if x1 - x0 <= 1 or (x1 - x0 + 1) * (y1 - y0 + 1) <= FULL_MATRIX_CELLS:
+        # Small enough - full matrix of the sub-problem with the pointers for the traceback
+        pointers = new_pointer_matrix(x1 - x0 + 1, y1 - y0 + 1)
+        steps = np.arange(y1 - y0 + 1, dtype=np.int64) * gap
+        row = steps.copy()
+        for x in range(x0, x1):
+            row = fill_row(row, profile[codes1[x], y0:y1], gap, (x - x0 + 1) * gap, steps=steps,
+                           pointers=pointers[x - x0 + 1])
+        part_1, part_2, _, _ = pointer_traceback(seq1[x0:x1], seq2[y0:y1], pointers, x1 - x0, y1 - y0)
+        aligned_1.append(part_1)
+        aligned_2.append(part_2)
+    else:
+        middle = (x0 + x1) // 2
+        forward = _last_row(codes1[x0:middle], profile[:, y0:y1], gap)
+        backward = _last_row(codes1[middle:x1][::-1], profile[:, y0:y1][:, ::-1], gap)
+        split = y0 + int(np.argmax(forward + backward[::-1]))
+        _hirschberg(seq1, seq2, codes1, profile, gap, (x0, middle, y0, split), aligned_1, aligned_2)
+        _hirschberg(seq1, seq2, codes1, profile, gap, (middle, x1, split, y1), aligned_1, aligned_2)
+
+
+def needleman_wunsch_score(seq1, seq2, match, missmatch, gap, substitution=None):
+    """
+    Function computing the optimal global alignment score without traceback, keeping only two rows of the matrix.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return: (int) Score of the optimal global alignment.
+    """
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+
+    table = get_substitution_matrix(seq1, seq2, match, missmatch, substitution)
+    profile = table.scores[:, table.encode(seq2)].astype(np.int64)
+    return int(_last_row(table.encode(seq1), profile, gap)[-1])
+
+
+def hirschberg_algorithm(seq1, seq2, match, missmatch, gap, substitution=None):
+    """
+    Function performing global alignment with Hirschberg's divide and conquer algorithm. Gives an optimal alignment
+    with the same score as Needleman-Wunsch algorithm, but memory grows only linearly with the length of sequences.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return aligned_1 (str): Output of sequence 1 - global alignment of sequence 1.
+    :return aligned_2 (str): Output of sequence 2 - global alignment of sequence 2.
+    """
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+
+    table = get_substitution_matrix(seq1, seq2, match, missmatch, substitution)
+    profile = table.scores[:, table.encode(seq2)].astype(np.int64)
+    aligned_1, aligned_2 = [], []
+    _hirschberg(seq1, seq2, table.encode(seq1), profile, gap, (0, len(seq1), 0, len(seq2)), aligned_1, aligned_2)
+    return "".join(aligned_1), "".join(aligned_2)
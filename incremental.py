@@ -0,0 +1,116 @@
+import numpy as np
+
+from pointers import new_pointer_matrix, pointer_traceback
+from rowwise import fill_row
+from scoring import get_substitution_matrix, load_substitution_matrix
+
+
+def _common_prefix(old, new):
+    """
+    Function computing the length of the common prefix of two strings.
+    :param old: (str) First string.
+    :param new: (str) Second string.
+    :return: (int) Number of the leading chars the strings share.
+    """
+    length = min(len(old), len(new))
+    if old[:length] == new[:length]:
+        return length
+    low, high = 0, length  # old[:low] == new[:low], old[:high] != new[:high]
+    while high - low > 1:
+        middle = (low + high) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+class IncrementalAligner:
+    """
+    Class aligning sequences which change a little between the calls, like while they are being typed. Cell (x, y) of
+    the matrix depends only on seq1[:x] and seq2[:y], so the aligner keeps the last filled matrix and computes only the
+    rows after the common prefix of the old and new sequence 1 and the columns after the common prefix of the old and
+    new sequence 2 - appending a char to a sequence costs one row or column instead of the whole matrix.
+    """
+    def __init__(self, match, missmatch, gap, local=False, substitution=None):
+        """
+        IncrementalAligner initialization method.
+        :param match: (int) Match value.
+        :param missmatch: (int) Missmatch value.
+        :param gap: (int) Gap penalty value.
+        :param local: (bool) True for Smith-Waterman algorithm, False for Needleman-Wunsch algorithm.
+        :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+        """
+        if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+            raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+
+        self.match = match
+        self.missmatch = missmatch
+        self.gap = gap
+        self.local = local
+        self.substitution = load_substitution_matrix(substitution) if isinstance(substitution, str) else substitution
+        self.seq1 = ""
+        self.seq2 = ""
+        # Matrices of the last alignment are views of buffers which can hold larger ones
+        self._buffer = np.zeros((1, 1), dtype=np.int64)
+        self._pointer_buffer = new_pointer_matrix(1, 1, local)
+        self.matrix = self._buffer
+        self.pointers = self._pointer_buffer
+        self.computed_cells = 0  # Number of the cells computed by the last alignment
+
+    def align(self, seq1, seq2):
+        """
+        Aligns the sequences, reusing the part of the matrix of the previous alignment which did not change.
+        :param seq1: (str) Input sequence.
+        :param seq2: (str) Input sequence.
+        :return aligned_1: (str) Aligned sequence 1.
+        :return aligned_2: (str) Aligned sequence 2.
+        :return score: (int) Score of the alignment.
+        """
+        if not isinstance(seq1, str) or not isinstance(seq2, str):
+            raise TypeError('Sequences need to be a type of string.')
+
+        n, m = len(seq1), len(seq2)
+        # The alphabet of a match and missmatch table follows the letters of the sequences, but the score of a pair of
+        # letters does not, so the reused cells stay valid
+        table = get_substitution_matrix(seq1, seq2, self.match, self.missmatch, self.substitution)
+        rows = _common_prefix(self.seq1, seq1)
+        cols = _common_prefix(self.seq2, seq2)
+
+        if n + 1 > self._buffer.shape[0] or m + 1 > self._buffer.shape[1]:
+            # Grown by half at least, so typing a sequence char by char copies the reused cells only a few times
+            shape = (max(n + 1, self._buffer.shape[0] * 3 // 2), max(m + 1, self._buffer.shape[1] * 3 // 2))
+            buffer = np.zeros(shape, dtype=np.int64)
+            pointer_buffer = new_pointer_matrix(*shape, self.local)
+            buffer[:rows + 1, :cols + 1] = self.matrix[:rows + 1, :cols + 1]
+            pointer_buffer[:rows + 1, :cols + 1] = self.pointers[:rows + 1, :cols + 1]
+            self._buffer, self._pointer_buffer = buffer, pointer_buffer
+        self.matrix = self._buffer[:n + 1, :m + 1]
+        self.pointers = self._pointer_buffer[:n + 1, :m + 1]
+        if not self.local:
+            self.matrix[:, 0] = np.arange(n + 1) * self.gap
+            self.matrix[0, :] = np.arange(m + 1) * self.gap
+
+        codes1 = table.encode(seq1)
+        profile = table.scores[:, table.encode(seq2)].astype(np.int64)
+        steps = np.arange(m + 1, dtype=np.int64) * self.gap
+
+        # Columns after the common prefix of sequence 2 in the reused rows, then all the rows after the common prefix
+        # of sequence 1
+        if cols < m:
+            for x in range(1, rows + 1):
+                self.matrix[x, cols:] = fill_row(self.matrix[x - 1, cols:], profile[codes1[x - 1], cols:], self.gap,
+                                                 int(self.matrix[x, cols]), self.local, steps[:m + 1 - cols],
+                                                 self.pointers[x, cols:])
+        for x in range(rows + 1, n + 1):
+            self.matrix[x] = fill_row(self.matrix[x - 1], profile[codes1[x - 1]], self.gap, int(self.matrix[x, 0]),
+                                      self.local, steps, self.pointers[x])
+        self.computed_cells = n * m - rows * cols
+        self.seq1, self.seq2 = seq1, seq2
+
+        if self.local:
+            x, y = np.unravel_index(np.argmax(self.matrix), self.matrix.shape)
+        else:
+            x, y = n, m
+        aligned_1, aligned_2, _, _ = pointer_traceback(seq1, seq2, self.pointers, x, y)
+        return aligned_1, aligned_2, int(self.matrix[x, y])
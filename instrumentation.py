@@ -0,0 +1,189 @@
+import contextlib
+import contextvars
+import time
+import tracemalloc
+
+# Instrumentation collecting the phases, None while the instrumentation is disabled, and the innermost phase being
+# measured - per thread (and asyncio task), so a thread of the GUI does not measure into the instrumentation of another
+_active = contextvars.ContextVar("instrumentation", default=None)
+_current = contextvars.ContextVar("phase", default=None)
+
+
+class Instrumentation:
+    """
+    Class collecting the statistics of the phases of the algorithms - calls, wall time, computed cells, emitted frames
+    and peak bytes allocated (only if memory is traced). Phases of the same name are summed up.
+    """
+    def __init__(self, memory=False):
+        """
+        Instrumentation initialization method.
+        :param memory: (bool) True traces the allocations with tracemalloc to record the peak bytes of every phase,
+        which slows the phases down.
+        """
+        self.memory = memory
+        self.phases = {}
+
+    def add(self, name, seconds, cells=0, frames=0, peak_bytes=None, calls=1):
+        """
+        Adds a finished phase to the statistics.
+        :param name: (str) Name of the phase.
+        :param seconds: (float) Wall time of the phase.
+        :param cells: (int) Number of the cells of the matrix computed in the phase.
+        :param frames: (int) Number of the animation frames (steps) emitted in the phase.
+        :param peak_bytes: (int or None) Peak of the memory allocated in the phase, None if not traced.
+        :param calls: (int) Number of the calls of the phase summed up in the values.
+        :return: None.
+        """
+        stats = self.phases.setdefault(name, {"calls": 0, "seconds": 0.0, "cells": 0, "frames": 0,
+                                              "peak_bytes": None})
+        stats["calls"] += calls
+        stats["seconds"] += seconds
+        stats["cells"] += cells
+        stats["frames"] += frames
+        if peak_bytes is not None:
+            stats["peak_bytes"] = max(stats["peak_bytes"] or 0, peak_bytes)
+
+    def merge(self, phases):
+        """
+        Adds the statistics collected by another instrumentation, for example in a worker process.
+        :param phases: (dict) Phases of the other instrumentation, see Instrumentation.phases.
+        :return: None.
+        """
+        for name, stats in phases.items():
+            self.add(name, stats["seconds"], stats["cells"], stats["frames"], stats["peak_bytes"], stats["calls"])
+
+    def report(self):
+        """
+        Formats the statistics as a table, one phase per line.
+        :return: (str) Table of the phases.
+        """
+        lines = [f'{"phase":<14}{"calls":>8}{"seconds":>12}{"cells/s":>14}{"frames":>10}{"peak bytes":>14}']
+        for name, stats in self.phases.items():
+            speed = f'{stats["cells"] / stats["seconds"]:.3g}' if stats["cells"] and stats["seconds"] else "-"
+            peak = "-" if stats["peak_bytes"] is None else str(stats["peak_bytes"])
+            lines.append(f'{name:<14}{stats["calls"]:>8}{stats["seconds"]:>12.6f}{speed:>14}{stats["frames"]:>10}'
+                         f'{peak:>14}')
+        return "\n".join(lines)
+
+    def summary(self):
+        """
+        Formats the statistics as a single line, for a status bar.
+        :return: (str) Wall time of every phase, with its speed if it computed cells and its peak bytes if traced.
+        """
+        parts = []
+        for name, stats in self.phases.items():
+            details = []
+            if stats["cells"] and stats["seconds"]:
+                details.append(f'{stats["cells"] / stats["seconds"]:.3g} cells/s')
+            if stats["peak_bytes"] is not None:
+                details.append(f'peak {stats["peak_bytes"]} B')
+            part = f'{name} {stats["seconds"] * 1000:.1f} ms'
+            if details:
+                part += f' ({", ".join(details)})'
+            parts.append(part)
+        return " | ".join(parts)
+
+
+class _Phase:
+    """
+    Context manager measuring one phase into the active instrumentation.
+    """
+    def __init__(self, instrumentation, name, cells, frames):
+        """
+        _Phase initialization method.
+        :param instrumentation: (Instrumentation) Instrumentation the phase is added to.
+        :param name: (str) Name of the phase.
+        :param cells: (int) Number of the cells computed in the phase.
+        :param frames: (int) Number of the frames emitted in the phase.
+        """
+        self.instrumentation = instrumentation
+        self.name = name
+        self.cells = cells
+        self.frames = frames
+        self.peak = 0  # Highest traced memory reached before the nested phases reset the peak of tracemalloc
+
+    def __enter__(self):
+        if self.instrumentation.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Resetting the peak erases the one of the enclosing phase, so it is handed over to that phase first
+            self.parent = _current.get()
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, peak)
+            tracemalloc.reset_peak()
+            self.start_bytes = current
+            self.token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        peak_bytes = None
+        if self.instrumentation.memory:
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            _current.reset(self.token)
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, peak)
+            peak_bytes = peak - self.start_bytes
+        self.instrumentation.add(self.name, seconds, self.cells, self.frames, peak_bytes)
+        return False
+
+
+# Shared context manager doing nothing, returned while the instrumentation is disabled
+_DISABLED = contextlib.nullcontext()
+
+
+def phase(name, cells=0, frames=0):
+    """
+    Measures the phase in the with block if the instrumentation is enabled, otherwise does nothing.
+    :param name: (str) Name of the phase, for example "filling".
+    :param cells: (int) Number of the cells computed in the phase.
+    :param frames: (int) Number of the frames emitted in the phase.
+    :return: (context manager) Measuring context manager, or a shared one doing nothing.
+    """
+    instrumentation = _active.get()
+    if instrumentation is None:
+        return _DISABLED
+    return _Phase(instrumentation, name, cells, frames)
+
+
+def phase_steps(name, steps, cells=0):
+    """
+    Generator measuring the computation of every step of a lazily computed phase, without the time the consumer
+    spends between the steps, for example waiting for a full queue of the animation.
+    :param name: (str) Name of the phase.
+    :param steps: (iterable) Steps computed in the phase.
+    :param cells: (int) Number of the cells computed by every step.
+    :return: (generator) Steps of the iterable, returns its return value when exhausted.
+    """
+    instrumentation = _active.get()
+    if instrumentation is None:
+        return (yield from steps)
+    steps = iter(steps)
+    while True:
+        with _Phase(instrumentation, name, cells, 1) as measured:
+            try:
+                step = next(steps)
+            except StopIteration as stop:
+                measured.cells = measured.frames = 0
+                return stop.value
+        yield step
+
+
+@contextlib.contextmanager
+def instrument(memory=False):
+    """
+    Enables the instrumentation of the phases run in the with block, in this thread.
+    :param memory: (bool) True traces the allocations to record the peak bytes of the phases.
+    :return: (Instrumentation) Statistics of the phases, filled while the block runs.
+    """
+    instrumentation = Instrumentation(memory)
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    token = _active.set(instrumentation)
+    try:
+        yield instrumentation
+    finally:
+        _active.reset(token)
+        if started:
+            tracemalloc.stop()
@@ -0,0 +1,251 @@
+import heapq
+import json
+import os
+
+import numpy as np
+
+from banded import banded_fill, banded_traceback
+from fasta import read_fasta
+from scoring import get_substitution_matrix, load_substitution_matrix
+
+# Byte separating the sequences in the stored collection, so no k-mer spans two of them
+SEPARATOR = 0
+
+
+def _kmer_codes(letters, lookup, bits, k):
+    """
+    Function packing every k-mer of the letters into one integer, bits per letter.
+    :param letters: (numpy array of uint8) ASCII codes of the letters.
+    :param lookup: (numpy array of int16) Code of every ASCII letter in the alphabet of the index, -1 if not in it.
+    :param bits: (int) Number of bits per letter.
+    :param k: (int) Length of the k-mers.
+    :return codes: (numpy array of uint64) Code of the k-mer starting at every position.
+    :return valid: (numpy array of bool) True if the k-mer consists only of the letters of the alphabet.
+    """
+    count = len(letters) - k + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=bool)
+    letter_codes = lookup[letters]
+    invalid = np.concatenate(([0], np.cumsum(letter_codes < 0)))
+    valid = invalid[k:] == invalid[:count]
+    letter_codes = np.maximum(letter_codes, 0).astype(np.uint64)
+    codes = np.zeros(count, dtype=np.uint64)
+    for i in range(k):
+        codes <<= np.uint64(bits)
+        codes |= letter_codes[i:i + count]
+    return codes, valid
+
+
+def _alphabet_lookup(alphabet):
+    """
+    Function creating the table of the codes of the ASCII letters.
+    :param alphabet: (str) Letters of the alphabet of the index.
+    :return: (numpy array of int16) Code of every ASCII letter, -1 if not in the alphabet.
+    """
+    lookup = np.full(256, -1, dtype=np.int16)
+    lookup[np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)] = np.arange(len(alphabet))
+    return lookup
+
+
+def build_index(path, directory, k=11):
+    """
+    Function building the k-mer index of the sequences of a (multi-)FASTA file and saving it into a directory - the
+    sorted k-mer codes with the positions of their occurrences, the sequences and their names.
+    :param path: (str) Path to the (multi-)FASTA file with target sequences.
+    :param directory: (str) Directory the index is saved to, created if it does not exist.
+    :param k: (int) Length of the k-mers, every k-mer has to fit into 64 bits.
+    :return: (KmerIndex) Saved index, loaded memory-mapped.
+    """
+    if not isinstance(directory, str):
+        raise TypeError('Directory needs to be a string.')
+    if not isinstance(k, int) or k < 1:
+        raise ValueError('Length of the k-mers needs to be a positive integer.')
+
+    names, sequences = [], []
+    for name, sequence in read_fasta(path):
+        if not sequence.isascii():
+            raise ValueError(f'Sequence "{name}" contains non-ASCII letters.')
+        names.append(name)
+        sequences.append(sequence.encode("ascii"))
+
+    offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(sequence) + 1 for sequence in sequences])
+    letters = np.frombuffer(b"".join(sequence + bytes([SEPARATOR]) for sequence in sequences), dtype=np.uint8)
+    alphabet = "".join(chr(letter) for letter in np.unique(letters) if letter != SEPARATOR)
+    bits = max(1, (len(alphabet) - 1).bit_length())
+    if k * bits > 64:
+        raise ValueError(f'K-mers of length {k} over {len(alphabet)} letters do not fit into 64 bits, '
+                         f'the largest possible length is {64 // bits}.')
+
+    lookup = _alphabet_lookup(alphabet)
+    codes, valid = _kmer_codes(letters, lookup, bits, k)
+    positions = np.flatnonzero(valid)
+    order = np.argsort(codes[positions], kind="stable")
+
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "kmers.npy"), codes[positions[order]])
+    np.save(os.path.join(directory, "positions.npy"), positions[order].astype(np.int64))
+    np.save(os.path.join(directory, "sequences.npy"), letters)
+    np.save(os.path.join(directory, "offsets.npy"), offsets)
+    with open(os.path.join(directory, "index.json"), "w") as file:
+        json.dump({"k": k, "alphabet": alphabet, "bits": bits, "names": names}, file)
+    return KmerIndex(directory)
+
+
+class KmerIndex:
+    """
+    Class representing a k-mer index of a collection of target sequences saved by build_index. The arrays are
+    memory-mapped, so loading the index is instant and the pages are read from the disk only when a search needs them,
+    and they are shared by all the processes using the same index.
+    """
+    def __init__(self, directory):
+        """
+        KmerIndex initialization method.
+        :param directory: (str) Directory with an index saved by build_index.
+        """
+        if not isinstance(directory, str):
+            raise TypeError('Directory needs to be a string.')
+
+        with open(os.path.join(directory, "index.json")) as file:
+            meta = json.load(file)
+        self.directory = directory
+        self.k = meta["k"]
+        self.alphabet = meta["alphabet"]
+        self.bits = meta["bits"]
+        self.names = meta["names"]
+        self.kmers = np.load(os.path.join(directory, "kmers.npy"), mmap_mode="r")
+        self.positions = np.load(os.path.join(directory, "positions.npy"), mmap_mode="r")
+        self.sequences = np.load(os.path.join(directory, "sequences.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode="r")
+        self._lookup = _alphabet_lookup(self.alphabet)
+
+    def __len__(self):
+        return len(self.names)
+
+    def sequence(self, number):
+        """
+        Returns a target sequence of the collection.
+        :param number: (int) Number of the sequence, in the order of the FASTA file.
+        :return: (str) Sequence.
+        """
+        return self.sequences[self.offsets[number]:self.offsets[number + 1] - 1].tobytes().decode("ascii")
+
+    def seeds(self, query, max_occurrences=1000):
+        """
+        Finds the exact k-mer matches (seeds) of the query in the target sequences.
+        :param query: (str) Query sequence.
+        :param max_occurrences: (int) K-mers occurring more times in the collection (repeats, low complexity regions)
+        are skipped.
+        :return targets: (numpy array of int64) Number of the target sequence of every seed.
+        :return diagonals: (numpy array of int64) Diagonal of every seed - its position in the target minus its position
+        in the query.
+        """
+        if not query.isascii():
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        codes, valid = _kmer_codes(np.frombuffer(query.encode("ascii"), dtype=np.uint8), self._lookup, self.bits,
+                                   self.k)
+        query_positions = np.flatnonzero(valid)
+        codes = codes[query_positions]
+        starts = np.searchsorted(self.kmers, codes, side="left")
+        counts = np.searchsorted(self.kmers, codes, side="right") - starts
+        frequent = counts > max_occurrences
+        counts[frequent] = 0
+
+        # Every k-mer of the query expanded into all its occurrences
+        owner = np.repeat(np.arange(len(codes)), counts)
+        within = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = np.asarray(self.positions[starts[owner] + within])
+        targets = np.searchsorted(self.offsets, positions, side="right") - 1
+        diagonals = positions - self.offsets[targets] - query_positions[owner]
+        return targets, diagonals
+
+    def search(self, query, match, missmatch, gap, top_n=10, band=16, min_seeds=1, max_occurrences=1000,
+               substitution=None):
+        """
+        Searches the collection for the targets most similar to the query with seed-and-extend - the exact k-mer
+        matches of the query are grouped by target and diagonal, neighbouring diagonals are merged, and Smith-Waterman
+        algorithm is run only in a band around every group of them. Targets with no seeds are never aligned, so a hit
+        which shares no k-mer with the query is missed, and the scores are those of the best alignment in the band.
+        :param query: (str) Query sequence.
+        :param match: (int) Match value.
+        :param missmatch: (int) Missmatch value.
+        :param gap: (int) Gap penalty value.
+        :param top_n: (int) Number of best hits to be returned.
+        :param band: (int) Half width of the band around the diagonals of the seeds.
+        :param min_seeds: (int) Smallest number of seeds of a group of diagonals to be extended.
+        :param max_occurrences: (int) K-mers occurring more times in the collection are not used as seeds.
+        :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+        :return: (list of tuples of int, str, str, str) Score, name, aligned query and aligned target of the best hits,
+        from the best one - like search_database.
+        """
+        if not isinstance(query, str):
+            raise TypeError('Query needs to be a type of string.')
+        if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+            raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+        for value in (top_n, min_seeds, max_occurrences):
+            if not isinstance(value, int) or value < 1:
+                raise ValueError('Number of hits, seeds and occurrences need to be positive integers.')
+        if not isinstance(band, int) or band < 0:
+            raise ValueError('Band width needs to be a non-negative integer.')
+
+        query = query.upper()
+        if isinstance(substitution, str):
+            substitution = load_substitution_matrix(substitution)
+        targets, diagonals = self.seeds(query, max_occurrences)
+        if not len(targets):
+            return []
+        groups, counts = np.unique(np.stack((targets, diagonals), axis=1), axis=0, return_counts=True)
+        boundaries = np.flatnonzero(np.diff(groups[:, 0])) + 1
+
+        best = []
+        for rows, seeds in zip(np.split(groups, boundaries), np.split(counts, boundaries)):
+            number = int(rows[0, 0])
+            hit = self._extend(query, number, rows[:, 1], seeds, match, missmatch, gap, band, min_seeds,
+                               substitution)
+            if hit is None:
+                continue
+            if len(best) < top_n:
+                heapq.heappush(best, hit)
+            elif hit > best[0]:
+                heapq.heapreplace(best, hit)
+        return [(score, self.names[-index], aligned_query, aligned_target)
+                for score, index, aligned_query, aligned_target in sorted(best, reverse=True)]
+
+    def _extend(self, query, number, diagonals, seeds, match, missmatch, gap, band, min_seeds, substitution):
+        """
+        Runs banded Smith-Waterman algorithm around the groups of the seed diagonals of one target.
+        :param query: (str) Query sequence.
+        :param number: (int) Number of the target sequence.
+        :param diagonals: (numpy array of int64) Sorted distinct diagonals of the seeds in the target.
+        :param seeds: (numpy array of int) Number of the seeds on every diagonal.
+        :param match: (int) Match value.
+        :param missmatch: (int) Missmatch value.
+        :param gap: (int) Gap penalty value.
+        :param band: (int) Half width of the band around the diagonals.
+        :param min_seeds: (int) Smallest number of seeds of an extended group.
+        :param substitution: (SubstitutionMatrix or None) Substitution matrix replacing match and missmatch values.
+        :return: (tuple of int, int, str, str or None) Score, negated number of the target (an earlier target wins a
+        tie), aligned query and aligned target of the best alignment, None if no group was extended or none scored.
+        """
+        target = self.sequence(number)
+        table = get_substitution_matrix(query, target, match, missmatch, substitution)
+        codes1 = table.encode(query)
+        profile = table.scores[:, table.encode(target)]
+
+        # Diagonals closer than the band to each other are covered by one band
+        splits = np.flatnonzero(np.diff(diagonals) > band) + 1
+        result = None
+        for group, group_seeds in zip(np.split(diagonals, splits), np.split(seeds, splits)):
+            if group_seeds.sum() < min_seeds:
+                continue
+            offset = int(group[0] + group[-1]) // 2
+            k = band + int(group[-1] - group[0] + 1) // 2
+            matrix, pointers = banded_fill(codes1, profile, gap, offset, k, local=True)
+            x, column = np.unravel_index(np.argmax(matrix), matrix.shape)
+            score = int(matrix[x, column])
+            if score <= 0 or (result is not None and score <= result[0]):
+                continue
+            aligned_query, aligned_target, _, _ = banded_traceback(query, target, pointers, offset, k, x,
+                                                                   x + offset - k + column)
+            result = (score, -number, aligned_query, aligned_target)
+        return result
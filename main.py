@@ -1,13 +1,93 @@
+import queue
+import threading
+from contextlib import nullcontext
 from tkinter import *
+from tkinter import filedialog, ttk
 
-from matrix import MatrixDisplayApp
-from needleman_wunsch import needleman_wunsch_algorithm
-from smith_waterman import smith_waterman_algorithm
+import numpy as np
+
+import needleman_wunsch
+import smith_waterman
+from frames import PHASE_FILLING, PHASE_TRACEBACK
+from incremental import IncrementalAligner
+from instrumentation import instrument
+from matrix import MatrixDisplayApp, display_archive
+from validation import check_input
+
+# Maximal number of steps computed ahead of the displayed one
+STEP_QUEUE_SIZE = 1024
+
+# Milliseconds between the displayed steps, and between the checks of the queue while waiting for the worker - much
+# sooner while skipping, so the worker blocked on the full queue is not kept waiting
+STEP_DELAY = 500
+POLL_DELAY = 50
+SKIP_POLL_DELAY = 1
+
+# Maximal number of steps of a skipped phase applied before the window handles its events
+SKIP_BATCH = 5000
+
+# Milliseconds without typing before the preview of the alignment is updated, and number of its chars shown
+PREVIEW_DELAY = 150
+PREVIEW_WIDTH = 70
+
+
+def _put(messages, cancel, message):
+    """
+    Puts a message into the bounded queue, waiting for free space until the computation is cancelled.
+    :param messages: (queue.Queue) Queue of the messages for the user interface.
+    :param cancel: (threading.Event) Event set when the computation is cancelled.
+    :param message: (tuple) Message to be put.
+    :return: (Boolean) True if the message was put, False if the computation was cancelled.
+    """
+    while not cancel.is_set():
+        try:
+            messages.put(message, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def compute_alignment(title, seq1, seq2, match, missmatch, gap, messages, cancel, timings=False):
+    """
+    Function run by the worker thread - performs the alignment step by step and streams ("step", Step) messages into
+    the queue, ended with ("done", aligned_1, aligned_2, instrumentation), or ("error", text) if the alignment failed.
+    Waits while the queue is full, so memory does not depend on the length of the animation, and stops as soon as the
+    computation is cancelled.
+    :param title: (str) Title of the algorithm, see display_matrix.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param messages: (queue.Queue) Bounded queue of the messages for the user interface.
+    :param cancel: (threading.Event) Event set when the computation is cancelled.
+    :param timings: (bool) True instruments the phases, with the peak bytes, into the Instrumentation sent with the
+    result - without the time of waiting for the queue. False sends None instead.
+    :return: None.
+    """
+    iter_steps = needleman_wunsch.iter_steps if title == "Needleman-Wunsch algorithm: " else smith_waterman.iter_steps
+    with instrument(memory=True) if timings else nullcontext() as instrumentation:
+        try:
+            steps = iter_steps(seq1, seq2, match, missmatch, gap)
+            while True:
+                try:
+                    step = next(steps)
+                except StopIteration as stop:
+                    aligned_1, aligned_2 = stop.value
+                    break
+                if not _put(messages, cancel, ("step", step)):
+                    return
+        except Exception as e:
+            _put(messages, cancel, ("error", str(e)))
+            return
+    _put(messages, cancel, ("done", aligned_1, aligned_2, instrumentation))
 
 
 def display_matrix(title):
     """
-    Function choosing algorithm to be performed, starts new window and prepares place for matrix to be updated.
+    Function choosing algorithm to be performed, starts new window and prepares place for matrix to be updated. The
+    alignment is computed by a worker thread, the window polls its queue of steps, so it never stops responding.
     :param title: (str of "Needleman-Wunsch algorithm: " or different) String determining algorithm to be picked, the
     "Needleman-Wunsch algorithm: " picks tne NW algorithm, any other algorithm would choose Smith-Waterman
     algorithm.
@@ -30,69 +110,136 @@ def display_matrix(title):
         missmatch = -1
         gap = -2
 
-    if title == "Needleman-Wunsch algorithm: ":
-        aligned_1, aligned_2, matrices = needleman_wunsch_algorithm(seq1, seq2, match, missmatch, gap)
-    else:
-        aligned_1, aligned_2, matrices = smith_waterman_algorithm(seq1, seq2, match, missmatch, gap)
+    root = Toplevel(window, background="white")
+    app = MatrixDisplayApp(root, seq1, seq2, title)
+    matrix = np.zeros((len(seq1) + 1, len(seq2) + 1), dtype=np.int64)  # Matrix rebuilt from the steps
+
+    controls = Frame(root, background="white")
+    controls.pack(pady=5)
+    progress = ttk.Progressbar(controls, length=200, mode="determinate", maximum=max(len(seq1) * len(seq2), 1))
+    progress.pack(side=LEFT, padx=5)
+    status = Label(controls, text="Computing...", font=("Times New Roman", 10), bg="white")
+    status.pack(side=LEFT, padx=5)
+    skip_button = Button(controls, text="Skip phase", bg="white", fg="black", font=("Times New Roman", 10))
+    skip_button.pack(side=LEFT, padx=5)
+    cancel_button = Button(controls, text="Cancel", bg="white", fg="black", font=("Times New Roman", 10))
+    cancel_button.pack(side=LEFT, padx=5)
+
+    subtitle = Label(root, text="Aligned sequences:", font=("Times New Roman", 16), fg="black", bg="white", pady=10)
+    subtitle.pack()
+    align1 = Label(root, text="", font=("Courier", 11), fg="black", bg="white", pady=5)
+    align1.pack()
+    align2 = Label(root, text="", font=("Courier", 11), fg="black", bg="white", pady=5)
+    align2.pack(pady=(0, 10))
+
+    timings = Label(root, text="", font=("Times New Roman", 9), fg="gray", bg="white")
+    timings.pack(side=BOTTOM, fill=X)
+
+    messages = queue.Queue(maxsize=STEP_QUEUE_SIZE)
+    cancel = threading.Event()
+    # Opt-in, measuring every step and tracing the allocations slows the computation down
+    worker = threading.Thread(target=compute_alignment, args=(title, seq1, seq2, match, missmatch, gap, messages,
+                                                              cancel, timings_value.get()), daemon=True)
+    # Phase of the last applied step, phase being skipped and number of filled cells
+    playback = {"phase": None, "skip": None, "filled": 0}
+
+    def stop(text):
+        """
+        Stops the worker and the polling of the queue.
+        :param text: (str) Text of the status label.
+        :return: None.
+        """
+        cancel.set()
+        status.config(text=text)
+        skip_button.config(state=DISABLED)
+        cancel_button.config(state=DISABLED)
 
-    matrices = [matrix.tolist() for matrix in matrices]
+    def close():
+        """
+        Cancels the computation when the window is closed.
+        :return: None.
+        """
+        cancel.set()
+        root.destroy()
 
-    root = Toplevel(window, background="white")
-    seq1 = [char for char in seq1]
-    seq2 = [char for char in seq2]
-    seq1.insert(0, " ")
-    seq2.insert(0, " ")
-    seq2.insert(1, " ")
-
-    for matrix in matrices:
-        matrix.insert(0, seq2)
-        for i in range(len(seq1)):
-            matrix[i + 1].insert(0, seq1[i])
-
-    def update_display(index=0):
+    def poll_queue():
         """
-        Updates the matrix to display every 500 milliseconds.
-        :param index: (int) Determines from which matrix the displaying should start.
+        Applies the steps of the worker to the matrix. A step is displayed every STEP_DELAY milliseconds, the steps of
+        a skipped phase are applied at once and only the result is displayed. Polls sooner if the queue is empty,
+        and almost at once while skipping.
         :return: None.
         """
-        if index < len(matrices):
-            matrix = matrices[index]
-            MatrixDisplayApp(root, matrix, title)
-            window.after(500, update_display, index + 1)
-
-    update_display()
-    matrix_rows = len(matrices)
-    matrix_cols = len(matrices[0])
-    Label(root, text="", font=("Times New Roman", 16), fg="black", bg="white", pady=100).grid(
-        row=10, columnspan=matrix_cols)
-    subtitle = Label(root, text="Aligned sequences:", font=("Times New Roman", 16), fg="black", bg="white", pady=20)
-    subtitle.grid(row=matrix_rows + 1, columnspan=matrix_cols + 2)
-    subtitle.place(x=150, y=matrix_rows + 200)
-
-    align1 = Label(root, text=aligned_1, font=("Times New Roman", 11), fg="black", bg="white", pady=5)
-    align1.grid(row=matrix_rows + 2, columnspan=matrix_cols)
-    align1.place(x=150, y=matrix_rows + 240)
-    align2 = Label(root, text=aligned_2, font=("Times New Roman", 11), fg="black", bg="white", pady=5)
-    align2.grid(row=matrix_rows + 3, columnspan=matrix_cols)
-    align2.place(x=150, y=matrix_rows + 270)
-
-
-def check_input(sequence):
-    """
-    Function checking if the input sequence does not consist of forbidden chars - numbers of special cases.
-    :param sequence: (str) Input sequence to be checked.
-    :return: (Boolean) False if input consists of forbidden chars, True is not.
-    """
-    forbidden = ['1', '2', '3', '4', '5', '6', '7', '8', '9', '0', '!', '@', '#', '$', '%', ',', '/' '&', '.']
-    if not isinstance(sequence, str):
-        raise TypeError('Sequence ought to be a string (str).')
-    if len(sequence) != 0:
-        for i in range(len(sequence)):
-            if sequence[i] in forbidden:
-                return False
-    else:
-        return False
-    return True
+        if cancel.is_set() or not root.winfo_exists():
+            return
+        for _ in range(SKIP_BATCH):
+            try:
+                message = messages.get_nowait()
+            except queue.Empty:
+                if playback["skip"] is not None:
+                    window.after(SKIP_POLL_DELAY, poll_queue)  # Only the result of the skipped phase is displayed
+                    return
+                app.show(matrix)
+                window.after(POLL_DELAY, poll_queue)
+                return
+            if message[0] == "error":
+                stop(f"Error: {message[1]}")
+                return
+            if message[0] == "done":
+                align1.config(text=message[1])
+                align2.config(text=message[2])
+                app.show(matrix)
+                stop("Done")
+                if message[3] is not None:
+                    timings.config(text=message[3].summary())
+                return
+
+            step = message[1]
+            matrix[step.row, step.col] = step.value
+            if step.phase == PHASE_FILLING:
+                playback["filled"] += 1
+                progress.config(value=playback["filled"])
+            if step.phase == PHASE_TRACEBACK:
+                app.mark(step.row, step.col)
+            playback["phase"] = step.phase
+            if step.phase != playback["skip"]:
+                playback["skip"] = None
+                app.show(matrix)
+                status.config(text=f"{step.phase.capitalize()}: cell ({step.row}, {step.col}) = {step.value}")
+                window.after(STEP_DELAY, poll_queue)
+                return
+        app.show(matrix)
+        window.after(1, poll_queue)  # Skipping - let the window handle its events between the batches
+
+    def skip_phase():
+        """
+        Skips the rest of the phase of the displayed step.
+        :return: None.
+        """
+        playback["skip"] = playback["phase"]
+
+    skip_button.config(command=skip_phase)
+    cancel_button.config(command=lambda: stop("Cancelled"))
+    root.protocol("WM_DELETE_WINDOW", close)
+    worker.start()
+    poll_queue()
+
+
+def open_archive():
+    """
+    Function asking for a matrix archive saved by an alignment and opening it in a new window, reading from the disk
+    only the parts of the matrix being displayed.
+    :return: None
+    """
+    path = filedialog.askopenfilename(filetypes=[("Matrix archive", "*.npz"), ("All files", "*")])
+    if not path:
+        return
+
+    root = Toplevel(window, background="white")
+    app = display_archive(root, path)
+    Label(root, text="Aligned sequences:", font=("Times New Roman", 16), fg="black", bg="white", pady=10).pack()
+    Label(root, text=app.matrix.aligned_1, font=("Courier", 11), fg="black", bg="white", pady=5).pack()
+    Label(root, text=app.matrix.aligned_2, font=("Courier", 11), fg="black", bg="white", pady=5).pack(pady=(0, 10))
+    root.protocol("WM_DELETE_WINDOW", lambda: (app.matrix.close(), root.destroy()))
 
 
 def update_button():
@@ -107,6 +254,49 @@ def update_button():
         compare_button.config(state=DISABLED)
 
 
+def update_preview():
+    """
+    Function showing the score and the beginning of the alignment of the typed sequences. The aligner is kept between
+    the updates and recomputes only the rows and columns of the matrix after the edited chars, so the preview follows
+    the typing even for long sequences.
+    :return: None
+    """
+    preview["job"] = None
+    if not (check_input(input_seq1.get()) and check_input(input_seq2.get())):
+        preview_label.config(text="")
+        return
+    try:
+        match = match_value.get()
+        missmatch = mismatch_value.get()
+        gap = gap_value.get()
+    except TclError:  # Value being typed, not a number yet
+        preview_label.config(text="")
+        return
+    if match == 0 and missmatch == 0 or gap == 0:
+        match = 1
+        missmatch = -1
+        gap = -2
+
+    settings = (match, missmatch, gap, x.get() == 1)
+    if preview["settings"] != settings:
+        preview["settings"] = settings
+        preview["aligner"] = IncrementalAligner(match, missmatch, gap, local=x.get() == 1)
+    aligned_1, aligned_2, score = preview["aligner"].align(input_seq1.get().upper(), input_seq2.get().upper())
+    if len(aligned_1) > PREVIEW_WIDTH:
+        aligned_1, aligned_2 = aligned_1[:PREVIEW_WIDTH] + "...", aligned_2[:PREVIEW_WIDTH] + "..."
+    preview_label.config(text=f"Score: {score}\n{aligned_1}\n{aligned_2}")
+
+
+def schedule_preview():
+    """
+    Function updating the preview of the alignment once the user stops typing for PREVIEW_DELAY milliseconds.
+    :return: None
+    """
+    if preview["job"] is not None:
+        window.after_cancel(preview["job"])
+    preview["job"] = window.after(PREVIEW_DELAY, update_preview)
+
+
 def chosen_method():
     """
     Function picking the form of the algorithm to be performed, based on the clicked radio button.
@@ -126,7 +316,7 @@ if __name__ == "__main__":
     # Window creating
     window = Tk()
     window.title("Matrix Visualizer")
-    window.geometry("600x650")
+    window.geometry("600x790")
     window.config(background="white")
     logo = PhotoImage(file='logo.png')
     window.iconphoto(True, logo)
@@ -184,7 +374,7 @@ if __name__ == "__main__":
     x = IntVar()
     for index, method in enumerate(methods):
         Radiobutton(window, text=method, variable=x, value=index, background="white",
-                    font=("Times New Roman", 11)).pack()
+                    font=("Times New Roman", 11), command=schedule_preview).pack()
 
     info_2 = Label(window,
                    text="If you cannot click the \"Compare\" button, make sure you typed the sequences correctly.",
@@ -193,8 +383,20 @@ if __name__ == "__main__":
     compare_button = Button(window, text="Compare", bg="white", fg="black", font=("Times New Roman", 12),
                             command=chosen_method, state=DISABLED)
     compare_button.pack(anchor="center", pady=15)
-
-    string1.trace("w", lambda *args: update_button())
-    string2.trace("w", lambda *args: update_button())
+    Button(window, text="Open archive", bg="white", fg="black", font=("Times New Roman", 10),
+           command=open_archive).pack(anchor="center")
+    timings_value = BooleanVar()
+    Checkbutton(window, text="Show timings of the phases", variable=timings_value, background="white",
+                font=("Times New Roman", 10)).pack(anchor="center", pady=(10, 0))
+
+    # Live preview of the alignment while typing
+    preview = {"job": None, "settings": None, "aligner": None}
+    preview_label = Label(window, text="", font=("Courier", 10), fg="gray", bg="white", justify=LEFT)
+    preview_label.pack(pady=10)
+
+    string1.trace("w", lambda *args: (update_button(), schedule_preview()))
+    string2.trace("w", lambda *args: (update_button(), schedule_preview()))
+    for value in (match_value, mismatch_value, gap_value):
+        value.trace("w", lambda *args: schedule_preview())
 
     window.mainloop()
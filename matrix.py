@@ -1,17 +1,33 @@
 import tkinter as tk
 
+import numpy as np
+
+from archive import MatrixArchive
+
+# Color of the numbers of the cells on the traceback path
+MARK_COLOR = "red"
+
 
 class MatrixDisplayApp:
     """
-    Class representing centered matrix display.
+    Class representing the matrix display, drawn on a single canvas. Only the cells in the visible part of the canvas
+    have text items - a pool of items sized to the viewport is moved around when the view scrolls, and showing a new
+    frame changes only the items whose numbers differ, so even 1000 x 1000 matrices scroll smoothly. A MatrixArchive
+    can be shown instead of a frame, only the tiles of the visible cells are read from it.
     """
-    def __init__(self, root, matrix_data, label_text):
+    def __init__(self, root, seq1, seq2, label_text, cell_width=30, cell_height=20):
         """
         MatrixDisplayApp initialization method.
-        :param root:
-        :param matrix_data:
-        :param label_text:
+        :param root: (tk.Tk or tk.Toplevel) Window the display is packed into.
+        :param seq1: (str) Sequence labelling the rows of the matrix.
+        :param seq2: (str) Sequence labelling the columns of the matrix.
+        :param label_text: (str) Title shown above the matrix.
+        :param cell_width: (int) Width of a cell in pixels.
+        :param cell_height: (int) Height of a cell in pixels.
         """
+        if not isinstance(seq1, str) or not isinstance(seq2, str):
+            raise TypeError('Sequences need to be a type of string.')
+
         self.root = root
         window_width = 500
         window_height = 500
@@ -20,46 +36,183 @@ class MatrixDisplayApp:
         center_x = (screen_width - window_width) // 2
         center_y = (screen_height - window_height) // 2
         self.root.geometry(f"{window_width}x{window_height}+{center_x}+{center_y}")
-        self.matrix_data = matrix_data
 
+        self.seq1 = seq1
+        self.seq2 = seq2
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        # Zeros without memory allocated for them, the matrix of an archive may not fit into the memory
+        self.matrix = np.broadcast_to(np.zeros((), dtype=np.int64), (len(seq1) + 1, len(seq2) + 1))
+
+        self.frame = tk.Frame(root, bg="white")
+        self.frame.pack(fill=tk.BOTH, expand=True)
         self.label_text = tk.StringVar()
         self.label_text.set(label_text)
-        label = tk.Label(root, textvariable=self.label_text, font=("Times New Roman", 16), bg="white", padx=10)
-        label.grid(row=len(matrix_data), columnspan=len(matrix_data[0]))
-        label.place(x=150, y=0)
-
-        self.matrix_vars = []
-        for row in matrix_data:
-            row_vars = []
-            for cell in row:
-                var = tk.StringVar()
-                var.set(str(cell).split(".")[0])
-                row_vars.append(var)
-            self.matrix_vars.append(row_vars)
-
-        matrix_width = len(matrix_data[0]) * 30
-        matrix_height = len(matrix_data) * 20
-
-        matrix_x = (window_width - matrix_width) // 2
-        matrix_height = len(matrix_data) * 20
-
-        # Add an offset to move the matrix higher
-        matrix_y_offset = 120  # Adjust this value as needed
-        matrix_y = (window_height - matrix_height) // 2 - matrix_y_offset
-
-        # Create a Label widget for each cell in the matrix
-        self.matrix_labels = []
-        for row_index, row in enumerate(self.matrix_data):
-            row_labels = []
-            for col_index, cell in enumerate(row):
-                label = tk.Label(root, textvariable=self.matrix_vars[row_index][col_index], font=("Courier", 11),
-                                 width=3, bg="white")
-                label.grid(row=row_index, column=col_index)
-                label.place(x=matrix_x + col_index * 30, y=matrix_y + row_index * 20)
-                row_labels.append(label)
-            self.matrix_labels.append(row_labels)
-
-        # Disable the Label widgets to make them read-only
-        for row_labels in self.matrix_labels:
-            for label in row_labels:
-                label.config(state=tk.DISABLED)
+        tk.Label(self.frame, textvariable=self.label_text, font=("Times New Roman", 16), bg="white",
+                 padx=10).grid(row=0, column=0, columnspan=2)
+
+        # The first row and column of the canvas hold the letters of the sequences
+        self.canvas = tk.Canvas(self.frame, bg="white", highlightthickness=0,
+                                scrollregion=(0, 0, (len(seq2) + 2) * cell_width, (len(seq1) + 2) * cell_height))
+        x_scrollbar = tk.Scrollbar(self.frame, orient=tk.HORIZONTAL, command=self._xview)
+        y_scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._yview)
+        self.canvas.config(xscrollcommand=x_scrollbar.set, yscrollcommand=y_scrollbar.set)
+        self.canvas.grid(row=1, column=0, sticky="nsew")
+        y_scrollbar.grid(row=1, column=1, sticky="ns")
+        x_scrollbar.grid(row=2, column=0, sticky="ew")
+        self.frame.rowconfigure(1, weight=1)
+        self.frame.columnconfigure(0, weight=1)
+
+        self.canvas.bind("<Configure>", self._resize)
+        self.canvas.bind("<MouseWheel>", lambda event: self._yview("scroll", -event.delta // 120, "units"))
+        self.canvas.bind("<Shift-MouseWheel>", lambda event: self._xview("scroll", -event.delta // 120, "units"))
+        self.canvas.bind("<Button-4>", lambda event: self._yview("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self._yview("scroll", 1, "units"))
+
+        self.cells = []  # Pool of text items of the visible cells, rows of columns
+        self.row_headers = []  # Text items of the letters of sequence 1 of the visible rows
+        self.col_headers = []  # Text items of the letters of sequence 2 of the visible columns
+        self.header_background = ()  # White rectangles under the letters of the sequences
+        self.origin = None  # First visible row and column
+        self.visible = None  # Numbers currently written in the pool of items
+        self.marked = set()  # Cells highlighted as a part of the traceback path
+
+    def show(self, frame):
+        """
+        Displays a frame of the animation, rewriting only the visible cells that changed since the previous frame.
+        :param frame: (2D numpy array, list of lists or MatrixArchive) Matrix to be displayed.
+        :return: None.
+        """
+        if not isinstance(frame, MatrixArchive):
+            frame = np.asarray(frame)
+        if frame.shape != self.matrix.shape:
+            raise ValueError('Frame needs to match the lengths of the sequences.')
+        self.matrix = frame
+        if self.origin is None or not self.cells:
+            return
+
+        window = self._window()
+        changed = np.argwhere(window != self.visible[:window.shape[0], :window.shape[1]])
+        for row, col in changed:
+            self.canvas.itemconfigure(self.cells[row][col], text=str(int(window[row, col])))
+        self.visible[:window.shape[0], :window.shape[1]] = window
+
+    def mark(self, row, col):
+        """
+        Highlights the cell as a part of the traceback path.
+        :param row: (int) Row of the cell.
+        :param col: (int) Column of the cell.
+        :return: None.
+        """
+        self.marked.add((row, col))
+        if self.origin is not None and self.cells:
+            row, col = row - self.origin[0], col - self.origin[1]
+            if 0 <= row < len(self.cells) and 0 <= col < len(self.cells[0]):
+                self.canvas.itemconfigure(self.cells[row][col], fill=MARK_COLOR)
+
+    def _window(self):
+        """
+        Cuts the visible part out of the displayed matrix.
+        :return: (numpy array) Numbers of the visible cells.
+        """
+        row, col = self.origin
+        return self.matrix[row:row + len(self.cells), col:col + len(self.cells[0])]
+
+    def _xview(self, *args):
+        """
+        Scrolls the canvas horizontally and moves the pool of items to the new view.
+        :param args: Arguments of tk.Canvas.xview.
+        :return: None.
+        """
+        self.canvas.xview(*args)
+        self._redraw()
+
+    def _yview(self, *args):
+        """
+        Scrolls the canvas vertically and moves the pool of items to the new view.
+        :param args: Arguments of tk.Canvas.yview.
+        :return: None.
+        """
+        self.canvas.yview(*args)
+        self._redraw()
+
+    def _resize(self, event):
+        """
+        Creates a new pool of items fitting the size of the canvas.
+        :param event: (tk.Event) Configure event of the canvas.
+        :return: None.
+        """
+        rows = min(event.height // self.cell_height + 2, self.matrix.shape[0])
+        cols = min(event.width // self.cell_width + 2, self.matrix.shape[1])
+        if self.cells and (rows, cols) == (len(self.cells), len(self.cells[0])):
+            self._redraw()
+            return
+
+        # Items created later are drawn on top - the letters of the sequences cover the scrolled cells
+        self.canvas.delete("all")
+        font = ("Courier", 11)
+        self.cells = [[self.canvas.create_text(0, 0, font=font) for _ in range(cols)] for _ in range(rows)]
+        self.header_background = (self.canvas.create_rectangle(0, 0, 0, 0, fill="white", outline=""),
+                                  self.canvas.create_rectangle(0, 0, 0, 0, fill="white", outline=""))
+        self.row_headers = [self.canvas.create_text(0, 0, font=font + ("bold",)) for _ in range(rows)]
+        self.col_headers = [self.canvas.create_text(0, 0, font=font + ("bold",)) for _ in range(cols)]
+        self.origin = None
+        self._redraw()
+
+    def _redraw(self):
+        """
+        Moves the pool of items to the cells in the view and writes their numbers, the letters of the sequences stay
+        pinned to the top and left edges of the view.
+        :return: None.
+        """
+        if not self.cells:
+            return
+        left, top = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        rows, cols = len(self.cells), len(self.cells[0])
+        row0 = min(max(int(top // self.cell_height) - 1, 0), self.matrix.shape[0] - rows)
+        col0 = min(max(int(left // self.cell_width) - 1, 0), self.matrix.shape[1] - cols)
+        half_width, half_height = self.cell_width / 2, self.cell_height / 2
+
+        if (row0, col0) != self.origin:
+            self.origin = (row0, col0)
+            window = self._window()
+            for row in range(rows):
+                y = (row0 + row + 1) * self.cell_height + half_height
+                for col in range(cols):
+                    item = self.cells[row][col]
+                    self.canvas.coords(item, (col0 + col + 1) * self.cell_width + half_width, y)
+                    self.canvas.itemconfigure(item, text=str(int(window[row, col])),
+                                              fill=MARK_COLOR if (row0 + row, col0 + col) in self.marked else "black")
+            self.visible = window.copy()
+
+        width = (self.matrix.shape[1] + 1) * self.cell_width
+        height = (self.matrix.shape[0] + 1) * self.cell_height
+        self.canvas.coords(self.header_background[0], left, top, left + width, top + self.cell_height)
+        self.canvas.coords(self.header_background[1], left, top, left + self.cell_width, top + height)
+        for row, item in enumerate(self.row_headers):
+            x = row0 + row
+            self.canvas.coords(item, left + half_width, (x + 1) * self.cell_height + half_height)
+            self.canvas.itemconfigure(item, text=self.seq1[x - 1] if x > 0 else "")
+        for col, item in enumerate(self.col_headers):
+            y = col0 + col
+            self.canvas.coords(item, (y + 1) * self.cell_width + half_width, top + half_height)
+            self.canvas.itemconfigure(item, text=self.seq2[y - 1] if y > 0 else "")
+
+
+def display_archive(root, archive):
+    """
+    Function opening a matrix archive in a new display, with the traceback path highlighted.
+    :param root: (tk.Tk or tk.Toplevel) Window the display is packed into.
+    :param archive: (MatrixArchive or str) Archive, or path to it, saved by save_archive.
+    :return: (MatrixDisplayApp) Display of the archive.
+    """
+    if isinstance(archive, str):
+        archive = MatrixArchive(archive)
+    if not isinstance(archive, MatrixArchive):
+        raise TypeError('Archive needs to be a MatrixArchive or a path to it.')
+
+    app = MatrixDisplayApp(root, archive.seq1, archive.seq2, archive.title)
+    app.show(archive)
+    for row, col in archive.traceback:
+        app.mark(row, col)
+    return app
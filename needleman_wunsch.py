@@ -1,35 +1,87 @@
 import numpy as np
+
+from archive import new_matrix, save_archive
+from banded import banded_needleman_wunsch
+from frames import FrameRecorder, MOVE_DIAG, MOVE_LEFT, MOVE_NONE, MOVE_UP, PHASE_FILLING, PHASE_INITIALIZATION, \
+    PHASE_TRACEBACK, Step
+from gotoh import gotoh_algorithm
+from hirschberg import hirschberg_algorithm, needleman_wunsch_score
+from instrumentation import phase, phase_steps
+from pointers import new_pointer_matrix, pointer_path, pointer_traceback
+from scoring import score_dtype
 from smith_waterman import match_matrix
+from tiled import tiled_fill, tiled_score
+from wavefront import wavefront_fill
+
+ENGINES = ("python", "wavefront", "hirschberg", "banded", "tiled")
+
+
+def _needleman_wunsch_border(seq1, seq2, gap):
+    """
+    Generator of the cells of the initialization phase - the first column, then the first row.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param gap: (int) Gap penalty value.
+    :return: (generator of tuples of int, int, int, int) Row, column, value and move code of every cell.
+    """
+    for x in range(len(seq1) + 1):
+        yield x, 0, x * gap, MOVE_UP if x > 0 else MOVE_NONE
+    for y in range(len(seq2) + 1):
+        yield 0, y, y * gap, MOVE_LEFT if y > 0 else MOVE_NONE
+
 
+def _needleman_wunsch_cells(seq1, seq2, matrix, matrix_is_match, gap, pointers):
+    """
+    Generator of the cells of the filling phase in row order. The pointers are written here, the value of every cell
+    has to be written into the matrix by the caller before the next cell is requested.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param matrix: (numpy array) Matrix after initialization phase.
+    :param matrix_is_match: (numpy array) Match matrix.
+    :param gap: (int) Gap penalty value.
+    :param pointers: (numpy array of uint8) Pointer matrix, filled with the moves giving each cell its value.
+    :return: (generator of tuples of int, int, int, int) Row, column, value and preferred move code of every cell.
+    """
+    for x in range(1, len(seq1) + 1):
+        for y in range(1, len(seq2) + 1):
+            diagonal = int(matrix[x - 1][y - 1] + matrix_is_match[x - 1][y - 1])
+            up = int(matrix[x - 1][y]) + gap
+            left = int(matrix[x][y - 1]) + gap
+            value = max(diagonal, up, left)
+            moves = (MOVE_DIAG if diagonal == value else 0) | (MOVE_UP if up == value else 0) | \
+                    (MOVE_LEFT if left == value else 0)
+            pointers[x][y] = moves
+            yield x, y, value, moves & -moves  # Lowest bit - the preferred move
 
-def _needleman_wunsch_initialization(seq1, seq2, gap):
+
+def _needleman_wunsch_initialization(seq1, seq2, gap, keyframe_interval=None, dtype=np.int64, path=None):
     """
     Function performing initialization of the Needleman-Wunsch algorithm.
     :param seq1: (str) Input sequence.
     :param seq2: (str) Input sequence.
-    :return matrix: (list of numpy arrays) Initialized matrix.
-    :return matrices: (list of numpy arrays) List how each step of initializing the matrix.
+    :param gap: (int) Gap penalty value.
+    :param keyframe_interval: (int or None) Every how many steps the recorder keeps a full copy of the matrix.
+    :param dtype: (numpy dtype) Integer type of the matrix, see scoring.score_dtype.
+    :param path: (str or None) Path to the file backing the matrix, None keeps it in memory.
+    :return matrix: (numpy array) Initialized matrix.
+    :return frames: (FrameRecorder) Recorder with each step of initializing the matrix.
     """
     if not isinstance(seq1, str) or not isinstance(seq2, str):
         raise TypeError('Sequences need to be a type of string.')
     if not isinstance(gap, int):
         raise TypeError('Gap penalty needs to be a string')
     # Matrix for the Needleman-Wunsch algorithm
-    matrix = np.zeros((len(seq1) + 1, len(seq2) + 1))
-    matrices = []  # List of matrices for the animation
+    matrix = new_matrix((len(seq1) + 1, len(seq2) + 1), dtype, path)
+    frames = FrameRecorder(matrix, keyframe_interval)  # Steps of the animation
 
     # Initialization
-    for x in range(len(seq1) + 1):
-        matrix[x][0] = x * gap
-        matrices.append(matrix.copy())
-    for y in range(len(seq2) + 1):
-        matrix[0][y] = y * gap
-        matrices.append(matrix.copy())
+    for x, y, value, move in _needleman_wunsch_border(seq1, seq2, gap):
+        frames.set(x, y, value, move)
 
-    return matrix, matrices
+    return matrix, frames
 
 
-def _needleman_wunsch_filling(seq1, seq2, matrix, matrix_is_match, gap):
+def _needleman_wunsch_filling(seq1, seq2, matrix, matrix_is_match, gap, frames, pointers):
     """
     Function performing filling phase of Needleman-Wunsch algorithm.
     :param seq1: (str) Input sequence.
@@ -37,33 +89,30 @@ def _needleman_wunsch_filling(seq1, seq2, matrix, matrix_is_match, gap):
     :param matrix: (numpy array) Matrix after initialization phase.
     :param matrix_is_match: (numpy array) Match matrix.
     :param gap: (int) Gap penalty value.
-    :return matrix: (list of numpy arrays) Filled matrix.
-    :return matrices: (list of numpy arrays) List how each step of filling the matrix.
+    :param frames: (FrameRecorder) Recorder of the matrix, each filled cell is recorded as a step.
+    :param pointers: (numpy array of uint8) Pointer matrix, filled with the moves giving each cell its value.
+    :return matrix: (numpy array) Filled matrix.
+    :return frames: (FrameRecorder) Recorder with each step of filling the matrix.
     """
     if not isinstance(seq1, str) or not isinstance(seq2, str):
         raise TypeError('Sequences need to be a type of string.')
     if not isinstance(gap, int):
         raise TypeError('Gap penalty needs to be a string')
-    matrices = []  # List of matrices for the animation
 
     # Filling of the matrix
-    for x in range(1, len(seq1) + 1):
-        for y in range(1, len(seq2) + 1):
-            matrix[x][y] = max(matrix[x - 1][y - 1] + matrix_is_match[x - 1][y - 1],
-                               matrix[x - 1][y] + gap,
-                               matrix[x][y - 1] + gap)
-            matrices.append(matrix.copy())
+    for x, y, value, move in _needleman_wunsch_cells(seq1, seq2, matrix, matrix_is_match, gap, pointers):
+        frames.set(x, y, value, move)
 
-    return matrix, matrices
+    return matrix, frames
 
 
-def _needleman_wunsch_traceback(seq1, seq2, matrix, gap):
+def _needleman_wunsch_traceback(seq1, seq2, pointers):
     """
-    Function performing traceback phase of Needleman-Wunsch algorithm.
+    Function performing traceback phase of Needleman-Wunsch algorithm, walking the pointer matrix from the bottom
+    right corner to the top left one.
     :param seq1: (str) Input sequence.
     :param seq2: (str) Input sequence.
-    :param matrix: (numpy array) Matrix after filling phase.
-    :param gap (int): Gap penalty value.
+    :param pointers: (numpy array of uint8) Pointer matrix after filling phase.
     :return aligned_1: (str) Output of sequence 1 - local alignments of sequence 1.
     :return aligned_2: (str) Output of sequence 2 - local alignments of sequence 2.
     """
@@ -71,41 +120,54 @@ def _needleman_wunsch_traceback(seq1, seq2, matrix, gap):
     if not isinstance(seq1, str) or not isinstance(seq2, str):
         raise TypeError('Sequences need to be a type of string.')
 
-    if not isinstance(gap, int):
-        raise TypeError('Gap penalty needs to be a string')
-
-    # This was a second traceback implemented so this time I tried to be more fancy about it.
-    x, y = len(seq1), len(seq2)
-    aligned_1, aligned_2 = "", ""
-
-    # Possible the movement directions
-    directions = [(0, -1), (-1, 0), (-1, -1)]
-
-    while x > 0 or y > 0:
-        # Calculating possible moves and consideration of which move should be held
-        possible_moves = [(matrix[x + d1][y + d2] + (gap if d1 == 0 or d2 == 0 else 0), d1, d2) for d1, d2 in
-                          directions]
-        max_score, move_d1, move_d2 = max(possible_moves, key=lambda x: x[0])
-
-        # Move execution
-        if move_d1 == -1 and move_d2 == -1:  # Diagonal move
-            aligned_1 = seq1[x - 1] + aligned_1
-            aligned_2 = seq2[y - 1] + aligned_2
-            x -= 1
-            y -= 1
-        elif move_d1 == 0 and move_d2 == -1:  # Left move
-            aligned_1 = "-" + aligned_1
-            aligned_2 = seq2[y - 1] + aligned_2
-            y -= 1
-        else:  # Up move
-            aligned_1 = seq1[x - 1] + aligned_1
-            aligned_2 = "-" + aligned_2
-            x -= 1
+    aligned_1, aligned_2, _, _ = pointer_traceback(seq1, seq2, pointers, len(seq1), len(seq2))
 
     return aligned_1, aligned_2
 
 
-def needleman_wunsch_algorithm(seq1, seq2, match, missmatch, gap):
+def iter_steps(seq1, seq2, match, missmatch, gap, substitution=None):
+    """
+    Generator performing Needleman-Wunsch algorithm step by step, each step is computed only when it is requested, so
+    an animation can pull the steps at its own pace, or skip them, without any frames being stored.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return: (generator of Step) Steps of initialization, filling and traceback phases - the cell, its value and the
+    move, the traceback goes from the bottom right corner to the top left one. Returns the aligned sequences when
+    exhausted (the value of StopIteration).
+    """
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+
+    with phase("match_matrix"):
+        matrix_is_match = match_matrix(seq1, seq2, match, missmatch, substitution)
+    with phase(PHASE_INITIALIZATION):
+        matrix = np.zeros((len(seq1) + 1, len(seq2) + 1),
+                          dtype=score_dtype(len(seq1), len(seq2), matrix_is_match, gap))
+        pointers = new_pointer_matrix(len(seq1) + 1, len(seq2) + 1)
+
+    for x, y, value, move in phase_steps(PHASE_INITIALIZATION, _needleman_wunsch_border(seq1, seq2, gap)):
+        matrix[x, y] = value
+        yield Step(PHASE_INITIALIZATION, x, y, value, move)
+    cells = _needleman_wunsch_cells(seq1, seq2, matrix, matrix_is_match, gap, pointers)
+    for x, y, value, move in phase_steps(PHASE_FILLING, cells, 1):
+        matrix[x, y] = value
+        yield Step(PHASE_FILLING, x, y, value, move)
+    for x, y, move in phase_steps(PHASE_TRACEBACK, pointer_path(pointers, len(seq1), len(seq2))):
+        yield Step(PHASE_TRACEBACK, x, y, int(matrix[x, y]), move)
+
+    with phase(PHASE_TRACEBACK):
+        return _needleman_wunsch_traceback(seq1, seq2, pointers)
+
+
+def needleman_wunsch_algorithm(seq1, seq2, match, missmatch, gap, keyframe_interval=None, engine="python",
+                               substitution=None, score_only=False, band=None, gap_open=None, gap_extend=None,
+                               matrix_path=None, archive_path=None):
     """
     Function performing Needleman-Wunsch algorithm with all the steps - initialization, filling, traceback, returns
     general local alignments, as well as all steps of filling the matrix with numbers.
@@ -114,26 +176,98 @@ def needleman_wunsch_algorithm(seq1, seq2, match, missmatch, gap):
     :param match: (int) Match value.
     :param missmatch: (int) Missmatch value.
     :param gap: (int) Gap penalty value.
+    :param keyframe_interval: (int or None) Every how many steps the recorder keeps a full copy of the matrix, None
+    rebuilds the frames from the final matrix.
+    :param engine: (str) "python" fills the matrix cell by cell and records the animation frames, "wavefront" fills
+    it by whole rows with NumPy, "hirschberg" aligns in linear memory with Hirschberg's algorithm, "banded" fills
+    only a band around the diagonal for near-identical sequences, "tiled" fills it by tiles in parallel worker
+    processes, the last four record no frames.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix, or name of one such as "BLOSUM62", to
+    score the chars with instead of match and missmatch values.
+    :param score_only: (bool) True skips the traceback and returns only the score of the optimal alignment, computed
+    keeping two rows of the matrix in memory, or only the boundaries of the tiles for the "tiled" engine.
+    :param band: (int or None) Half width of the band for the "banded" engine, None derives it from the difference of
+    lengths of the sequences.
+    :param gap_open: (int or None) Penalty of the first char of a gap, giving it switches to affine gap penalties
+    computed with vectorized Gotoh algorithm (no frames), defaults to gap if only gap_extend is given.
+    :param gap_extend: (int or None) Penalty of every next char of a gap, defaults to gap if only gap_open is given.
+    :param matrix_path: (str or None) Path to a file on the local disk backing the matrix (and the same path with
+    ".pointers" appended backing the pointer matrix) with np.memmap, for matrices larger than the memory. Only for the
+    engines filling the whole matrix.
+    :param archive_path: (str or None) Path to a compressed archive the final matrix and the traceback path are saved
+    to, to be opened by MatrixDisplayApp later. Only for the engines filling the whole matrix.
     :return aligned_1 (str): Output of sequence 1 - local alignments of sequence 1.
     :return aligned_2 (str): Output of sequence 2 - local alignments of sequence 2.
-    :return all_matrices (list of np arrays): List of numpy arrays representing each step of filling the matrix with
-    numbers.
+    :return frames (FrameRecorder or None): Lightweight source of frames, indexing or iterating it gives numpy arrays
+    representing each step of filling the matrix with numbers, None for the engines without frames.
+    :return score (int): Only with score_only=True, returned alone - score of the optimal alignment.
     """
 
     if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
         raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
     if not isinstance(seq1, str) or not isinstance(seq2, str):
         raise TypeError('Sequences need to be a type of string.')
+    if engine not in ENGINES:
+        raise ValueError(f'Engine needs to be one of: {", ".join(ENGINES)}.')
+
+    cells = len(seq1) * len(seq2)
+    if (matrix_path is not None or archive_path is not None) and \
+            (score_only or engine in ("hirschberg", "banded") or gap_open is not None or gap_extend is not None):
+        raise ValueError('Matrix file and archive need an engine filling the whole matrix with linear gap penalty.')
+    if gap_open is not None or gap_extend is not None:
+        if engine not in ("python", "wavefront"):
+            raise ValueError(f'Engine "{engine}" supports only the linear gap penalty.')
+        with phase("gotoh", cells):
+            aligned_1, aligned_2, score = gotoh_algorithm(seq1, seq2, match, missmatch,
+                                                          gap if gap_open is None else gap_open,
+                                                          gap if gap_extend is None else gap_extend,
+                                                          substitution=substitution)
+        return score if score_only else (aligned_1, aligned_2, None)
+    if score_only:
+        with phase("score", cells):
+            if engine == "tiled":
+                return tiled_score(seq1, seq2, match, missmatch, gap, substitution=substitution)
+            return needleman_wunsch_score(seq1, seq2, match, missmatch, gap, substitution)
+    if engine == "hirschberg":
+        with phase("hirschberg", cells):
+            aligned_1, aligned_2 = hirschberg_algorithm(seq1, seq2, match, missmatch, gap, substitution)
+        return aligned_1, aligned_2, None
+    if engine == "banded":
+        with phase("banded"):
+            aligned_1, aligned_2, _ = banded_needleman_wunsch(seq1, seq2, match, missmatch, gap, band, substitution)
+        return aligned_1, aligned_2, None
+
+    # The vectorized engine gathers its scores from a lazy query profile instead of a full match matrix
+    with phase("match_matrix"):
+        matrix_is_match = match_matrix(seq1, seq2, match, missmatch, substitution, profile=engine != "python")
 
-    matrix_is_match = match_matrix(seq1, seq2, match, missmatch)
-    all_matrices = []  # List of all matrices for the animation
+    dtype = score_dtype(len(seq1), len(seq2), matrix_is_match, gap)
+    # The tiled engine fills the matrices in place in worker processes, so they are placed in shared memory
+    pointers = new_pointer_matrix(len(seq1) + 1, len(seq2) + 1,
+                                  path=None if matrix_path is None else matrix_path + ".pointers",
+                                  shared=engine == "tiled")
 
-    matrix, init_matrices = _needleman_wunsch_initialization(seq1, seq2, gap)
-    all_matrices.extend(init_matrices)
+    if engine == "python":
+        with phase("initialization", frames=len(seq1) + len(seq2) + 2):
+            matrix, frames = _needleman_wunsch_initialization(seq1, seq2, gap, keyframe_interval, dtype, matrix_path)
+        with phase("filling", cells, frames=cells):
+            matrix, frames = _needleman_wunsch_filling(seq1, seq2, matrix, matrix_is_match, gap, frames, pointers)
+    else:
+        with phase("initialization"):
+            matrix = new_matrix((len(seq1) + 1, len(seq2) + 1), dtype, matrix_path, shared=engine == "tiled")
+            matrix[:, 0] = np.arange(len(seq1) + 1) * gap
+            matrix[0, :] = np.arange(len(seq2) + 1) * gap
+        fill = tiled_fill if engine == "tiled" else wavefront_fill
+        with phase("filling", cells):
+            matrix = fill(matrix, matrix_is_match, gap, pointers=pointers)
+        frames = None
 
-    matrix, filling_matrices = _needleman_wunsch_filling(seq1, seq2, matrix, matrix_is_match, gap)
-    all_matrices.extend(filling_matrices)
+    with phase("traceback"):
+        aligned_1, aligned_2 = _needleman_wunsch_traceback(seq1, seq2, pointers)
 
-    aligned_1, aligned_2 = _needleman_wunsch_traceback(seq1, seq2, matrix, gap)
+    if archive_path is not None:
+        with phase("archive"):
+            path = [(x, y) for x, y, _ in pointer_path(pointers, len(seq1), len(seq2))]
+            save_archive(archive_path, matrix, seq1, seq2, path, (aligned_1, aligned_2), "Needleman-Wunsch algorithm: ")
 
-    return aligned_1, aligned_2, all_matrices
+    return aligned_1, aligned_2, frames
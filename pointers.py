@@ -0,0 +1,81 @@
+import numpy as np
+
+from archive import new_matrix
+from frames import MOVE_DIAG, MOVE_LEFT, MOVE_UP
+
+
+def new_pointer_matrix(rows, cols, local=False, path=None, shared=False):
+    """
+    Creates the direction-pointer matrix. Each cell is a uint8 with a bit set for every predecessor giving its
+    optimal value - MOVE_DIAG, MOVE_UP and MOVE_LEFT, zero means the traceback stops in the cell.
+    :param rows: (int) Number of rows, length of sequence 1 plus one.
+    :param cols: (int) Number of columns, length of sequence 2 plus one.
+    :param local: (bool) True leaves the first row and column zero like in Smith-Waterman algorithm, False points them
+    back to the corner like in Needleman-Wunsch algorithm.
+    :param path: (str or None) Path to the file backing the matrix, None keeps it in memory.
+    :param shared: (bool) True places the matrix in shared memory, see archive.new_matrix.
+    :return pointers: (numpy array of uint8) Pointer matrix.
+    """
+    pointers = new_matrix((rows, cols), np.uint8, path, shared)
+    if not local:
+        pointers[1:, 0] = MOVE_UP
+        pointers[0, 1:] = MOVE_LEFT
+    return pointers
+
+
+def pointer_path(pointers, x, y):
+    """
+    Generator walking the pointer matrix back from the cell until a cell without any pointer, preferring the diagonal,
+    then the up and then the left move.
+    :param pointers: (numpy array of uint8) Pointer matrix.
+    :param x: (int) Row of the cell the path starts from.
+    :param y: (int) Column of the cell the path starts from.
+    :return: (generator of tuples of int, int, int) Row, column and the move taken from every cell of the path, the
+    last cell has MOVE_NONE.
+    """
+    x, y = int(x), int(y)
+    while True:
+        move = int(pointers[x, y])
+        move &= -move  # Lowest bit - the preferred move
+        yield x, y, move
+        if move == MOVE_DIAG:
+            x -= 1
+            y -= 1
+        elif move == MOVE_UP:
+            x -= 1
+        elif move == MOVE_LEFT:
+            y -= 1
+        else:
+            return
+
+
+def pointer_traceback(seq1, seq2, pointers, x, y):
+    """
+    Walks the pointer matrix back from the cell until a cell without any pointer, preferring the diagonal, then the up
+    and then the left move. Takes O(n + m) steps and builds the alignment in lists.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param pointers: (numpy array of uint8) Pointer matrix.
+    :param x: (int) Row of the cell the traceback starts from.
+    :param y: (int) Column of the cell the traceback starts from.
+    :return aligned_1: (str) Aligned sequence 1.
+    :return aligned_2: (str) Aligned sequence 2.
+    :return x: (int) Row of the cell the traceback stopped in.
+    :return y: (int) Column of the cell the traceback stopped in.
+    """
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+
+    aligned_1, aligned_2 = [], []
+    for x, y, move in pointer_path(pointers, x, y):
+        if move == MOVE_DIAG:
+            aligned_1.append(seq1[x - 1])
+            aligned_2.append(seq2[y - 1])
+        elif move == MOVE_UP:
+            aligned_1.append(seq1[x - 1])
+            aligned_2.append("-")
+        elif move == MOVE_LEFT:
+            aligned_1.append("-")
+            aligned_2.append(seq2[y - 1])
+
+    return "".join(reversed(aligned_1)), "".join(reversed(aligned_2)), x, y
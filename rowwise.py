@@ -0,0 +1,56 @@
+import numpy as np
+
+from frames import MOVE_DIAG, MOVE_LEFT, MOVE_UP
+
+
+def fill_row(previous, scores, gap, first, local=False, steps=None, pointers=None, blocked=None):
+    """
+    Function computing one row of the matrix from the previous one with NumPy. The left moves make every cell depend
+    on the cell before it, but with a linear gap penalty the row is max over k <= j of best[k] + (j - k) * gap, which is
+    a running maximum, so the whole row is computed without a Python loop over the cells.
+    :param previous: (numpy array) Previous row of the matrix, one longer than the scores.
+    :param scores: (numpy array) Row of the match matrix.
+    :param gap: (int) Gap penalty value.
+    :param first: (int) Value of the first cell of the row.
+    :param local: (bool) True clips the scores at zero like in Smith-Waterman algorithm.
+    :param steps: (numpy array or None) Precomputed np.arange(len(previous)) * gap, computed if None.
+    :param pointers: (numpy array of uint8 or None) Row of the pointer matrix, all cells but the first one are filled
+    with the moves giving each cell its value, None skips recording the moves.
+    :param blocked: (numpy array of int or None) Columns of the cells forced to zero, for local alignment - no path can
+    go through them.
+    :return row: (numpy array) Computed row.
+    """
+    if steps is None:
+        steps = np.arange(len(previous), dtype=previous.dtype) * gap
+
+    best = np.empty_like(previous)
+    best[0] = first
+    diagonal = previous[:-1] + scores
+    up = previous[1:] + gap
+    np.maximum(diagonal, up, out=best[1:])
+    if local:
+        np.maximum(best, 0, out=best)
+    best -= steps
+    if blocked is not None and len(blocked):
+        # Every blocked cell starts a new run of left moves - each run gets an offset larger than the spread of the
+        # values, so the running maximum never carries a value over a blocked cell
+        best[blocked] = -steps[blocked]
+        offsets = np.zeros(len(best), dtype=best.dtype)
+        offsets[blocked] = int(best.max()) - int(best.min()) + 1
+        np.cumsum(offsets, out=offsets)
+        best += offsets
+        row = np.maximum.accumulate(best)
+        row -= offsets
+    else:
+        row = np.maximum.accumulate(best)
+    row += steps
+
+    if pointers is not None:
+        cells = row[1:]
+        moves = (diagonal == cells) * np.uint8(MOVE_DIAG)
+        moves |= (up == cells) * np.uint8(MOVE_UP)
+        moves |= (row[:-1] + gap == cells) * np.uint8(MOVE_LEFT)
+        if local:
+            moves[cells == 0] = 0
+        pointers[1:] = moves
+    return row
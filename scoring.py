@@ -0,0 +1,229 @@
+import os
+
+import numpy as np
+
+# Directory with the substitution matrices shipped with the application
+SUBSTITUTION_MATRICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "substitution_matrices")
+
+
+class SubstitutionMatrix:
+    """
+    Class representing a table of scores for every pair of letters of an alphabet. Sequences are encoded once to
+    uint8 codes, so the score of any two letters is a plain lookup in the table.
+    """
+    def __init__(self, alphabet, scores, name=None):
+        """
+        SubstitutionMatrix initialization method.
+        :param alphabet: (str) Letters of the alphabet, in the order of the rows and columns of the scores.
+        :param scores: (2D array-like of int) Table of scores, square with a side equal to the length of the alphabet.
+        :param name: (str or None) Name of the matrix, for example "BLOSUM62".
+        """
+        if not isinstance(alphabet, str):
+            raise TypeError('Alphabet needs to be a string.')
+        if len(set(alphabet)) != len(alphabet) or not 0 < len(alphabet) < 256:
+            raise ValueError('Alphabet needs to consist of 1 to 255 unique letters.')
+        scores = np.asarray(scores)
+        if scores.shape != (len(alphabet), len(alphabet)) or not np.issubdtype(scores.dtype, np.integer):
+            raise ValueError('Scores need to be a square table of integers matching the alphabet.')
+
+        self.alphabet = alphabet
+        self.scores = scores
+        self.name = name
+        # Code of every letter, 255 marks the letters out of the alphabet
+        self.lookup = np.full(0x110000 if max(map(ord, alphabet)) > 0xFF else 0x100, 255, dtype=np.uint8)
+        for code, letter in enumerate(alphabet):
+            self.lookup[ord(letter)] = code
+            if letter.lower() not in alphabet:
+                self.lookup[ord(letter.lower())] = code
+
+    def encode(self, sequence):
+        """
+        Encodes the sequence to the codes of the alphabet.
+        :param sequence: (str) Sequence to be encoded.
+        :return: (numpy array of uint8) Codes of the letters of the sequence.
+        """
+        if not isinstance(sequence, str):
+            raise TypeError('Sequence ought to be a string (str).')
+        points = np.frombuffer(sequence.encode('utf-32-le'), dtype=np.uint32)
+        codes = self.lookup[np.minimum(points, len(self.lookup) - 1)]
+        codes[points >= len(self.lookup)] = 255
+        if (codes == 255).any():
+            unknown = sorted(set(letter for letter in sequence if letter not in self))
+            raise ValueError(f'Sequence consists of letters not present in the substitution matrix: {"".join(unknown)}')
+        return codes
+
+    def __contains__(self, letter):
+        return len(letter) == 1 and ord(letter) < len(self.lookup) and self.lookup[ord(letter)] != 255
+
+
+def match_mismatch_matrix(seq1, seq2, match, mismatch):
+    """
+    Creating a substitution matrix with match value on the diagonal and mismatch value elsewhere, over the alphabet of
+    letters present in both sequences.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param mismatch: (int) Mismatch value.
+    :return: (SubstitutionMatrix) Match/mismatch substitution matrix.
+    """
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+    if not isinstance(match, int) or not isinstance(mismatch, int):
+        raise TypeError('Match value and mismatch value need to be integers.')
+
+    alphabet = "".join(sorted(set(seq1) | set(seq2))) or "-"
+    scores = np.full((len(alphabet), len(alphabet)), mismatch, dtype=np.int64)
+    np.fill_diagonal(scores, match)
+    return SubstitutionMatrix(alphabet, scores, name="match/mismatch")
+
+
+def load_substitution_matrix(name):
+    """
+    Loads a substitution matrix written in the NCBI format - a header row of letters, then one row per letter starting
+    with that letter, lines starting with "#" are comments.
+    :param name: (str) Path to the file or name of a matrix shipped with the application, for example "BLOSUM62" or
+    "PAM250".
+    :return: (SubstitutionMatrix) Loaded substitution matrix.
+    """
+    if not isinstance(name, str):
+        raise TypeError('Name of the substitution matrix needs to be a string.')
+    path = name if os.path.isfile(name) else os.path.join(SUBSTITUTION_MATRICES_DIR, name.upper())
+    if not os.path.isfile(path):
+        raise ValueError(f'Substitution matrix "{name}" does not exist.')
+
+    with open(path) as file:
+        lines = [line.split() for line in file if line.strip() and not line.startswith("#")]
+    alphabet = "".join(lines[0])
+    if [row[0] for row in lines[1:]] != list(alphabet):
+        raise ValueError(f'Rows of the substitution matrix "{name}" do not match its header.')
+    scores = np.array([[int(value) for value in row[1:]] for row in lines[1:]], dtype=np.int64)
+    return SubstitutionMatrix(alphabet, scores, name=os.path.basename(path))
+
+
+def get_substitution_matrix(seq1, seq2, match, mismatch, substitution=None):
+    """
+    Picks the substitution matrix to score the sequences with.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value, used if no substitution matrix is given.
+    :param mismatch: (int) Mismatch value, used if no substitution matrix is given.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix, name or path of one to be loaded, or
+    None to score with match and mismatch values.
+    :return: (SubstitutionMatrix) Substitution matrix to be used.
+    """
+    if substitution is None:
+        return match_mismatch_matrix(seq1, seq2, match, mismatch)
+    if isinstance(substitution, str):
+        return load_substitution_matrix(substitution)
+    if not isinstance(substitution, SubstitutionMatrix):
+        raise TypeError('Substitution needs to be a SubstitutionMatrix, a name of one or None.')
+    return substitution
+
+
+class QueryProfile:
+    """
+    Class representing a lazily computed match matrix. Only the scores of every letter of the alphabet against the
+    second sequence are stored, a row of the match matrix is looked up by the code of the letter of the first sequence,
+    so the full n x m array is never materialized.
+    """
+    def __init__(self, codes1, codes2, scores):
+        """
+        QueryProfile initialization method.
+        :param codes1: (numpy array of uint8) Encoded first sequence.
+        :param codes2: (numpy array of uint8) Encoded second sequence.
+        :param scores: (numpy array) Table of scores of the substitution matrix.
+        """
+        self.codes = codes1
+        self.profile = scores[:, codes2]
+        self.shape = (len(codes1), len(codes2))
+        self.dtype = self.profile.dtype
+
+    def __getitem__(self, index):
+        """
+        Returns a row of the match matrix, or the scores of the given cells when indexed with a pair of index arrays.
+        :param index: (int, slice or tuple of indices) Row or cells of the match matrix.
+        :return: (numpy array) Requested scores.
+        """
+        if isinstance(index, tuple):
+            rows, cols = index
+            return self.profile[self.codes[rows], cols]
+        return self.profile[self.codes[index]]
+
+    def __len__(self):
+        return self.shape[0]
+
+
+def score_matrix(seq1, seq2, match, mismatch, substitution=None, profile=False):
+    """
+    Creating the match matrix of the sequences with a single vectorized gather from the substitution matrix.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param mismatch: (int) Mismatch value.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix, replaces match and mismatch values.
+    :param profile: (bool) True returns a lazy QueryProfile instead of the full matrix.
+    :return: (numpy array or QueryProfile) Match matrix.
+    """
+    table = get_substitution_matrix(seq1, seq2, match, mismatch, substitution)
+    codes1, codes2 = table.encode(seq1), table.encode(seq2)
+    if profile:
+        return QueryProfile(codes1, codes2, table.scores)
+    return table.scores[codes1[:, None], codes2[None, :]]
+
+
+def score_dtype(len1, len2, matrix_is_match, gap):
+    """
+    Picks the smallest integer type safe for the matrix of the sequences - no cell, nor a cell plus a score or a gap,
+    can get further from zero than (n + m + 2) times the largest absolute score.
+    :param len1: (int) Length of sequence 1.
+    :param len2: (int) Length of sequence 2.
+    :param matrix_is_match: (numpy array or QueryProfile) Match matrix.
+    :param gap: (int) Gap penalty value.
+    :return: (numpy dtype) int16, int32 or int64.
+    """
+    scores = matrix_is_match.profile if isinstance(matrix_is_match, QueryProfile) else np.asarray(matrix_is_match)
+    largest = abs(gap)
+    if scores.size:
+        largest = max(largest, abs(int(scores.max())), abs(int(scores.min())))
+    bound = (len1 + len2 + 2) * max(largest, 1)
+    for dtype in (np.int16, np.int32):
+        if bound <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def alignment_score(aligned_1, aligned_2, match, mismatch, gap, substitution=None, gap_open=None, gap_extend=None):
+    """
+    Scores a finished alignment column by column, so the score can be reported without keeping the matrix. A gap of
+    length L costs gap_open + (L - 1) * gap_extend, both default to gap for the linear gap penalty.
+    :param aligned_1: (str) Aligned sequence 1, gaps marked with "-".
+    :param aligned_2: (str) Aligned sequence 2, gaps marked with "-".
+    :param match: (int) Match value.
+    :param mismatch: (int) Mismatch value.
+    :param gap: (int) Gap penalty value.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix, replaces match and mismatch values.
+    :param gap_open: (int or None) Penalty of the first char of a gap.
+    :param gap_extend: (int or None) Penalty of every next char of a gap.
+    :return: (int) Score of the alignment.
+    """
+    if not isinstance(aligned_1, str) or not isinstance(aligned_2, str):
+        raise TypeError('Aligned sequences need to be a type of string.')
+    if len(aligned_1) != len(aligned_2):
+        raise ValueError('Aligned sequences need to be of the same length.')
+    gap_open = gap if gap_open is None else gap_open
+    gap_extend = gap if gap_extend is None else gap_extend
+
+    points1 = np.frombuffer(aligned_1.encode('utf-32-le'), dtype=np.uint32)
+    points2 = np.frombuffer(aligned_2.encode('utf-32-le'), dtype=np.uint32)
+    gaps1, gaps2 = points1 == ord("-"), points2 == ord("-")
+    columns = ~(gaps1 | gaps2)
+    letters1 = points1[columns].tobytes().decode('utf-32-le')
+    letters2 = points2[columns].tobytes().decode('utf-32-le')
+    table = get_substitution_matrix(letters1, letters2, match, mismatch, substitution)
+    score = int(table.scores[table.encode(letters1), table.encode(letters2)].sum())
+
+    for gaps in (gaps1, gaps2):
+        # A gap is opened where the previous column has no gap in the same sequence
+        opened = int(gaps[:1].sum() + (gaps[1:] & ~gaps[:-1]).sum())
+        score += opened * gap_open + (int(gaps.sum()) - opened) * gap_extend
+    return score
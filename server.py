@@ -0,0 +1,391 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import ALGORITHMS, align_batch
+from scoring import SUBSTITUTION_MATRICES_DIR, load_substitution_matrix
+from validation import check_input
+
+# Largest accepted request body in bytes, and largest length of a sequence - the pointer matrix of a pair takes n * m
+# bytes in a worker process shared by all the clients
+MAX_BODY = 1 << 20
+MAX_LENGTH = 10000
+
+# Number of the latest requests the latency percentiles are computed from, and seconds the throughput is averaged over
+LATENCY_WINDOW = 10000
+THROUGHPUT_WINDOW = 60
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def _ready():
+    """
+    Function doing nothing in a worker process, submitted to start the workers.
+    :return: None.
+    """
+
+
+class AlignmentServer:
+    """
+    Class representing a local HTTP/JSON alignment service. Requests are put into a bounded queue, a batcher collects
+    them for a few milliseconds (or until a batch is full), groups them by the parameters and sends every group to a
+    pool of worker processes as a single call. Only a limited number of batches is in flight, when the workers fall
+    behind the queue fills up and new requests are rejected with 503 instead of piling up in memory.
+    """
+    def __init__(self, jobs=None, batch_size=64, batch_delay=0.005, queue_size=1024):
+        """
+        AlignmentServer initialization method.
+        :param jobs: (int or None) Number of worker processes, None uses all the CPUs.
+        :param batch_size: (int) Largest number of pairs in a batch.
+        :param batch_delay: (float) Seconds the batcher waits for more requests after the first one of a batch.
+        :param queue_size: (int) Largest number of requests waiting for a batch.
+        """
+        for value in (batch_size, queue_size) + ((jobs,) if jobs is not None else ()):
+            if not isinstance(value, int) or value < 1:
+                raise ValueError('Number of jobs, batch size and queue size need to be positive integers.')
+        if not isinstance(batch_delay, (int, float)) or batch_delay < 0:
+            raise ValueError('Batch delay needs to be a non-negative number.')
+
+        self.jobs = jobs or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.queue_size = queue_size
+        self.counters = {"requests": 0, "aligned": 0, "errors": 0, "rejected": 0, "batches": 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.finished = deque()  # Times of the recently aligned requests
+        self.started = time.monotonic()
+        self.substitutions = {}
+        self.matrix_names = sorted(os.listdir(SUBSTITUTION_MATRICES_DIR))
+        self.queue = None
+        self.slots = None
+        self.pool = None
+        self.servers = []
+        self.tasks = set()
+
+    async def start(self, host="127.0.0.1", port=8080, path=None):
+        """
+        Starts the worker processes, the batcher and listening.
+        :param host: (str) Address to listen on.
+        :param port: (int) Port to listen on.
+        :param path: (str or None) Path of a Unix socket to listen on instead of the address and the port.
+        :return: None.
+        """
+        self.queue = asyncio.Queue(self.queue_size)
+        self.slots = asyncio.Semaphore(2 * self.jobs)  # Batches in flight - computed and waiting for a worker
+        self.pool = ProcessPoolExecutor(self.jobs)
+        # The workers are started before listening - a worker forked later would inherit the sockets of the clients
+        # connected at that moment and keep them open after the server closes them
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ready) for _ in range(self.jobs)))
+        self._spawn(self._batcher())
+        if path is None:
+            self.servers.append(await asyncio.start_server(self._handle, host, port))
+        else:
+            self.servers.append(await asyncio.start_unix_server(self._handle, path))
+
+    async def close(self):
+        """
+        Stops listening, the batcher and the worker processes.
+        :return: None.
+        """
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        for task in list(self.tasks):
+            task.cancel()
+        # Waited for in another thread - the event loop must not stall while the workers finish their batches
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.pool.shutdown,
+                                                                                 cancel_futures=True))
+
+    def metrics(self):
+        """
+        Returns the statistics of the service.
+        :return: (dict) Counters of the requests, sizes of the queue and the batches, latency percentiles in
+        milliseconds and throughput in aligned pairs per second.
+        """
+        now = time.monotonic()
+        while self.finished and self.finished[0] < now - THROUGHPUT_WINDOW:
+            self.finished.popleft()
+        window = min(THROUGHPUT_WINDOW, now - self.started)
+        metrics = dict(self.counters)
+        metrics.update(uptime_seconds=now - self.started, queued=self.queue.qsize() if self.queue else 0,
+                       mean_batch_size=self.counters["aligned"] / self.counters["batches"]
+                       if self.counters["batches"] else 0.0,
+                       throughput_per_second=len(self.finished) / window if window > 0 else 0.0)
+        if self.latencies:
+            percentiles = np.percentile(np.array(self.latencies) * 1000, [50, 95, 99])
+            metrics["latency_ms"] = dict(zip(("p50", "p95", "p99"), percentiles.round(3).tolist()))
+        else:
+            metrics["latency_ms"] = None
+        return metrics
+
+    def _spawn(self, coroutine):
+        """
+        Runs the coroutine as a task, keeping a reference to it until it is done.
+        :param coroutine: (coroutine) Coroutine to be run.
+        :return: None.
+        """
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def _parse(self, body):
+        """
+        Validates an alignment request.
+        :param body: (bytes) JSON body of the request.
+        :return pair: (tuple of str, str) Upper-cased sequences.
+        :return parameters: (tuple) Algorithm, match, mismatch and gap values and the substitution matrix (or None).
+        """
+        try:
+            request = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            raise ValueError(f'Body is not valid JSON: {error}.')
+        if not isinstance(request, dict):
+            raise ValueError('Body needs to be a JSON object.')
+
+        seq1, seq2 = request.get("seq1"), request.get("seq2")
+        if not isinstance(seq1, str) or not isinstance(seq2, str) or not check_input(seq1) or not check_input(seq2):
+            raise ValueError('Fields "seq1" and "seq2" need to be non-empty sequences, without numbers or special '
+                             'chars.')
+        if len(seq1) > MAX_LENGTH or len(seq2) > MAX_LENGTH:
+            raise ValueError(f'Fields "seq1" and "seq2" need to be at most {MAX_LENGTH} chars long.')
+        algorithm = request.get("algorithm", "nw")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f'Field "algorithm" needs to be one of: {", ".join(ALGORITHMS)}.')
+        scoring = tuple(request.get(key, default) for key, default in (("match", 1), ("mismatch", -1), ("gap", -2)))
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in scoring):
+            raise ValueError('Fields "match", "mismatch" and "gap" need to be integers.')
+
+        substitution = request.get("substitution")
+        if substitution is not None:
+            # Only the matrices shipped with the application - a client must not make the server read its files
+            if not isinstance(substitution, str) or substitution.upper() not in self.matrix_names:
+                raise ValueError(f'Field "substitution" needs to be one of: {", ".join(self.matrix_names)}.')
+            substitution = substitution.upper()
+            if substitution not in self.substitutions:
+                self.substitutions[substitution] = load_substitution_matrix(substitution)
+            substitution = self.substitutions[substitution]
+            for sequence in (seq1, seq2):
+                substitution.encode(sequence.upper())  # Raises ValueError naming the letters out of the matrix
+        return (seq1.upper(), seq2.upper()), (algorithm,) + scoring + (substitution,)
+
+    async def _align(self, body):
+        """
+        Queues an alignment request and waits for its result.
+        :param body: (bytes) JSON body of the request.
+        :return: (tuple of int, dict) HTTP status and the response.
+        """
+        try:
+            pair, parameters = self._parse(body)
+        except ValueError as error:
+            self.counters["errors"] += 1
+            return 400, {"error": str(error)}
+
+        arrived = time.monotonic()
+        result = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((pair, parameters, result))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            return 503, {"error": "Server is busy, retry later."}
+        try:
+            aligned_1, aligned_2, score = await result
+        except (ValueError, TypeError) as error:
+            self.counters["errors"] += 1
+            return 400, {"error": str(error)}
+
+        now = time.monotonic()
+        self.latencies.append(now - arrived)
+        self.finished.append(now)
+        self.counters["aligned"] += 1
+        return 200, {"aligned_1": aligned_1, "aligned_2": aligned_2, "score": score}
+
+    async def _batcher(self):
+        """
+        Collects the queued requests into batches and sends them to the workers, waiting for a free slot if too many
+        batches are in flight.
+        :return: None.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+
+            groups = {}
+            for request in batch:
+                groups.setdefault(request[1], []).append(request)
+            for parameters, requests in groups.items():
+                await self.slots.acquire()
+                self._spawn(self._run(parameters, requests))
+
+    async def _run(self, parameters, requests):
+        """
+        Aligns a group of requests with the same parameters in a worker process and hands out the results. If the
+        group fails, its requests are aligned one by one, so a single bad pair fails only its own request.
+        :param parameters: (tuple) Algorithm and scoring parameters, see _parse.
+        :param requests: (list of tuples) Pair, parameters and future of the result of every request.
+        :return: None.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            pairs = [pair for pair, _, _ in requests]
+            results = await loop.run_in_executor(self.pool, align_batch, pairs, *parameters)
+        except Exception as error:
+            for pair, _, result in requests:
+                outcome = error
+                if len(requests) > 1 and not result.done():
+                    try:
+                        outcome = (await loop.run_in_executor(self.pool, align_batch, [pair], *parameters))[0]
+                    except Exception as pair_error:
+                        outcome = pair_error
+                if not result.done():
+                    if isinstance(outcome, Exception):
+                        result.set_exception(outcome)
+                    else:
+                        result.set_result(outcome)
+        else:
+            self.counters["batches"] += 1
+            for (_, _, result), aligned in zip(requests, results):
+                if not result.done():
+                    result.set_result(aligned)
+        finally:
+            self.slots.release()
+
+    async def _route(self, method, target, body):
+        """
+        Handles an HTTP request.
+        :param method: (str) HTTP method.
+        :param target: (str) Path of the request.
+        :param body: (bytes) Body of the request.
+        :return: (tuple of int, dict) HTTP status and the response.
+        """
+        path = target.split("?", 1)[0]
+        if path == "/align":
+            if method != "POST":
+                return 405, {"error": "Use POST."}
+            self.counters["requests"] += 1
+            return await self._align(body)
+        if path == "/metrics":
+            if method != "GET":
+                return 405, {"error": "Use GET."}
+            return 200, self.metrics()
+        return 404, {"error": f'Unknown path "{path}", use POST /align or GET /metrics.'}
+
+    async def _handle(self, reader, writer):
+        """
+        Serves the HTTP/1.1 requests of a connection, keeping it open between them unless the client closes it.
+        :param reader: (asyncio.StreamReader) Stream of the connection.
+        :param writer: (asyncio.StreamWriter) Stream of the connection.
+        :return: None.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                parts = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0) or 0)
+                if len(parts) != 3:
+                    status, response = 400, {"error": "Malformed request line."}
+                elif length > MAX_BODY:
+                    status, response = 413, {"error": f"Body needs to be at most {MAX_BODY} bytes."}
+                else:
+                    body = await reader.readexactly(length)
+                    try:
+                        status, response = await self._route(parts[0], parts[1], body)
+                    except Exception as error:
+                        status, response = 500, {"error": str(error)}
+
+                keep_alive = len(parts) == 3 and parts[2] == "HTTP/1.1" and status != 413 and \
+                    headers.get("connection", "").lower() != "close"
+                payload = json.dumps(response).encode()
+                head = [f"HTTP/1.1 {status} {REASONS[status]}", "Content-Type: application/json",
+                        f"Content-Length: {len(payload)}", "Connection: " + ("keep-alive" if keep_alive else "close")]
+                if status == 503:
+                    head.append("Retry-After: 1")
+                writer.write("\r\n".join(head).encode() + b"\r\n\r\n" + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # Client disconnected or sent a malformed request
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8080, path=None, **options):
+    """
+    Runs the alignment service until it is cancelled.
+    :param host: (str) Address to listen on.
+    :param port: (int) Port to listen on.
+    :param path: (str or None) Path of a Unix socket to listen on instead of the address and the port.
+    :param options: Keyword arguments of AlignmentServer.
+    :return: None.
+    """
+    server = AlignmentServer(**options)
+    await server.start(host, port, path)
+    print(f"Listening on {path or f'http://{host}:{port}'}", file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    """
+    Entry point of the alignment service.
+    :param argv: (list of str or None) Arguments, None reads them from sys.argv.
+    :return: (int) Exit status.
+    """
+    parser = argparse.ArgumentParser(description="Serves the alignment algorithms over HTTP/JSON - POST /align with "
+                                                 "seq1, seq2 and optionally algorithm (nw or sw), match, mismatch, "
+                                                 "gap and substitution, GET /metrics for the statistics.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on (default: 8080)")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of the address and the port")
+    parser.add_argument("--jobs", type=int, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--batch-size", type=int, default=64, help="largest number of pairs in a batch (default: 64)")
+    parser.add_argument("--batch-delay", type=float, default=5.0,
+                        help="milliseconds to wait for more requests of a batch (default: 5)")
+    parser.add_argument("--queue-size", type=int, default=1024,
+                        help="largest number of waiting requests, more are rejected with 503 (default: 1024)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, jobs=args.jobs, batch_size=args.batch_size,
+                          batch_delay=args.batch_delay / 1000, queue_size=args.queue_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
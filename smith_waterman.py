@@ -1,51 +1,94 @@
 import numpy as np
 
+from archive import new_matrix, save_archive
+from frames import FrameRecorder, MOVE_DIAG, MOVE_LEFT, MOVE_NONE, MOVE_UP, PHASE_FILLING, PHASE_INITIALIZATION, \
+    PHASE_TRACEBACK, Step
+from gotoh import gotoh_algorithm
+from instrumentation import phase, phase_steps
+from pointers import new_pointer_matrix, pointer_path, pointer_traceback
+from rowwise import fill_row
+from scoring import get_substitution_matrix, score_dtype, score_matrix
+from tiled import tiled_fill, tiled_score
+from wavefront import wavefront_fill
+from waterman_eggert import waterman_eggert
 
-def match_matrix(seq1, seq2, match, mismatch):
+ENGINES = ("python", "wavefront", "tiled")
+
+
+def match_matrix(seq1, seq2, match, mismatch, substitution=None, profile=False):
     """
     Creating a match/missmatch matrix. Stores match value is in matrix if corresponding chars in sequences match and
-    missmatch value if there is no match.
+    missmatch value if there is no match. Sequences are encoded to uint8 codes and the matrix is gathered from a small
+    substitution table in one vectorized operation.
     :param seq1: (str) Input sequence.
     :param seq2: (str) Input sequence.
     :param match: (int) Match value.
     :param mismatch: (int) Mismatch value.
-    :return matrix_is_match: (numpy array) Match matrix.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix (or name of one, e.g. "BLOSUM62") to
+    score the chars with instead of match and mismatch values.
+    :param profile: (bool) True returns a lazy per-row QueryProfile instead of materializing the full matrix.
+    :return matrix_is_match: (numpy array or QueryProfile) Match matrix.
     """
     if not isinstance(seq1, str) or not isinstance(seq2, str):
         raise TypeError('Sequences need to be a type of string.')
     if not isinstance(match, int) or not isinstance(mismatch, int):
         raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
 
-    matrix_is_match = np.zeros((len(seq1), len(seq2)))
-    for x in range(len(seq1)):
-        for y in range(len(seq2)):
-            if seq1[x] == seq2[y]:
-                matrix_is_match[x][y] = match
-            else:
-                matrix_is_match[x][y] = mismatch
+    matrix_is_match = score_matrix(seq1, seq2, match, mismatch, substitution, profile)
     return matrix_is_match
 
 
-def _smith_waterman_initialization(seq1, seq2):
+def _smith_waterman_initialization(seq1, seq2, keyframe_interval=None, dtype=np.int64, path=None, shared=False):
     """
     Function performing initialization of the Smith-Waterman algorithm.
     :param seq1: (str) Input sequence.
     :param seq2: (str) Input sequence.
-    :return matrix: (list of numpy arrays) Initialized matrix.
-    :return matrices: (list of numpy arrays) List how each step of initializing the matrix.
+    :param keyframe_interval: (int or None) Every how many steps the recorder keeps a full copy of the matrix.
+    :param dtype: (numpy dtype) Integer type of the matrix, see scoring.score_dtype.
+    :param path: (str or None) Path to the file backing the matrix, None keeps it in memory.
+    :param shared: (bool) True places the matrix in shared memory, see archive.new_matrix.
+    :return matrix: (numpy array) Initialized matrix.
+    :return frames: (FrameRecorder) Recorder with each step of initializing the matrix.
     """
     if not isinstance(seq1, str) or not isinstance(seq2, str):
         raise TypeError('Sequences need to be a type of string.')
 
     # Matrix for the Smith-Waterman algorithm
-    matrix = np.zeros((len(seq1) + 1, len(seq2) + 1))
-    matrices = []  # List of matrices for the animation
+    matrix = new_matrix((len(seq1) + 1, len(seq2) + 1), dtype, path, shared)
+    frames = FrameRecorder(matrix, keyframe_interval)  # Steps of the animation
 
     # Initialization - all zeros
-    return matrix, matrices
+    return matrix, frames
 
 
-def _smith_waterman_filling(seq1, seq2, matrix, matrix_is_match, gap):
+def _smith_waterman_cells(seq1, seq2, matrix, matrix_is_match, gap, pointers):
+    """
+    Generator of the cells of the filling phase in row order. The pointers are written here, the value of every cell
+    has to be written into the matrix by the caller before the next cell is requested.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param matrix: (numpy array) Matrix after initialization phase.
+    :param matrix_is_match: (numpy array) Match matrix.
+    :param gap: (int) Gap penalty value.
+    :param pointers: (numpy array of uint8) Pointer matrix, filled with the moves giving each cell its value.
+    :return: (generator of tuples of int, int, int, int) Row, column, value and preferred move code of every cell.
+    """
+    for x in range(1, len(seq1) + 1):
+        for y in range(1, len(seq2) + 1):
+            diagonal = int(matrix[x - 1][y - 1] + matrix_is_match[x - 1][y - 1])
+            up = int(matrix[x - 1][y]) + gap
+            left = int(matrix[x][y - 1]) + gap
+            value = max(0, diagonal, up, left)
+            if value > 0:
+                moves = (MOVE_DIAG if diagonal == value else 0) | (MOVE_UP if up == value else 0) | \
+                        (MOVE_LEFT if left == value else 0)
+            else:
+                moves = MOVE_NONE  # Local alignment starts here
+            pointers[x][y] = moves
+            yield x, y, value, moves & -moves  # Lowest bit - the preferred move
+
+
+def _smith_waterman_filling(seq1, seq2, matrix, matrix_is_match, gap, frames, pointers):
     """
     Function performing filling phase of Smith-Waterman algorithm.
     :param seq1: (str) Input sequence.
@@ -53,8 +96,10 @@ def _smith_waterman_filling(seq1, seq2, matrix, matrix_is_match, gap):
     :param matrix: (numpy array) Matrix after initialization phase.
     :param matrix_is_match: (numpy array) Match matrix.
     :param gap: (int) Gap penalty value.
-    :return matrix: (list of numpy arrays) Filled matrix.
-    :return matrices: (list of numpy arrays) List how each step of filling the matrix.
+    :param frames: (FrameRecorder) Recorder of the matrix, each filled cell is recorded as a step.
+    :param pointers: (numpy array of uint8) Pointer matrix, filled with the moves giving each cell its value.
+    :return matrix: (numpy array) Filled matrix.
+    :return frames: (FrameRecorder) Recorder with each step of filling the matrix.
     """
 
     if not isinstance(seq1, str) or not isinstance(seq2, str):
@@ -62,28 +107,21 @@ def _smith_waterman_filling(seq1, seq2, matrix, matrix_is_match, gap):
     if not isinstance(gap, int):
         raise TypeError('Gap penalty value needs to be an integer.')
 
-    matrices = []  # List of matrices for the animation
-
     # Filling of the matrix
-    for x in range(1, len(seq1) + 1):
-        for y in range(1, len(seq2) + 1):
-            matrix[x][y] = max(0,
-                               matrix[x - 1][y - 1] + matrix_is_match[x - 1][y - 1],
-                               matrix[x - 1][y] + gap,
-                               matrix[x][y - 1] + gap)
-            matrices.append(matrix.copy())
+    for x, y, value, move in _smith_waterman_cells(seq1, seq2, matrix, matrix_is_match, gap, pointers):
+        frames.set(x, y, value, move)
 
-    return matrix, matrices
+    return matrix, frames
 
 
-def _smith_waterman_traceback(seq1, seq2, matrix, matrix_is_match, gap):
+def _smith_waterman_traceback(seq1, seq2, matrix, pointers):
     """
-    Function performing traceback phase of Smith-Waterman algorithm.
+    Function performing traceback phase of Smith-Waterman algorithm, walking the pointer matrix from the highest
+    scoring cell until a cell with zero score.
     :param seq1: (str) Input sequence.
     :param seq2: (str) Input sequence.
     :param matrix: (numpy array) Matrix after filling phase.
-    :param matrix_is_match: (numpy array) Match matrix.
-    :param gap (int): Gap penalty value.
+    :param pointers: (numpy array of uint8) Pointer matrix after filling phase.
     :return aligned_1: (str) Output of sequence 1 - local alignments of sequence 1.
     :return aligned_2: (str) Output of sequence 2 - local alignments of sequence 2.
     """
@@ -91,40 +129,89 @@ def _smith_waterman_traceback(seq1, seq2, matrix, matrix_is_match, gap):
     if not isinstance(seq1, str) or not isinstance(seq2, str):
         raise TypeError('Sequences need to be a type of string.')
 
-    if not isinstance(gap, int):
-        raise TypeError('Gap penalty needs to be a string')
+    # Find the highest scoring cell, the first one in row order
+    x, y = np.unravel_index(np.argmax(matrix), matrix.shape)
 
-    # In this part of code I used more simple approach, because first I did SMA and then NWA.
-    matrices = []
+    aligned_1, aligned_2, _, _ = pointer_traceback(seq1, seq2, pointers, x, y)
 
-    # Find the highest scoring cell
-    max_score = matrix.max()
-    max_position = np.where(matrix == max_score)
-    x, y = max_position[0][0], max_position[1][0]
+    return aligned_1, aligned_2
 
-    aligned_1, aligned_2 = "", ""
 
-    # Traceback
-    while matrix[x][y] > 0:
-        # Diagonal move
-        if x > 0 and y > 0 and matrix[x][y] == matrix[x - 1][y - 1] + matrix_is_match[x - 1][y - 1]:
-            aligned_1 = seq1[x - 1] + aligned_1
-            aligned_2 = seq2[y - 1] + aligned_2
-            x -= 1
-            y -= 1
-        elif x > 0 and matrix[x][y] == matrix[x - 1][y] + gap:  # Up move
-            aligned_1 = seq1[x - 1] + aligned_1
-            x = "-" + aligned_2
-            x -= 1
-        elif y > 0 and matrix[x][y] == matrix[x][y - 1] + gap:  # Left move
-            aligned_1 = "-" + aligned_1
-            aligned_2 = seq2[y - 1] + aligned_2
-            y -= 1
+def smith_waterman_score(seq1, seq2, match, missmatch, gap, substitution=None):
+    """
+    Function computing the best local alignment score without traceback, keeping only two rows of the matrix. The
+    scores of every letter against sequence 2 (query profile) are computed once, then each row is a few NumPy
+    operations.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return: (int) Score of the best local alignment.
+    """
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
 
-    return aligned_1, aligned_2
+    table = get_substitution_matrix(seq1, seq2, match, missmatch, substitution)
+    profile = table.scores[:, table.encode(seq2)].astype(np.int64)
+    steps = np.arange(len(seq2) + 1, dtype=np.int64) * gap
+    row = np.zeros(len(seq2) + 1, dtype=np.int64)
+    best = 0
+    for code in table.encode(seq1):
+        row = fill_row(row, profile[code], gap, 0, local=True, steps=steps)
+        best = max(best, int(row.max()))
+    return best
+
+
+def iter_steps(seq1, seq2, match, missmatch, gap, substitution=None):
+    """
+    Generator performing Smith-Waterman algorithm step by step, each step is computed only when it is requested, so
+    an animation can pull the steps at its own pace, or skip them, without any frames being stored.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return: (generator of Step) Steps of initialization (zeros of the first column and row), filling and traceback
+    phases - the cell, its value and the move, the traceback goes from the highest scoring cell to a cell with zero
+    score. Returns the aligned sequences when exhausted (the value of StopIteration).
+    """
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
 
+    with phase("match_matrix"):
+        matrix_is_match = match_matrix(seq1, seq2, match, missmatch, substitution)
+    with phase(PHASE_INITIALIZATION):
+        matrix = np.zeros((len(seq1) + 1, len(seq2) + 1),
+                          dtype=score_dtype(len(seq1), len(seq2), matrix_is_match, gap))
+        pointers = new_pointer_matrix(len(seq1) + 1, len(seq2) + 1, local=True)
 
-def smith_waterman_algorithm(seq1, seq2, match, missmatch, gap):
+    for x in range(len(seq1) + 1):
+        yield Step(PHASE_INITIALIZATION, x, 0, 0, MOVE_NONE)
+    for y in range(1, len(seq2) + 1):
+        yield Step(PHASE_INITIALIZATION, 0, y, 0, MOVE_NONE)
+    cells = _smith_waterman_cells(seq1, seq2, matrix, matrix_is_match, gap, pointers)
+    for x, y, value, move in phase_steps(PHASE_FILLING, cells, 1):
+        matrix[x, y] = value
+        yield Step(PHASE_FILLING, x, y, value, move)
+    with phase(PHASE_TRACEBACK):
+        x, y = np.unravel_index(np.argmax(matrix), matrix.shape)
+    for x, y, move in phase_steps(PHASE_TRACEBACK, pointer_path(pointers, x, y)):
+        yield Step(PHASE_TRACEBACK, x, y, int(matrix[x, y]), move)
+
+    with phase(PHASE_TRACEBACK):
+        return _smith_waterman_traceback(seq1, seq2, matrix, pointers)
+
+
+def smith_waterman_algorithm(seq1, seq2, match, missmatch, gap, keyframe_interval=None, engine="python",
+                             substitution=None, gap_open=None, gap_extend=None, score_only=False, top_k=None,
+                             matrix_path=None, archive_path=None):
     """
     Function performing Smith-Waterman algorithm with all the steps - initialization, filling, traceback, returns
     general local alignments, as well as all steps of filling the matrix with numbers.
@@ -133,10 +220,32 @@ def smith_waterman_algorithm(seq1, seq2, match, missmatch, gap):
     :param match: (int) Match value.
     :param missmatch: (int) Missmatch value.
     :param gap: (int) Gap penalty value.
+    :param keyframe_interval: (int or None) Every how many steps the recorder keeps a full copy of the matrix, None
+    rebuilds the frames from the final matrix.
+    :param engine: (str) "python" fills the matrix cell by cell and records the animation frames, "wavefront" fills
+    it by whole rows with NumPy, "tiled" fills it by tiles in parallel worker processes, the last two record no
+    frames.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix, or name of one such as "BLOSUM62", to
+    score the chars with instead of match and missmatch values.
+    :param gap_open: (int or None) Penalty of the first char of a gap, giving it switches to affine gap penalties
+    computed with vectorized Gotoh algorithm (no frames), defaults to gap if only gap_extend is given.
+    :param gap_extend: (int or None) Penalty of every next char of a gap, defaults to gap if only gap_open is given.
+    :param score_only: (bool) True skips the traceback and returns only the score of the best local alignment,
+    computed keeping two rows of the matrix in memory, or only the boundaries of the tiles for the "tiled" engine.
+    :param top_k: (int or None) Number of the best non-overlapping local alignments to be found in one pass over the
+    matrix (Waterman-Eggert algorithm), None finds only the best one. Not available with affine gap penalties.
+    :param matrix_path: (str or None) Path to a file on the local disk backing the matrix (and the same path with
+    ".pointers" appended backing the pointer matrix) with np.memmap, for matrices larger than the memory. Not available
+    with affine gap penalties, score_only and top_k.
+    :param archive_path: (str or None) Path to a compressed archive the final matrix and the traceback path are saved
+    to, to be opened by MatrixDisplayApp later. Not available with affine gap penalties, score_only and top_k.
     :return aligned_1 (str): Output of sequence 1 - local alignments of sequence 1.
     :return aligned_2 (str): Output of sequence 2 - local alignments of sequence 2.
-    :return all_matrices (list of np arrays): List of numpy arrays representing each step of filling the matrix with
-    numbers.
+    :return frames (FrameRecorder or None): Lightweight source of frames, indexing or iterating it gives numpy arrays
+    representing each step of filling the matrix with numbers, None for the engines without frames.
+    :return score (int): Only with score_only=True, returned alone - score of the best local alignment.
+    :return alignments (list of tuples of str, str, int): Only with top_k, returned alone - aligned sequences and score
+    of up to top_k non-overlapping local alignments, from the best one.
     """
 
     if not isinstance(seq1, str) or not isinstance(seq2, str):
@@ -144,19 +253,64 @@ def smith_waterman_algorithm(seq1, seq2, match, missmatch, gap):
 
     if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
         raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+    if engine not in ENGINES:
+        raise ValueError(f'Engine needs to be one of: {", ".join(ENGINES)}.')
 
-    matrix_is_match = match_matrix(seq1, seq2, match, missmatch)
-    all_matrices = []  # List of all matrices for the animation
+    cells = len(seq1) * len(seq2)
+    if (matrix_path is not None or archive_path is not None) and \
+            (score_only or top_k is not None or gap_open is not None or gap_extend is not None):
+        raise ValueError('Matrix file and archive need an engine filling the whole matrix with linear gap penalty.')
+    if top_k is not None:
+        if gap_open is not None or gap_extend is not None:
+            raise ValueError('Top-k alignments are not available with affine gap penalties.')
+        with phase("top_k", cells):
+            return waterman_eggert(seq1, seq2, match, missmatch, gap, top_k, substitution)
+    if gap_open is not None or gap_extend is not None:
+        with phase("gotoh", cells):
+            aligned_1, aligned_2, score = gotoh_algorithm(seq1, seq2, match, missmatch,
+                                                          gap if gap_open is None else gap_open,
+                                                          gap if gap_extend is None else gap_extend,
+                                                          local=True, substitution=substitution)
+        return score if score_only else (aligned_1, aligned_2, None)
+    if score_only:
+        with phase("score", cells):
+            if engine == "tiled":
+                return tiled_score(seq1, seq2, match, missmatch, gap, local=True, substitution=substitution)
+            return smith_waterman_score(seq1, seq2, match, missmatch, gap, substitution)
+
+    # The vectorized engine gathers its scores from a lazy query profile instead of a full match matrix
+    with phase("match_matrix"):
+        matrix_is_match = match_matrix(seq1, seq2, match, missmatch, substitution, profile=engine != "python")
+
+    dtype = score_dtype(len(seq1), len(seq2), matrix_is_match, gap)
+    # The tiled engine fills the matrices in place in worker processes, so they are placed in shared memory
+    pointers = new_pointer_matrix(len(seq1) + 1, len(seq2) + 1, local=True,
+                                  path=None if matrix_path is None else matrix_path + ".pointers",
+                                  shared=engine == "tiled")
 
     # Initialization step
-    matrix, init_matrices = _smith_waterman_initialization(seq1, seq2)
-    all_matrices.extend(init_matrices)
+    with phase("initialization"):
+        matrix, frames = _smith_waterman_initialization(seq1, seq2, keyframe_interval, dtype, matrix_path,
+                                                        shared=engine == "tiled")
 
     # Matrix filling step
-    matrix, filling_matrices = _smith_waterman_filling(seq1, seq2, matrix, matrix_is_match, gap)
-    all_matrices.extend(filling_matrices)
+    if engine == "python":
+        with phase("filling", cells, frames=cells):
+            matrix, frames = _smith_waterman_filling(seq1, seq2, matrix, matrix_is_match, gap, frames, pointers)
+    else:
+        fill = tiled_fill if engine == "tiled" else wavefront_fill
+        with phase("filling", cells):
+            matrix = fill(matrix, matrix_is_match, gap, local=True, pointers=pointers)
+        frames = None
 
     # Traceback
-    aligned_1, aligned_2 = _smith_waterman_traceback(seq1, seq2, matrix, matrix_is_match, gap)
+    with phase("traceback"):
+        aligned_1, aligned_2 = _smith_waterman_traceback(seq1, seq2, matrix, pointers)
+
+    if archive_path is not None:
+        with phase("archive"):
+            x, y = np.unravel_index(np.argmax(matrix), matrix.shape)
+            path = [(x, y) for x, y, _ in pointer_path(pointers, x, y)]
+            save_archive(archive_path, matrix, seq1, seq2, path, (aligned_1, aligned_2), "Smith-Waterman algorithm: ")
 
-    return aligned_1, aligned_2, all_matrices
+    return aligned_1, aligned_2, frames
@@ -0,0 +1,104 @@
+import random
+
+from scoring import get_substitution_matrix
+
+DNA = "ACGT"
+PROTEIN = "ARNDCQEGHILKMFPSTWYV"
+
+
+def random_pairs(seed, count, low=1, high=12, alphabet=DNA):
+    """
+    Function generating random pairs of sequences, reproducible by the seed.
+    :param seed: (int) Seed of the generator.
+    :param count: (int) Number of pairs.
+    :param low: (int) Shortest length of a sequence.
+    :param high: (int) Longest length of a sequence.
+    :param alphabet: (str) Letters of the sequences.
+    :return: (list of tuples of str, str) Pairs of sequences.
+    """
+    generator = random.Random(seed)
+    return [tuple("".join(generator.choice(alphabet) for _ in range(generator.randint(low, high))) for _ in range(2))
+            for _ in range(count)]
+
+
+def write_targets(path, count, seed):
+    """
+    Function writing random target sequences into a FASTA file, named target0, target1 and so on.
+    :param path: (str) Path of the file.
+    :param count: (int) Number of targets.
+    :param seed: (int) Seed of the generator.
+    :return: (list of str) Target sequences.
+    """
+    generator = random.Random(seed)
+    targets = ["".join(generator.choice(DNA) for _ in range(generator.randint(60, 200))) for _ in range(count)]
+    with open(path, "w") as file:
+        for number, target in enumerate(targets):
+            file.write(f">target{number}\n{target}\n")
+    return targets
+
+
+def _scorer(seq1, seq2, match, missmatch, substitution):
+    """
+    Function returning the score of a pair of chars, looked up in the same table the algorithms use.
+    :return: (function) Function of two chars returning their score.
+    """
+    table = get_substitution_matrix(seq1, seq2, match, missmatch, substitution)
+    return lambda a, b: int(table.scores[table.encode(a)[0], table.encode(b)[0]])
+
+
+def reference_score(seq1, seq2, match, missmatch, gap, local=False, substitution=None):
+    """
+    Function computing the optimal score with the plain recurrence of Needleman-Wunsch or Smith-Waterman algorithm,
+    cell by cell in Python.
+    :return: (int) Score of the optimal alignment.
+    """
+    score = _scorer(seq1, seq2, match, missmatch, substitution)
+    n, m = len(seq1), len(seq2)
+    matrix = [[0 if local else (x + y) * gap if x == 0 or y == 0 else 0 for y in range(m + 1)] for x in range(n + 1)]
+    for x in range(1, n + 1):
+        for y in range(1, m + 1):
+            matrix[x][y] = max(matrix[x - 1][y - 1] + score(seq1[x - 1], seq2[y - 1]), matrix[x - 1][y] + gap,
+                               matrix[x][y - 1] + gap, *((0,) if local else ()))
+    return max(max(row) for row in matrix) if local else matrix[n][m]
+
+
+def reference_affine_score(seq1, seq2, match, missmatch, gap_open, gap_extend, local=False, substitution=None):
+    """
+    Function computing the optimal score with affine gap penalties with the plain recurrence of Gotoh algorithm - a gap
+    of length L costs gap_open + (L - 1) * gap_extend.
+    :return: (int) Score of the optimal alignment.
+    """
+    score = _scorer(seq1, seq2, match, missmatch, substitution)
+    n, m = len(seq1), len(seq2)
+    low = -10 ** 9
+    best = [[low] * (m + 1) for _ in range(n + 1)]  # Any alignment of the prefixes
+    up = [[low] * (m + 1) for _ in range(n + 1)]  # Alignments ending with a gap in sequence 2
+    left = [[low] * (m + 1) for _ in range(n + 1)]  # Alignments ending with a gap in sequence 1
+    best[0][0] = 0
+    for x in range(n + 1):
+        for y in range(m + 1):
+            if x > 0:
+                up[x][y] = max(best[x - 1][y] + gap_open, up[x - 1][y] + gap_extend)
+            if y > 0:
+                left[x][y] = max(best[x][y - 1] + gap_open, left[x][y - 1] + gap_extend)
+            if x > 0 or y > 0:
+                diagonal = best[x - 1][y - 1] + score(seq1[x - 1], seq2[y - 1]) if x > 0 and y > 0 else low
+                best[x][y] = max(diagonal, up[x][y], left[x][y], *((0,) if local else ()))
+            elif local:
+                best[x][y] = 0
+    return max(max(row) for row in best) if local else best[n][m]
+
+
+def check_alignment(seq1, seq2, aligned_1, aligned_2, local=False):
+    """
+    Function asserting the aligned sequences are an alignment of the sequences - of the whole sequences for a global
+    alignment, of their substrings for a local one - with no column of two gaps.
+    :return: None.
+    """
+    assert len(aligned_1) == len(aligned_2)
+    assert all(a != "-" or b != "-" for a, b in zip(aligned_1, aligned_2))
+    letters_1, letters_2 = aligned_1.replace("-", ""), aligned_2.replace("-", "")
+    if local:
+        assert letters_1 in seq1 and letters_2 in seq2
+    else:
+        assert (letters_1, letters_2) == (seq1, seq2)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from archive import MatrixArchive, new_matrix, save_archive
+from needleman_wunsch import needleman_wunsch_algorithm
+from reference import random_pairs
+from smith_waterman import smith_waterman_algorithm
+
+
+@pytest.mark.parametrize("local", [False, True])
+def test_matrix_file_and_archive(tmp_path, local):
+    seq1, seq2 = random_pairs(11, 1, low=300, high=400)[0]
+    algorithm = smith_waterman_algorithm if local else needleman_wunsch_algorithm
+    expected = algorithm(seq1, seq2, 1, -1, -2, engine="wavefront")[:2]
+    aligned = algorithm(seq1, seq2, 1, -1, -2, engine="wavefront", matrix_path=str(tmp_path / "matrix.dat"),
+                        archive_path=str(tmp_path / "alignment.npz"))[:2]
+    assert aligned == expected
+
+    archive = MatrixArchive(str(tmp_path / "alignment.npz"))
+    assert (archive.seq1, archive.seq2) == (seq1, seq2)
+    assert (archive.aligned_1, archive.aligned_2) == aligned
+    window = archive[10:20, 250:300]
+    assert window.shape == (10, 50) and archive.loads == 2
+    matrix = np.memmap(str(tmp_path / "matrix.dat"), dtype=archive.dtype, mode="r", shape=archive.shape)
+    assert (window == matrix[10:20, 250:300]).all()
+    assert (archive[:, :] == matrix).all()
+    archive.close()
+
+
+def test_archive_windows_and_tile_cache(tmp_path):
+    path = str(tmp_path / "matrix.dat")
+    matrix = new_matrix((30, 25), np.int32, path)
+    matrix[:] = np.arange(30 * 25).reshape(30, 25)
+    save_archive(str(tmp_path / "archive.npz"), matrix, "A" * 29, "C" * 24, [(0, 0), (1, 1)], ("A", "C"), tile=7)
+    archive = MatrixArchive(str(tmp_path / "archive.npz"), cached_tiles=2)
+    assert archive.traceback == [(0, 0), (1, 1)] and archive.dtype == np.int32
+    for rows, cols in ((slice(3, 17), slice(5, 6)), (slice(None), slice(20, None)), (slice(-4, None), slice(0, 25)),
+                       (slice(5, 5), slice(None))):
+        assert (archive[rows, cols] == matrix[rows, cols]).all()
+    loads = archive.loads
+    archive[0:7, 0:7]
+    archive[0:7, 0:7]
+    assert archive.loads == loads + 1  # The second read comes from the cache
+    with pytest.raises(ValueError):
+        archive[::2, :]
+    with pytest.raises(TypeError):
+        archive[3]
+    archive.close()
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from banded import banded_needleman_wunsch, outside_bound
+from needleman_wunsch import needleman_wunsch_algorithm
+from reference import check_alignment, random_pairs, reference_score
+from scoring import alignment_score
+
+SCORINGS = [(1, -1, -2), (2, -1, -1), (3, -2, -4), (1, 0, 1), (-1, -2, -1)]
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("scoring", SCORINGS)
+def test_banded_is_optimal(seed, scoring):
+    for seq1, seq2 in random_pairs(100 + seed, 20, low=0, high=30):
+        expected = reference_score(seq1, seq2, *scoring)
+        for band in (None, 0, 1, 3):
+            aligned_1, aligned_2, score = banded_needleman_wunsch(seq1, seq2, *scoring, band=band)
+            check_alignment(seq1, seq2, aligned_1, aligned_2)
+            assert score == alignment_score(aligned_1, aligned_2, *scoring) == expected
+
+
+def test_path_out_of_the_band_scores_higher():
+    # The best path in a narrow band goes along its edge with score 12, the optimal one leaves the band
+    seq1, seq2 = "CAGGCGTGCCAGGACTCCACCTCC", "CCTGCTAAGTTGACCTTGAGCTCG"
+    for band in (0, 1):
+        aligned_1, aligned_2, score = banded_needleman_wunsch(seq1, seq2, 2, -1, -1, band=band)
+        check_alignment(seq1, seq2, aligned_1, aligned_2)
+        assert score == alignment_score(aligned_1, aligned_2, 2, -1, -1) == 17
+
+
+def test_near_identical_sequences():
+    generator = random.Random(15)
+    seq1 = "".join(generator.choice("ACGT") for _ in range(400))
+    seq2 = list(seq1)
+    for _ in range(6):
+        seq2[generator.randrange(len(seq2))] = generator.choice("ACGT")
+    seq2 = "".join(seq2[:100] + seq2[102:300] + ["GA"] + seq2[300:])
+    aligned_1, aligned_2, score = banded_needleman_wunsch(seq1, seq2, 1, -1, -2)
+    check_alignment(seq1, seq2, aligned_1, aligned_2)
+    assert score == needleman_wunsch_algorithm(seq1, seq2, 1, -1, -2, engine="wavefront", score_only=True)
+    # The default band is already proven optimal, it is not widened
+    assert outside_bound(len(seq1), len(seq2), 16, 1, -2) < score
+
+
+def test_band_covering_the_matrix_has_no_bound():
+    assert outside_bound(5, 7, 7, 1, -2) is None
+    assert outside_bound(0, 3, 3, 1, -2) is None
+    assert outside_bound(10, 10, 2, 1, -2) == (20 - 6) // 2 - 12
@@ -0,0 +1,33 @@
+import pytest
+
+from batch import align_batch, align_packed
+from needleman_wunsch import needleman_wunsch_algorithm
+from reference import PROTEIN, check_alignment, random_pairs, reference_score
+from scoring import alignment_score
+from smith_waterman import smith_waterman_algorithm
+
+
+@pytest.mark.parametrize("local", [False, True])
+def test_align_packed(local):
+    pairs = random_pairs(8, 60, low=0, high=30) + [("", ""), ("ACGT", ""), ("", "A")]
+    results = align_packed(pairs, 2, -1, -2, local=local)
+    scores = align_packed(pairs, 2, -1, -2, local=local, score_only=True)
+    algorithm = smith_waterman_algorithm if local else needleman_wunsch_algorithm
+    for (seq1, seq2), (aligned_1, aligned_2, score), score_only in zip(pairs, results, scores):
+        expected = reference_score(seq1, seq2, 2, -1, -2, local)
+        assert score == score_only == expected
+        check_alignment(seq1, seq2, aligned_1, aligned_2, local)
+        assert alignment_score(aligned_1, aligned_2, 2, -1, -2) == expected
+        if seq1 and seq2:
+            assert (aligned_1, aligned_2) == algorithm(seq1, seq2, 2, -1, -2, engine="wavefront")[:2]
+
+
+def test_align_batch_with_substitution_matrix():
+    pairs = random_pairs(9, 30, alphabet=PROTEIN)
+    for algorithm, local in (("nw", False), ("sw", True)):
+        for (seq1, seq2), (aligned_1, aligned_2, score) in zip(pairs, align_batch(pairs, algorithm, 1, -1, -8,
+                                                                                      "BLOSUM62")):
+            check_alignment(seq1, seq2, aligned_1, aligned_2, local)
+            assert score == reference_score(seq1, seq2, 1, -1, -8, local, "BLOSUM62")
+    with pytest.raises(ValueError):
+        align_batch(pairs, "xx", 1, -1, -2)
@@ -0,0 +1,16 @@
+import json
+
+from benchmark import main
+
+
+def test_benchmark_output_and_comparison(tmp_path, capsys):
+    arguments = ["--lengths", "12", "--identities", "0.8", "--alphabets", "dna", "--repeat", "1"]
+    old, new = str(tmp_path / "old.json"), str(tmp_path / "new.json")
+    assert main(arguments + ["--output", old]) == 0
+    assert main(arguments + ["--output", new, "--compare", old]) == 0
+
+    with open(new) as file:
+        results = json.load(file)["results"]
+    assert results and all(result["correct"] is True for result in results)
+    assert all(result["phases"]["filling"]["peak_bytes"] >= 0 for result in results)
+    assert len(capsys.readouterr().err.splitlines()) == 3 * len(results)
@@ -0,0 +1,32 @@
+from cache import AlignmentCache
+from reference import reference_score
+
+
+def test_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = AlignmentCache(path)
+    first = cache.align("nw", "ACGTTGCA", "ACTTGA", 1, -1, -2)
+    assert first.score == reference_score("ACGTTGCA", "ACTTGA", 1, -1, -2)
+    assert cache.align("nw", "ACGTTGCA", "ACTTGA", 1, -1, -2) == first
+    assert cache.hits == 1 and cache.misses == 1
+    cache.close()
+
+    reopened = AlignmentCache(path)
+    assert reopened.align("nw", "ACGTTGCA", "ACTTGA", 1, -1, -2)[:3] == first[:3]
+    assert reopened.disk_hits == 1
+    assert reopened.align("sw", "ACGTTGCA", "ACTTGA", 1, -1, -2).score == \
+        reference_score("ACGTTGCA", "ACTTGA", 1, -1, -2, local=True)
+    reopened.close()
+
+
+def test_lru_and_options():
+    cache = AlignmentCache(maxsize=2, store_matrix=True)
+    first = cache.align("nw", "ACGT", "AGT", 1, -1, -2, engine="python")
+    assert first.matrix is not None and first.matrix[-1, -1] == first.score
+    cache.align("nw", "ACGT", "AGT", 1, -1, -2, gap_open=-3, gap_extend=-1)
+    cache.align("sw", "ACGT", "AGT", 1, -1, -2, substitution="BLOSUM62")
+    assert cache.stats()["size"] == 2 and cache.misses == 3
+    # The least recently used result was dropped, a key differs with every option
+    cache.align("nw", "ACGT", "AGT", 1, -1, -2, engine="python")
+    assert cache.misses == 4 and cache.hits == 0
+    assert cache.key("nw", "A", "A", 1, -1, -2, substitution="BLOSUM62") != cache.key("nw", "A", "A", 1, -1, -2)
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from cli import main
+from reference import check_alignment, random_pairs, reference_score
+
+
+def _write_fasta(path, records):
+    """
+    Function writing the records into a FASTA file.
+    :return: (str) Path of the file.
+    """
+    with open(path, "w") as file:
+        for name, sequence in records:
+            file.write(f">{name}\n{sequence}\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+@pytest.mark.parametrize("algorithm", ["nw", "sw"])
+def test_pairs_round_trip(tmp_path, capsys, jobs, algorithm):
+    pairs = random_pairs(13, 20, high=25)
+    path = tmp_path / "pairs.tsv"
+    path.write_text("# comment\n" + "".join(f"{seq1}\t{seq2}\n" for seq1, seq2 in pairs))
+
+    assert main(["--pairs", str(path), "--algorithm", algorithm, "--format", "json", "--jobs", jobs]) == 0
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(results) == len(pairs)
+    for (seq1, seq2), result in zip(pairs, results):
+        check_alignment(seq1, seq2, result["aligned_1"], result["aligned_2"], local=algorithm == "sw")
+        assert result["score"] == reference_score(seq1, seq2, 1, -1, -2, local=algorithm == "sw")
+
+
+def test_fasta_round_trip(tmp_path, capsys):
+    pairs = random_pairs(14, 6)
+    first = _write_fasta(tmp_path / "first.fasta", [(f"a{number}", seq1) for number, (seq1, _) in enumerate(pairs)])
+    second = _write_fasta(tmp_path / "second.fasta", [(f"b{number}", seq2) for number, (_, seq2) in enumerate(pairs)])
+
+    assert main(["--fasta", first, second, "--score-only"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "name1\tname2\tscore"
+    assert lines[1:] == [f"a{number}\tb{number}\t{reference_score(seq1, seq2, 1, -1, -2)}"
+                         for number, (seq1, seq2) in enumerate(pairs)]
+
+
+def test_unpaired_fasta_records(tmp_path, capsys):
+    odd = _write_fasta(tmp_path / "odd.fasta", [("a", "ACGT"), ("b", "AGT"), ("c", "AAA")])
+    one = _write_fasta(tmp_path / "one.fasta", [("x", "ACG")])
+    for arguments in ([odd], [odd, one], [one, odd]):
+        with pytest.raises(SystemExit) as exit_info:
+            main(["--fasta", *arguments])
+        assert exit_info.value.code == 2
+        assert "has no pair" in capsys.readouterr().err
+
+
+def test_invalid_pair_is_reported(tmp_path, capsys):
+    path = tmp_path / "pairs.tsv"
+    path.write_text("ACGT\tAC1\nACGT\tACT\n")
+    assert main(["--pairs", str(path)]) == 1
+    captured = capsys.readouterr()
+    assert "1.1\t1.2" in captured.err and captured.out.splitlines()[1].startswith("2.1\t2.2\t")
@@ -0,0 +1,19 @@
+import pytest
+
+from database import search_database
+from reference import check_alignment, reference_score, write_targets
+from scoring import alignment_score
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_search_database(tmp_path, jobs):
+    path = str(tmp_path / "targets.fasta")
+    targets = write_targets(path, 20, 6)
+    query = targets[7][30:70]
+    hits = search_database(query, path, 2, -3, -5, top_n=5, jobs=jobs, chunk_size=3)
+    expected = sorted((reference_score(query, target, 2, -3, -5, local=True) for target in targets), reverse=True)
+    assert [score for score, _, _, _ in hits] == expected[:5]
+    assert hits[0][1] == "target7" and hits[0][2] == query
+    for score, name, aligned_query, aligned_target in hits:
+        check_alignment(query, targets[int(name[6:])], aligned_query, aligned_target, local=True)
+        assert alignment_score(aligned_query, aligned_target, 2, -3, -5) == score
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from needleman_wunsch import ENGINES as NW_ENGINES, needleman_wunsch_algorithm
+from reference import check_alignment, random_pairs, reference_score
+from scoring import alignment_score, score_matrix
+from smith_waterman import ENGINES as SW_ENGINES, smith_waterman_algorithm
+from wavefront import wavefront_fill
+
+PAIRS = random_pairs(1, 40) + [("A", "A"), ("A", "C"), ("ACGT", "T")]
+SCORINGS = [(1, -1, -2), (2, -1, -1), (3, -2, -4)]
+
+
+@pytest.mark.parametrize("engine", NW_ENGINES)
+@pytest.mark.parametrize("scoring", SCORINGS)
+def test_needleman_wunsch_engines(engine, scoring):
+    for seq1, seq2 in PAIRS:
+        aligned_1, aligned_2, _ = needleman_wunsch_algorithm(seq1, seq2, *scoring, engine=engine)
+        check_alignment(seq1, seq2, aligned_1, aligned_2)
+        assert alignment_score(aligned_1, aligned_2, *scoring) == reference_score(seq1, seq2, *scoring)
+
+
+@pytest.mark.parametrize("engine", SW_ENGINES)
+@pytest.mark.parametrize("scoring", SCORINGS)
+def test_smith_waterman_engines(engine, scoring):
+    for seq1, seq2 in PAIRS:
+        aligned_1, aligned_2, _ = smith_waterman_algorithm(seq1, seq2, *scoring, engine=engine)
+        check_alignment(seq1, seq2, aligned_1, aligned_2, local=True)
+        assert alignment_score(aligned_1, aligned_2, *scoring) == reference_score(seq1, seq2, *scoring, local=True)
+
+
+@pytest.mark.parametrize("local", [False, True])
+def test_wavefront_fills_the_matrix_of_the_python_engine(local):
+    algorithm = smith_waterman_algorithm if local else needleman_wunsch_algorithm
+    for seq1, seq2 in PAIRS:
+        expected = algorithm(seq1, seq2, 2, -1, -2)[2].matrix
+        matrix = np.zeros(expected.shape, dtype=expected.dtype)
+        if not local:
+            matrix[:, 0] = np.arange(len(seq1) + 1) * -2
+            matrix[0, :] = np.arange(len(seq2) + 1) * -2
+        for match_matrix in (score_matrix(seq1, seq2, 2, -1), score_matrix(seq1, seq2, 2, -1, profile=True)):
+            assert (wavefront_fill(matrix.copy(), match_matrix, -2, local) == expected).all()
+
+
+@pytest.mark.parametrize("engine", SW_ENGINES)
+def test_smith_waterman_score_only(engine):
+    for seq1, seq2 in PAIRS:
+        score = smith_waterman_algorithm(seq1, seq2, 2, -1, -2, engine=engine, score_only=True)
+        assert score == reference_score(seq1, seq2, 2, -1, -2, local=True)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from frames import FrameRecorder, MOVE_DIAG, MOVE_NONE
+from needleman_wunsch import needleman_wunsch_algorithm
+from smith_waterman import smith_waterman_algorithm
+
+
+def _snapshots(recorder, initial):
+    """
+    Function replaying the steps of the recorder on a copy of the initial matrix.
+    :return: (list of numpy arrays) Matrix after every step.
+    """
+    frame, snapshots = initial.copy(), []
+    for index in range(len(recorder)):
+        row, col, value, _ = recorder.step(index)
+        frame[row, col] = value
+        snapshots.append(frame.copy())
+    return snapshots
+
+
+@pytest.mark.parametrize("keyframe_interval", [None, 1, 7])
+def test_frames_of_the_recorder(keyframe_interval):
+    matrix = np.zeros((3, 4), dtype=np.int32)
+    recorder = FrameRecorder(matrix, keyframe_interval)
+    for number, (row, col) in enumerate([(0, 0), (1, 2), (2, 3), (1, 2), (0, 1)] * 3):
+        recorder.set(row, col, number - 5, MOVE_DIAG if number % 2 else MOVE_NONE)
+
+    expected = _snapshots(recorder, np.zeros((3, 4), dtype=np.int32))
+    assert len(recorder) == 15 and recorder.step(1) == (1, 2, -4, MOVE_DIAG)
+    assert all((recorder[index] == frame).all() for index, frame in enumerate(expected))
+    assert all((frame == expected[index]).all() for index, frame in enumerate(recorder))
+    assert (recorder[-1] == matrix).all() and (recorder[-15] == expected[0]).all()
+    with pytest.raises(IndexError):
+        recorder[15]
+    with pytest.raises(TypeError):
+        recorder[1.0]
+
+
+@pytest.mark.parametrize("algorithm", [needleman_wunsch_algorithm, smith_waterman_algorithm])
+@pytest.mark.parametrize("keyframe_interval", [None, 10])
+def test_frames_of_the_python_engine(algorithm, keyframe_interval):
+    seq1, seq2 = "ACGTTGCA", "ACTTGA"
+    frames = algorithm(seq1, seq2, 1, -1, -2, keyframe_interval)[2]
+    assert len(frames) >= len(seq1) * len(seq2)
+    # Every frame differs from the previous one only in the cell of its step
+    previous = frames[0]
+    for index, frame in enumerate(frames):
+        row, col, value, _ = frames.step(index)
+        assert frame[row, col] == value
+        changed = frame != previous
+        changed[row, col] = False
+        assert not changed.any()
+        previous = frame
+    assert (frames[-1] == frames.matrix).all()
@@ -0,0 +1,39 @@
+import pytest
+
+from gotoh import gotoh_algorithm
+from needleman_wunsch import needleman_wunsch_algorithm
+from reference import PROTEIN, check_alignment, random_pairs, reference_affine_score
+from scoring import alignment_score
+from smith_waterman import smith_waterman_algorithm
+
+PAIRS = random_pairs(1, 40) + [("A", "A"), ("A", "C"), ("ACGT", "T")]
+
+
+@pytest.mark.parametrize("local", [False, True])
+@pytest.mark.parametrize("gaps", [(-3, -1), (-5, -2), (-2, -2)])
+def test_gotoh(local, gaps):
+    for seq1, seq2 in PAIRS:
+        aligned_1, aligned_2, score = gotoh_algorithm(seq1, seq2, 2, -1, *gaps, local=local)
+        check_alignment(seq1, seq2, aligned_1, aligned_2, local)
+        expected = reference_affine_score(seq1, seq2, 2, -1, *gaps, local=local)
+        assert score == expected
+        assert alignment_score(aligned_1, aligned_2, 2, -1, 0, gap_open=gaps[0], gap_extend=gaps[1]) == expected
+
+
+@pytest.mark.parametrize("engine", ["python", "wavefront"])
+def test_affine_gaps_of_needleman_wunsch(engine):
+    for seq1, seq2 in PAIRS:
+        aligned_1, aligned_2, _ = needleman_wunsch_algorithm(seq1, seq2, 2, -1, -2, engine=engine, gap_open=-4,
+                                                             gap_extend=-1)
+        check_alignment(seq1, seq2, aligned_1, aligned_2)
+        assert alignment_score(aligned_1, aligned_2, 2, -1, -2, gap_open=-4, gap_extend=-1) == \
+            reference_affine_score(seq1, seq2, 2, -1, -4, -1)
+
+
+def test_affine_gaps_of_smith_waterman_with_substitution_matrix():
+    for seq1, seq2 in random_pairs(18, 15, alphabet=PROTEIN):
+        aligned_1, aligned_2, _ = smith_waterman_algorithm(seq1, seq2, 1, -1, -2, substitution="BLOSUM62",
+                                                           gap_open=-10, gap_extend=-1)
+        check_alignment(seq1, seq2, aligned_1, aligned_2, local=True)
+        assert alignment_score(aligned_1, aligned_2, 1, -1, -2, "BLOSUM62", gap_open=-10, gap_extend=-1) == \
+            reference_affine_score(seq1, seq2, 1, -1, -10, -1, local=True, substitution="BLOSUM62")
@@ -0,0 +1,34 @@
+import pytest
+
+from hirschberg import hirschberg_algorithm, needleman_wunsch_score
+from needleman_wunsch import needleman_wunsch_algorithm
+from reference import PROTEIN, check_alignment, random_pairs, reference_score
+from scoring import alignment_score
+
+PAIRS = random_pairs(3, 30, low=0, high=40) + [("A", "A"), ("ACGT", "T")]
+
+
+@pytest.mark.parametrize("scoring", [(1, -1, -2), (2, -1, -1), (1, 0, 1)])
+def test_hirschberg(scoring):
+    for seq1, seq2 in PAIRS:
+        aligned_1, aligned_2 = hirschberg_algorithm(seq1, seq2, *scoring)
+        check_alignment(seq1, seq2, aligned_1, aligned_2)
+        expected = reference_score(seq1, seq2, *scoring)
+        assert alignment_score(aligned_1, aligned_2, *scoring) == needleman_wunsch_score(seq1, seq2, *scoring) == \
+            expected
+
+
+def test_hirschberg_of_long_sequences():
+    seq1, seq2 = random_pairs(16, 1, low=700, high=900, alphabet=PROTEIN)[0]
+    aligned_1, aligned_2 = hirschberg_algorithm(seq1, seq2, 1, -1, -8, "BLOSUM62")
+    check_alignment(seq1, seq2, aligned_1, aligned_2)
+    expected = needleman_wunsch_algorithm(seq1, seq2, 1, -1, -8, engine="wavefront", substitution="BLOSUM62")[:2]
+    assert alignment_score(aligned_1, aligned_2, 1, -1, -8, "BLOSUM62") == \
+        alignment_score(*expected, 1, -1, -8, "BLOSUM62")
+
+
+@pytest.mark.parametrize("engine", ["python", "wavefront", "hirschberg", "tiled"])
+def test_needleman_wunsch_score_only(engine):
+    for seq1, seq2 in PAIRS:
+        score = needleman_wunsch_algorithm(seq1, seq2, 2, -1, -2, engine=engine, score_only=True)
+        assert score == reference_score(seq1, seq2, 2, -1, -2)
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from incremental import IncrementalAligner
+from reference import check_alignment, reference_score
+from scoring import alignment_score
+
+
+@pytest.mark.parametrize("local", [False, True])
+def test_incremental_aligner(local):
+    generator = random.Random(10)
+    aligner = IncrementalAligner(2, -1, -2, local=local)
+    seq1, seq2 = "ACGTACGT", "ACGGT"
+    for _ in range(60):
+        # Typing, deleting and replacing chars in either sequence
+        edit = generator.randrange(3)
+        position = generator.randint(0, len(seq1))
+        if edit == 0 or len(seq1) < 2:
+            seq1 = seq1[:position] + generator.choice("ACGT") + seq1[position:]
+        elif edit == 1:
+            seq1 = seq1[:position] + seq1[position + 1:]
+        else:
+            seq1, seq2 = seq2, seq1 + generator.choice("ACGT")
+        aligned_1, aligned_2, score = aligner.align(seq1, seq2)
+        check_alignment(seq1, seq2, aligned_1, aligned_2, local)
+        assert score == alignment_score(aligned_1, aligned_2, 2, -1, -2) == \
+            reference_score(seq1, seq2, 2, -1, -2, local)
+
+
+def test_typing_computes_only_the_new_cells():
+    aligner = IncrementalAligner(1, -1, -2)
+    seq2 = "ACGTTGCAAC"
+    aligner.align("ACGTACGT", seq2)
+    aligner.align("ACGTACGTA", seq2)
+    assert aligner.computed_cells == len(seq2)  # One new row
+    aligner.align("ACGTACGTA", seq2 + "G")
+    assert aligner.computed_cells == 9  # One new column
+    aligner.align("ACGTACGTA", seq2 + "G")
+    assert aligner.computed_cells == 0
+    aligner.align("TCGTACGTA", seq2 + "G")
+    assert aligner.computed_cells == 9 * 11  # A change at the start recomputes everything
@@ -0,0 +1,41 @@
+import pytest
+
+import needleman_wunsch
+import smith_waterman
+from instrumentation import instrument, phase
+from needleman_wunsch import needleman_wunsch_algorithm
+
+
+def test_nested_phases_keep_their_peaks():
+    with instrument(memory=True) as instrumentation:
+        with phase("outer"):
+            data = bytearray(1 << 20)
+            with phase("inner"):
+                pass
+            del data
+    assert instrumentation.phases["outer"]["peak_bytes"] >= 1 << 20
+    assert instrumentation.phases["inner"]["peak_bytes"] < 1 << 20
+
+
+def test_phases_of_the_algorithm():
+    with instrument() as instrumentation:
+        needleman_wunsch_algorithm("ACGTTGCA", "ACTTGA", 1, -1, -2, engine="wavefront")
+    assert list(instrumentation.phases) == ["match_matrix", "initialization", "filling", "traceback"]
+    assert instrumentation.phases["filling"]["cells"] == 48
+    with phase("filling"):  # Disabled out of the block
+        pass
+    assert instrumentation.phases["filling"]["calls"] == 1
+
+
+@pytest.mark.parametrize("module", [needleman_wunsch, smith_waterman])
+def test_phases_of_the_steps(module):
+    with instrument(memory=True) as instrumentation:
+        steps = module.iter_steps("ACGTTGCA", "ACTTGA", 1, -1, -2)
+        frames = {}
+        for step in steps:
+            frames[step.phase] = frames.get(step.phase, 0) + 1
+    phases = instrumentation.phases
+    assert list(phases)[0] == "match_matrix" and phases["match_matrix"]["frames"] == 0
+    assert phases["filling"]["cells"] == phases["filling"]["frames"] == frames["filling"] == 48
+    assert phases["traceback"]["frames"] == frames["traceback"]
+    assert all(stats["peak_bytes"] is not None for stats in phases.values())
@@ -0,0 +1,37 @@
+import pytest
+
+from kmer_index import KmerIndex, build_index
+from reference import check_alignment, reference_score, write_targets
+from scoring import alignment_score
+
+
+def test_kmer_index_finds_the_source_of_the_query(tmp_path):
+    path = str(tmp_path / "targets.fasta")
+    targets = write_targets(path, 30, 7)
+    build_index(path, str(tmp_path / "index"), k=7)
+    index = KmerIndex(str(tmp_path / "index"))
+    assert len(index) == 30
+
+    for number in (0, 11, 29):
+        query = targets[number][20:60]
+        hits = index.search(query, 2, -3, -5, top_n=3)
+        score, name, aligned_query, aligned_target = hits[0]
+        assert name == f"target{number}"
+        assert score == reference_score(query, targets[number], 2, -3, -5, local=True)
+        check_alignment(query, targets[number], aligned_query, aligned_target, local=True)
+        for score, name, aligned_query, aligned_target in hits:
+            # The band can only miss a better alignment, never report a score higher than the optimal one
+            assert alignment_score(aligned_query, aligned_target, 2, -3, -5) == score
+            assert score <= reference_score(query, targets[int(name[6:])], 2, -3, -5, local=True)
+
+
+def test_kmer_index_keeps_the_targets(tmp_path):
+    path = str(tmp_path / "targets.fasta")
+    targets = write_targets(path, 5, 8)
+    build_index(path, str(tmp_path / "index"), k=5)
+    index = KmerIndex(str(tmp_path / "index"))
+    assert [index.sequence(number) for number in range(len(index))] == targets
+    assert index.names == [f"target{number}" for number in range(5)] and index.k == 5
+    assert index.search("TTTT", 2, -3, -5) == []  # Shorter than a k-mer, no seeds
+    with pytest.raises(ValueError):
+        build_index(path, str(tmp_path / "other"), k=0)
@@ -0,0 +1,44 @@
+import numpy as np
+
+from frames import MOVE_DIAG, MOVE_LEFT, MOVE_UP
+from needleman_wunsch import needleman_wunsch_algorithm
+from pointers import new_pointer_matrix, pointer_path, pointer_traceback
+from reference import random_pairs
+from scoring import score_dtype, score_matrix
+from wavefront import wavefront_fill
+
+
+def test_score_dtype():
+    scores = np.array([[2, -1], [-1, 2]])
+    assert score_dtype(100, 100, scores, -2) == np.int16
+    assert score_dtype(20000, 20000, scores, -2) == np.int32
+    assert score_dtype(100, 100, scores, -400) == np.int32
+    assert score_dtype(2 ** 31, 2 ** 31, scores, -2) == np.int64
+    assert needleman_wunsch_algorithm("ACGT", "AGT", 1, -1, -2)[2].matrix.dtype == np.int16
+
+
+def test_pointers_record_every_optimal_move():
+    for seq1, seq2 in random_pairs(17, 20, high=15):
+        pointers = new_pointer_matrix(len(seq1) + 1, len(seq2) + 1)
+        assert (pointers[1:, 0] == MOVE_UP).all() and (pointers[0, 1:] == MOVE_LEFT).all() and pointers[0, 0] == 0
+        matrix = np.zeros((len(seq1) + 1, len(seq2) + 1), dtype=score_dtype(len(seq1), len(seq2), np.ones(1), -2))
+        matrix[:, 0] = np.arange(len(seq1) + 1) * -2
+        matrix[0, :] = np.arange(len(seq2) + 1) * -2
+        scores = score_matrix(seq1, seq2, 1, -1)
+        wavefront_fill(matrix, scores, -2, pointers=pointers)
+
+        for x in range(1, len(seq1) + 1):
+            for y in range(1, len(seq2) + 1):
+                moves = (MOVE_DIAG * (matrix[x - 1, y - 1] + scores[x - 1, y - 1] == matrix[x, y]) +
+                         MOVE_UP * (matrix[x - 1, y] - 2 == matrix[x, y]) +
+                         MOVE_LEFT * (matrix[x, y - 1] - 2 == matrix[x, y]))
+                assert pointers[x, y] == moves
+
+
+def test_traceback_prefers_the_diagonal():
+    pointers = new_pointer_matrix(3, 3)
+    pointers[1:, 1:] = [[MOVE_DIAG, MOVE_LEFT], [MOVE_UP, MOVE_DIAG | MOVE_UP | MOVE_LEFT]]
+    assert [(x, y) for x, y, _ in pointer_path(pointers, 2, 2)] == [(2, 2), (1, 1), (0, 0)]
+    assert pointer_traceback("AC", "GC", pointers, 2, 2) == ("AC", "GC", 0, 0)
+    pointers[2, 2] = MOVE_UP | MOVE_LEFT  # Up before left
+    assert pointer_traceback("AC", "GC", pointers, 2, 2) == ("A-C", "GC-", 0, 0)
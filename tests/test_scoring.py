@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from needleman_wunsch import needleman_wunsch_algorithm
+from reference import PROTEIN, check_alignment, random_pairs, reference_score
+from scoring import SubstitutionMatrix, alignment_score, load_substitution_matrix, score_matrix
+from smith_waterman import smith_waterman_algorithm
+
+
+def test_match_matrix():
+    seq1, seq2 = "ACGTTA", "TTGCA"
+    expected = np.array([[2 if a == b else -1 for b in seq2] for a in seq1])
+    assert (score_matrix(seq1, seq2, 2, -1) == expected).all()
+    profile = score_matrix(seq1, seq2, 2, -1, profile=True)
+    assert profile.shape == expected.shape
+    assert all((profile[x] == expected[x]).all() for x in range(len(seq1)))
+    assert (profile[np.array([0, 5]), np.array([4, 0])] == expected[[0, 5], [4, 0]]).all()
+
+
+def test_substitution_matrix_lookup():
+    blosum = load_substitution_matrix("blosum62")
+    assert blosum.name == "BLOSUM62"
+    matrix = score_matrix("HEAGAWGHEE", "pawheae", 0, 0, blosum)
+    assert matrix[0, 3] == blosum.scores[blosum.alphabet.index("H"), blosum.alphabet.index("H")] == 8
+    assert "w" in blosum and "J" not in blosum and "AW" not in blosum
+    with pytest.raises(ValueError, match="JO"):
+        blosum.encode("AJOA")
+    with pytest.raises(ValueError):
+        load_substitution_matrix("NOT_A_MATRIX")
+    with pytest.raises(ValueError):
+        SubstitutionMatrix("AB", [[1, 0], [0, 1], [0, 0]])
+
+
+@pytest.mark.parametrize("local", [False, True])
+def test_substitution_matrix(local):
+    algorithm = smith_waterman_algorithm if local else needleman_wunsch_algorithm
+    for seq1, seq2 in random_pairs(2, 20, alphabet=PROTEIN):
+        aligned_1, aligned_2, _ = algorithm(seq1, seq2, 1, -1, -8, engine="wavefront", substitution="BLOSUM62")
+        check_alignment(seq1, seq2, aligned_1, aligned_2, local)
+        assert alignment_score(aligned_1, aligned_2, 1, -1, -8, "BLOSUM62") == \
+            reference_score(seq1, seq2, 1, -1, -8, local, "BLOSUM62")
@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from reference import random_pairs, reference_score
+from scoring import alignment_score
+from server import MAX_LENGTH, AlignmentServer
+
+
+async def _request(port, method, path, body=b""):
+    """
+    Sends one HTTP request on a new connection closed by the server.
+    :return: (tuple of int, dict) HTTP status and the response.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    head, _, payload = (await asyncio.wait_for(reader.read(), 30)).partition(b"\r\n\r\n")
+    writer.close()
+    return int(head.split()[1]), json.loads(payload)
+
+
+def _serve(test, **options):
+    """
+    Runs the test coroutine against a server listening on a free port.
+    :return: Result of the test.
+    """
+    async def run():
+        server = AlignmentServer(**options)
+        await server.start("127.0.0.1", 0)
+        try:
+            return await test(server, server.servers[0].sockets[0].getsockname()[1])
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+def test_concurrent_alignments():
+    pairs = random_pairs(12, 40, high=30)
+
+    async def test(server, port):
+        requests = [{"seq1": seq1, "seq2": seq2, "algorithm": "sw" if number % 2 else "nw", "match": 2}
+                    for number, (seq1, seq2) in enumerate(pairs)]
+        responses = await asyncio.gather(*(_request(port, "POST", "/align", json.dumps(request).encode())
+                                           for request in requests))
+        return responses, server.metrics()
+
+    responses, metrics = _serve(test, jobs=2, batch_delay=0.01)
+    for number, ((seq1, seq2), (status, response)) in enumerate(zip(pairs, responses)):
+        assert status == 200
+        expected = reference_score(seq1, seq2, 2, -1, -2, local=number % 2 == 1)
+        assert response["score"] == alignment_score(response["aligned_1"], response["aligned_2"], 2, -1, -2) == expected
+    assert metrics["aligned"] == len(pairs) and metrics["errors"] == 0 and metrics["latency_ms"]["p99"] > 0
+
+
+def test_bad_requests_fail_alone():
+    async def test(server, port):
+        bad = [{"seq1": "JJJ", "seq2": "AW", "substitution": "BLOSUM62"}, {"seq1": "A1", "seq2": "A"},
+               {"seq1": "A" * (MAX_LENGTH + 1), "seq2": "A"}, {"seq1": "A", "seq2": "A", "substitution": "/etc/passwd"},
+               {"seq1": "A", "seq2": "A", "algorithm": "xx"}]
+        good = {"seq1": "HEAGAWGHEE", "seq2": "PAWHEAE", "algorithm": "sw", "substitution": "blosum62", "gap": -8}
+        responses = await asyncio.gather(*(_request(port, "POST", "/align", json.dumps(body).encode())
+                                           for body in bad + [good]))
+        return responses + [await _request(port, "POST", "/align", b"{bad"), await _request(port, "GET", "/align"),
+                            await _request(port, "GET", "/nope"), await _request(port, "GET", "/metrics")]
+
+    responses = _serve(test, jobs=1, batch_delay=0.05)
+    assert [status for status, _ in responses] == [400] * 5 + [200, 400, 405, 404, 200]
+    assert responses[5][1] == {"aligned_1": "AWGHE", "aligned_2": "AW-HE", "score": 20}
+    assert responses[-1][1]["errors"] == 6 and responses[-1][1]["aligned"] == 1
+
+
+def test_full_queue_is_rejected():
+    async def test(server, port):
+        body = json.dumps({"seq1": "ACGT" * 300, "seq2": "AGCT" * 300}).encode()
+        return await asyncio.gather(*(_request(port, "POST", "/align", body) for _ in range(20)))
+
+    statuses = [status for status, _ in _serve(test, jobs=1, batch_size=1, batch_delay=0, queue_size=2)]
+    assert statuses.count(200) >= 2 and statuses.count(503) >= 1 and statuses.count(200) + statuses.count(503) == 20
+
+
+def test_unknown_substitution_lists_the_matrices():
+    async def test(server, port):
+        body = json.dumps({"seq1": "A", "seq2": "A", "substitution": "BLOSUM99"}).encode()
+        return await _request(port, "POST", "/align", body), server.matrix_names
+
+    (status, response), names = _serve(test, jobs=1)
+    assert status == 400 and "BLOSUM62" in names and "PAM250" in names
+    assert all(name in response["error"] for name in names)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import needleman_wunsch
+import smith_waterman
+from frames import PHASE_FILLING, PHASE_INITIALIZATION, PHASE_TRACEBACK
+
+SEQ1, SEQ2 = "ACGTTGCA", "ACTTGA"
+
+
+@pytest.mark.parametrize("module, algorithm", [(needleman_wunsch, needleman_wunsch.needleman_wunsch_algorithm),
+                                               (smith_waterman, smith_waterman.smith_waterman_algorithm)])
+def test_steps_rebuild_the_matrix(module, algorithm):
+    aligned_1, aligned_2, frames = algorithm(SEQ1, SEQ2, 1, -1, -2)
+    steps = module.iter_steps(SEQ1, SEQ2, 1, -1, -2)
+    matrix = np.zeros_like(frames.matrix)
+    phases = []
+    while True:
+        try:
+            step = next(steps)
+        except StopIteration as stop:
+            assert stop.value == (aligned_1, aligned_2)
+            break
+        if step.phase != PHASE_TRACEBACK:
+            matrix[step.row, step.col] = step.value
+        elif phases[-1] != PHASE_TRACEBACK:
+            assert (matrix == frames.matrix).all()  # Filled before the traceback starts
+        assert step.phase == PHASE_TRACEBACK or step.value == frames.matrix[step.row, step.col]
+        phases.append(step.phase)
+
+    assert phases == sorted(phases, key=[PHASE_INITIALIZATION, PHASE_FILLING, PHASE_TRACEBACK].index)
+    assert phases.count(PHASE_FILLING) == len(SEQ1) * len(SEQ2)
+
+
+def test_steps_are_computed_lazily():
+    steps = needleman_wunsch.iter_steps("ACGT" * 250, "ACGT" * 250, 1, -1, -2)
+    # A million cells, seconds of filling in Python - only the requested steps are computed
+    assert [next(steps).phase for _ in range(3)] == [PHASE_INITIALIZATION] * 3
+    steps.close()
+    with pytest.raises(TypeError):
+        next(needleman_wunsch.iter_steps("ACGT", 5, 1, -1, -2))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from archive import new_matrix
+from needleman_wunsch import needleman_wunsch_algorithm
+from pointers import new_pointer_matrix
+from reference import check_alignment, random_pairs, reference_score
+from scoring import score_matrix
+from tiled import tiled_fill, tiled_score
+from wavefront import wavefront_fill
+
+
+@pytest.mark.parametrize("local", [False, True])
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_tiled_matches_wavefront(local, jobs):
+    for seq1, seq2 in random_pairs(4, 6, low=20, high=60):
+        profile = score_matrix(seq1, seq2, 2, -1, profile=True)
+        filled = []
+        for fill, shared in ((wavefront_fill, False), (tiled_fill, True)):
+            matrix = new_matrix((len(seq1) + 1, len(seq2) + 1), np.int64, shared=shared)
+            pointers = new_pointer_matrix(len(seq1) + 1, len(seq2) + 1, local, shared=shared)
+            if not local:
+                matrix[:, 0] = np.arange(len(seq1) + 1) * -2
+                matrix[0, :] = np.arange(len(seq2) + 1) * -2
+            options = {"tile": 8, "jobs": jobs} if fill is tiled_fill else {}
+            fill(matrix, profile, -2, local=local, pointers=pointers, **options)
+            filled.append((np.array(matrix), np.array(pointers)))
+        assert (filled[0][0] == filled[1][0]).all() and (filled[0][1] == filled[1][1]).all()
+        assert tiled_score(seq1, seq2, 2, -1, -2, local, tile=8, jobs=jobs) == \
+            reference_score(seq1, seq2, 2, -1, -2, local)
+
+
+def test_tiled_fill_needs_shared_matrices_with_more_jobs():
+    profile = score_matrix("ACGTACGT", "ACGTTT", 1, -1, profile=True)
+    with pytest.raises(ValueError):
+        tiled_fill(np.zeros((9, 7), dtype=np.int64), profile, -2, tile=2, jobs=2)
+
+
+def test_tiled_alignment_of_a_long_pair():
+    seq1, seq2 = random_pairs(19, 1, low=300, high=400)[0]
+    aligned_1, aligned_2, _ = needleman_wunsch_algorithm(seq1, seq2, 2, -1, -2, engine="tiled")
+    check_alignment(seq1, seq2, aligned_1, aligned_2)
+    assert (aligned_1, aligned_2) == needleman_wunsch_algorithm(seq1, seq2, 2, -1, -2, engine="wavefront")[:2]
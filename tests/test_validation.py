@@ -0,0 +1,19 @@
+import pytest
+
+from validation import check_input
+
+
+@pytest.mark.parametrize("sequence", ["ACTCTACTA", "UCAG", "ACTGHUAS", "acgt", "ĄĆĘ"])
+def test_accepted_sequences(sequence):
+    assert check_input(sequence)
+
+
+# "/" and "&" were let through by the GUI before - its list of the forbidden chars missed a comma between them
+@pytest.mark.parametrize("sequence", ["", "ACTA1", "ACT.G", "A,C", "AC/GT", "AC&GT", "/&", "!!!!!ACTG444&"])
+def test_rejected_sequences(sequence):
+    assert not check_input(sequence)
+
+
+def test_sequence_needs_to_be_a_string():
+    with pytest.raises(TypeError):
+        check_input(["A", "C"])
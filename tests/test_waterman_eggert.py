@@ -0,0 +1,27 @@
+from reference import check_alignment, random_pairs, reference_score
+from scoring import alignment_score
+from smith_waterman import smith_waterman_algorithm
+from waterman_eggert import waterman_eggert
+
+
+def test_waterman_eggert():
+    for seq1, seq2 in random_pairs(5, 30, low=5, high=30):
+        alignments = waterman_eggert(seq1, seq2, 2, -1, -2, k=4)
+        assert 1 <= len(alignments) <= 4
+        assert alignments[0][2] == reference_score(seq1, seq2, 2, -1, -2, local=True)
+        assert alignments[0][:2] == smith_waterman_algorithm(seq1, seq2, 2, -1, -2, engine="wavefront")[:2]
+        scores = [score for _, _, score in alignments]
+        assert scores == sorted(scores, reverse=True)
+        for aligned_1, aligned_2, score in alignments:
+            check_alignment(seq1, seq2, aligned_1, aligned_2, local=True)
+            assert alignment_score(aligned_1, aligned_2, 2, -1, -2) == score
+
+
+def test_repeats_are_reported_once_each():
+    repeat = "GATTACAGATTACA"
+    seq1 = "CCCC" + repeat + "TTTTTT" + repeat + "CC"
+    alignments = waterman_eggert(seq1, repeat, 1, -3, -5, k=3)
+    assert [score for _, _, score in alignments[:2]] == [len(repeat)] * 2
+    assert all((aligned_1, aligned_2) == (repeat, repeat) for aligned_1, aligned_2, _ in alignments[:2])
+    assert all(score < len(repeat) for _, _, score in alignments[2:])
+    assert smith_waterman_algorithm(seq1, repeat, 1, -3, -5, top_k=3) == alignments
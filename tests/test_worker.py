@@ -0,0 +1,51 @@
+import queue
+import threading
+
+import pytest
+
+pytest.importorskip("tkinter")  # The worker lives in the module of the GUI
+
+from main import compute_alignment
+
+NW_TITLE = "Needleman-Wunsch algorithm: "
+
+
+def _run(seq1, seq2, messages, cancel, timings=False):
+    """
+    Function starting the worker thread of the GUI.
+    :return: (threading.Thread) Started worker.
+    """
+    worker = threading.Thread(target=compute_alignment, args=(NW_TITLE, seq1, seq2, 1, -1, -2, messages, cancel,
+                                                              timings), daemon=True)
+    worker.start()
+    return worker
+
+
+@pytest.mark.parametrize("timings", [False, True])
+def test_worker_streams_the_steps(timings):
+    messages, cancel = queue.Queue(maxsize=4), threading.Event()
+    worker = _run("ACGTTGCA", "ACTTGA", messages, cancel, timings)
+    received = []
+    while not received or received[-1][0] == "step":
+        received.append(messages.get(timeout=10))
+    worker.join(10)
+    assert all(message[0] == "step" for message in received[:-1]) and len(received) > 8 * 6
+    assert received[-1][:3] == ("done", "ACGTTGCA", "AC-TTG-A")
+    assert (received[-1][3] is not None) == timings
+
+
+def test_worker_stops_when_cancelled():
+    messages, cancel = queue.Queue(maxsize=4), threading.Event()
+    worker = _run("ACGT" * 50, "AGT" * 50, messages, cancel)
+    messages.get(timeout=10)
+    cancel.set()
+    worker.join(10)
+    # The worker waited for the full queue and returned instead of computing the remaining steps
+    assert not worker.is_alive() and messages.qsize() <= 4
+
+
+def test_worker_reports_errors():
+    messages, cancel = queue.Queue(maxsize=4), threading.Event()
+    _run("ACGT", 5, messages, cancel).join(10)
+    message = messages.get(timeout=10)
+    assert message[0] == "error" and "string" in message[1]
@@ -0,0 +1,230 @@
+import mmap
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from archive import new_matrix
+from rowwise import fill_row
+from scoring import QueryProfile, get_substitution_matrix
+
+# Default number of rows and columns of a tile
+TILE = 1024
+
+_tiles = None  # Arrays and parameters of the fill run by the worker process
+
+
+def _mapping(array):
+    """
+    Describes the file backing the array, for a worker process to map the same file and write the array in place.
+    :param array: (numpy memmap) Array created by archive.new_matrix with a path or shared=True.
+    :return: (tuple of str, int, tuple, str) Path of the file, offset, shape and dtype of the array.
+    """
+    # Only a whole mapping - a view of a memmap carries the offset of the memmap it was cut from
+    if not isinstance(array, np.memmap) or not isinstance(array.base, mmap.mmap):
+        raise ValueError('With more than one job the matrices need to be backed by files, see archive.new_matrix.')
+    return array.filename, array.offset, array.shape, array.dtype.str
+
+
+def _init_tiles(specs, state):
+    """
+    Initializer of a worker process, maps the shared arrays once instead of sending them with every tile.
+    :param specs: (dict) Path of the file, offset, shape and dtype of every shared array, by the key it is stored under.
+    :param state: (dict) Other arrays and parameters of the fill, sent once per worker.
+    :return: None.
+    """
+    global _tiles
+    _tiles = dict(state)
+    for key, (path, offset, shape, dtype) in specs.items():
+        _tiles[key] = np.memmap(path, dtype=dtype, mode="r+", shape=shape, offset=offset)
+
+
+def _fill_tile(i, j):
+    """
+    Fills one tile of the matrix row by row. Its top row and left column were computed by the tiles above and to the
+    left of it, the tile writes its bottom row and right column (and with a full matrix all its cells).
+    :param i: (int) Row of the tile.
+    :param j: (int) Column of the tile.
+    :return: (int) Highest value of the tile.
+    """
+    codes1, profile, gap, local = _tiles["codes1"], _tiles["profile"], _tiles["gap"], _tiles["local"]
+    r0, r1 = _tiles["row_bounds"][i], _tiles["row_bounds"][i + 1]
+    c0, c1 = _tiles["col_bounds"][j], _tiles["col_bounds"][j + 1]
+    steps = np.arange(c1 - c0 + 1, dtype=np.int64) * gap
+    matrix, pointers = _tiles.get("matrix"), _tiles.get("pointers")
+
+    if matrix is None:
+        row, left = _tiles["rows"][i, c0:c1 + 1].copy(), _tiles["cols"][r0:r1 + 1, j]
+    else:
+        row, left = matrix[r0, c0:c1 + 1].astype(np.int64), matrix[r0:r1 + 1, c0]
+    best = np.iinfo(np.int64).min
+    for x in range(r0 + 1, r1 + 1):
+        row = fill_row(row, profile[codes1[x - 1], c0:c1], gap, int(left[x - r0]), local, steps,
+                       None if pointers is None else pointers[x, c0:c1 + 1])
+        best = max(best, int(row[1:].max()))
+        if matrix is None:
+            _tiles["cols"][x, j + 1] = row[-1]
+        else:
+            matrix[x, c0 + 1:c1 + 1] = row[1:]
+    if matrix is None:
+        _tiles["rows"][i + 1, c0 + 1:c1 + 1] = row[1:]
+    return best
+
+
+def _run_tiles(count_rows, count_cols, jobs, specs, state):
+    """
+    Fills all the tiles in wavefront order - a tile is started as soon as the tiles above and to the left of it are
+    finished, so the tiles of an anti-diagonal of tiles run in parallel.
+    :param count_rows: (int) Number of rows of tiles.
+    :param count_cols: (int) Number of columns of tiles.
+    :param jobs: (int) Number of worker processes, 1 fills the tiles in this process.
+    :param specs: (dict) Shared arrays, see _init_tiles.
+    :param state: (dict) Other arrays and parameters, see _init_tiles.
+    :return: (int) Highest value of all the tiles.
+    """
+    global _tiles
+    order = [(i, d - i) for d in range(count_rows + count_cols - 1)
+             for i in range(max(0, d - count_cols + 1), min(d, count_rows - 1) + 1)]
+    if jobs == 1 or len(order) == 1:
+        previous, _tiles = _tiles, dict(state)
+        try:
+            return max(_fill_tile(i, j) for i, j in order)
+        finally:
+            _tiles = previous
+
+    best = np.iinfo(np.int64).min
+    finished = set()
+    unshared = {key: value for key, value in state.items() if key not in specs}
+    with ProcessPoolExecutor(min(jobs, count_rows, count_cols), initializer=_init_tiles,
+                             initargs=(specs, unshared)) as pool:
+        pending = {pool.submit(_fill_tile, 0, 0): (0, 0)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, j = pending.pop(future)
+                best = max(best, future.result())
+                finished.add((i, j))
+                # The tile below needs also the one to the left of it, the tile to the right also the one above it
+                if i + 1 < count_rows and (j == 0 or (i + 1, j - 1) in finished):
+                    pending[pool.submit(_fill_tile, i + 1, j)] = (i + 1, j)
+                if j + 1 < count_cols and (i == 0 or (i - 1, j + 1) in finished):
+                    pending[pool.submit(_fill_tile, i, j + 1)] = (i, j + 1)
+    return best
+
+
+def _bounds(length, tile):
+    """
+    Splits the rows or columns of the matrix (all but the first one) into tiles.
+    :param length: (int) Length of the sequence.
+    :param tile: (int) Size of a tile.
+    :return: (numpy array of int64) First row or column before every tile, ending with the length.
+    """
+    return np.append(np.arange(0, length, tile, dtype=np.int64), length)
+
+
+def _check_parameters(tile, jobs):
+    """
+    Checks the size of the tiles and the number of jobs.
+    :param tile: (int) Size of a tile.
+    :param jobs: (int or None) Number of worker processes, None for all the CPUs.
+    :return: (int) Number of worker processes.
+    """
+    if not isinstance(tile, int) or tile < 1:
+        raise ValueError('Tile size needs to be a positive integer.')
+    if jobs is not None and (not isinstance(jobs, int) or jobs < 1):
+        raise ValueError('Number of jobs needs to be a positive integer or None.')
+    return jobs or os.cpu_count() or 1
+
+
+def tiled_fill(matrix, matrix_is_match, gap, local=False, pointers=None, tile=TILE, jobs=None):
+    """
+    Function filling the matrix tile by tile in parallel worker processes. The workers map the files backing the matrix
+    and the pointer matrix and fill them in place, so they read the boundaries of the neighbouring tiles without
+    copying them, and every tile is filled row by row with NumPy. Produces the same matrix as wavefront_fill.
+    :param matrix: (numpy array) Matrix after initialization phase, first row and column are already filled. With
+    more than one job it needs to be created by archive.new_matrix with a path or shared=True, like the pointer matrix.
+    :param matrix_is_match: (QueryProfile) Lazy match matrix, sent to the workers instead of the full one.
+    :param gap: (int) Gap penalty value.
+    :param local: (bool) True clips the scores at zero like in Smith-Waterman algorithm.
+    :param pointers: (numpy array of uint8 or None) Pointer matrix of the same shape as the matrix, filled with the
+    moves giving each cell its value, None skips recording the moves.
+    :param tile: (int) Number of rows and columns of a tile.
+    :param jobs: (int or None) Number of worker processes, None uses all the CPUs, 1 fills the matrix in this process.
+    :return matrix: (numpy array) Filled matrix.
+    """
+    if not isinstance(matrix, np.ndarray) or not isinstance(matrix_is_match, QueryProfile):
+        raise TypeError('Matrix needs to be a numpy array and match matrix a QueryProfile.')
+    if not isinstance(gap, int):
+        raise TypeError('Gap penalty value needs to be an integer.')
+    jobs = _check_parameters(tile, jobs)
+    rows, cols = matrix.shape
+    if matrix_is_match.shape != (rows - 1, cols - 1):
+        raise ValueError('Match matrix needs to be one row and one column smaller than the matrix.')
+    if pointers is not None and pointers.shape != matrix.shape:
+        raise ValueError('Pointer matrix needs to be of the same shape as the matrix.')
+    if rows < 2 or cols < 2:
+        return matrix
+
+    row_bounds, col_bounds = _bounds(rows - 1, tile), _bounds(cols - 1, tile)
+    state = {"codes1": matrix_is_match.codes, "profile": matrix_is_match.profile.astype(np.int64), "gap": gap,
+             "local": local, "row_bounds": row_bounds, "col_bounds": col_bounds}
+    shared = {"matrix": matrix} if pointers is None else {"matrix": matrix, "pointers": pointers}
+    if jobs == 1 or (len(row_bounds) == 2 and len(col_bounds) == 2):
+        state.update(shared)
+        _run_tiles(len(row_bounds) - 1, len(col_bounds) - 1, 1, {}, state)
+        return matrix
+
+    specs = {key: _mapping(array) for key, array in shared.items()}
+    _run_tiles(len(row_bounds) - 1, len(col_bounds) - 1, jobs, specs, state)
+    return matrix
+
+
+def tiled_score(seq1, seq2, match, missmatch, gap, local=False, substitution=None, tile=TILE, jobs=None):
+    """
+    Function computing the score of the optimal global or local alignment tile by tile in parallel worker processes,
+    without the traceback. Only the bottom row and the right column of every tile are kept, in shared memory, so the
+    memory is O(n * m / tile) instead of O(n * m).
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param local: (bool) True for Smith-Waterman algorithm, False for Needleman-Wunsch algorithm.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :param tile: (int) Number of rows and columns of a tile.
+    :param jobs: (int or None) Number of worker processes, None uses all the CPUs, 1 computes the score in this process.
+    :return: (int) Score of the optimal alignment.
+    """
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+    jobs = _check_parameters(tile, jobs)
+
+    n, m = len(seq1), len(seq2)
+    if n == 0 or m == 0:
+        return 0 if local else (n + m) * gap
+    table = get_substitution_matrix(seq1, seq2, match, missmatch, substitution)
+    row_bounds, col_bounds = _bounds(n, tile), _bounds(m, tile)
+
+    count_rows, count_cols = len(row_bounds) - 1, len(col_bounds) - 1
+    parallel = jobs > 1 and (count_rows > 1 or count_cols > 1)
+
+    # Row at the top of every row of tiles plus the last one, column at the left of every column of tiles plus the last
+    boundary_rows = new_matrix((len(row_bounds), m + 1), np.int64, shared=parallel)
+    boundary_cols = new_matrix((n + 1, len(col_bounds)), np.int64, shared=parallel)
+    if not local:
+        boundary_rows[0] = np.arange(m + 1) * gap
+        boundary_rows[:, 0] = row_bounds * gap
+        boundary_cols[:, 0] = np.arange(n + 1) * gap
+        boundary_cols[0] = col_bounds * gap
+
+    state = {"codes1": table.encode(seq1), "profile": table.scores[:, table.encode(seq2)].astype(np.int64),
+             "gap": gap, "local": local, "row_bounds": row_bounds, "col_bounds": col_bounds}
+    if parallel:
+        best = _run_tiles(count_rows, count_cols, jobs, {"rows": _mapping(boundary_rows),
+                                                         "cols": _mapping(boundary_cols)}, state)
+    else:
+        state.update(rows=boundary_rows, cols=boundary_cols)
+        best = _run_tiles(count_rows, count_cols, 1, {}, state)
+    return max(best, 0) if local else int(boundary_rows[-1, m])
@@ -0,0 +1,25 @@
+import numpy as np
+
+# Chars not allowed in the sequences - numbers and special cases
+FORBIDDEN = "1234567890!@#$%,/&."
+
+# Lookup table of the forbidden chars, indexed by the code point of an ASCII char
+_FORBIDDEN_LOOKUP = np.zeros(128, dtype=bool)
+_FORBIDDEN_LOOKUP[[ord(char) for char in FORBIDDEN]] = True
+
+
+def check_input(sequence):
+    """
+    Function checking if the input sequence does not consist of forbidden chars - numbers of special cases. The whole
+    sequence is checked at once with a lookup table of its code points.
+    :param sequence: (str) Input sequence to be checked.
+    :return: (Boolean) False if input is empty or consists of forbidden chars, True is not.
+    """
+    if not isinstance(sequence, str):
+        raise TypeError('Sequence ought to be a string (str).')
+    if len(sequence) == 0:
+        return False
+
+    points = np.frombuffer(sequence.encode('utf-32-le'), dtype=np.uint32)
+    ascii_points = points[points < len(_FORBIDDEN_LOOKUP)]
+    return not _FORBIDDEN_LOOKUP[ascii_points].any()
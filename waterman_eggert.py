@@ -0,0 +1,91 @@
+import heapq
+
+import numpy as np
+
+from pointers import pointer_path, pointer_traceback
+from rowwise import fill_row
+from scoring import get_substitution_matrix
+
+
+def _fill_rows(matrix, pointers, codes1, profile, gap, steps, blocked, start, stop_when_unchanged=None):
+    """
+    Function (re)computing the rows of the local alignment matrix from the start row down, the blocked cells forced to
+    zero.
+    :param matrix: (numpy array of int64) Matrix, rows before the start row are up to date.
+    :param pointers: (numpy array of uint8) Pointer matrix, updated together with the matrix.
+    :param codes1: (numpy array of uint8) Encoded sequence of the rows.
+    :param profile: (numpy array) Scores of every letter of the alphabet against the sequence of the columns.
+    :param gap: (int) Gap penalty value.
+    :param steps: (numpy array) Precomputed np.arange(m + 1) * gap.
+    :param blocked: (numpy array of bool) Cells no alignment can go through.
+    :param start: (int) First row to be computed.
+    :param stop_when_unchanged: (int or None) Row after which the computation stops at the first row that did not
+    change - the rows below it cannot change either. None computes all the rows.
+    :return: (int) Number of computed rows.
+    """
+    for x in range(start, len(matrix)):
+        row = fill_row(matrix[x - 1], profile[codes1[x - 1]], gap, 0, local=True, steps=steps,
+                       pointers=pointers[x], blocked=np.flatnonzero(blocked[x]))
+        if stop_when_unchanged is not None and x > stop_when_unchanged and np.array_equal(row, matrix[x]):
+            return x - start
+        matrix[x] = row
+    return len(matrix) - start
+
+
+def waterman_eggert(seq1, seq2, match, missmatch, gap, k, substitution=None):
+    """
+    Function finding up to k best non-overlapping local alignments (Waterman-Eggert algorithm) - no two of them align
+    the same pair of chars. The matrix is filled once, the best row maxima are kept in a heap; after an alignment is
+    reported its cells are blocked and only the rows from its start down are recomputed, until a row does not change.
+    Blocking only lowers the values, so stale heap entries are corrected when they are popped.
+    :param seq1: (str) Input sequence.
+    :param seq2: (str) Input sequence.
+    :param match: (int) Match value.
+    :param missmatch: (int) Missmatch value.
+    :param gap: (int) Gap penalty value.
+    :param k: (int) Maximal number of alignments.
+    :param substitution: (SubstitutionMatrix, str or None) Substitution matrix replacing match and missmatch values.
+    :return: (list of tuples of str, str, int) Aligned sequences and score of every alignment, from the best one, the
+    first one is the alignment of Smith-Waterman algorithm.
+    """
+    if not isinstance(seq1, str) or not isinstance(seq2, str):
+        raise TypeError('Sequences need to be a type of string.')
+    if not isinstance(match, int) or not isinstance(missmatch, int) or not isinstance(gap, int):
+        raise TypeError('Match value, missmatch value and gap penalty needs to be integers.')
+    if not isinstance(k, int) or k < 1:
+        raise ValueError('Number of alignments needs to be a positive integer.')
+
+    table = get_substitution_matrix(seq1, seq2, match, missmatch, substitution)
+    codes1 = table.encode(seq1)
+    profile = table.scores[:, table.encode(seq2)].astype(np.int64)
+    n, m = len(seq1), len(seq2)
+    steps = np.arange(m + 1, dtype=np.int64) * gap
+    matrix = np.zeros((n + 1, m + 1), dtype=np.int64)
+    pointers = np.zeros((n + 1, m + 1), dtype=np.uint8)
+    blocked = np.zeros((n + 1, m + 1), dtype=bool)
+    _fill_rows(matrix, pointers, codes1, profile, gap, steps, blocked, 1)
+
+    # Candidate end cells - the maximum of every row, ties broken by the row like np.argmax of the whole matrix
+    heap = [(-int(best), x) for x, best in enumerate(matrix.max(axis=1)) if best > 0]
+    heapq.heapify(heap)
+    alignments = []
+    while heap and len(alignments) < k:
+        best, x = heapq.heappop(heap)
+        current = int(matrix[x].max())
+        if current != -best:
+            if current > 0:
+                heapq.heappush(heap, (-current, x))  # Row was lowered by blocking, back with its real maximum
+            continue
+
+        y = int(np.argmax(matrix[x]))
+        aligned_1, aligned_2, _, _ = pointer_traceback(seq1, seq2, pointers, x, y)
+        alignments.append((aligned_1, aligned_2, current))
+
+        path = [(row, col) for row, col, move in pointer_path(pointers, x, y) if move]
+        rows, cols = np.array(path).T
+        blocked[rows, cols] = True
+        _fill_rows(matrix, pointers, codes1, profile, gap, steps, blocked, int(rows.min()), int(rows.max()))
+        if matrix[x].max() > 0:
+            heapq.heappush(heap, (-int(matrix[x].max()), x))
+
+    return alignments
@@ -0,0 +1,44 @@
+import numpy as np
+
+from rowwise import fill_row
+from scoring import QueryProfile
+
+
+def wavefront_fill(matrix, matrix_is_match, gap, local=False, pointers=None):
+    """
+    Function filling the matrix with whole NumPy operations instead of a Python loop over the cells. Cells of one
+    anti-diagonal depend only on the two previous anti-diagonals, but gathering them from the matrix is slower than
+    computing a whole row with the running maximum of fill_row, so the matrix is filled row by row, with contiguous
+    reads and writes. Produces the same matrix as the cell by cell filling of Needleman-Wunsch (local=False) or
+    Smith-Waterman (local=True) algorithm.
+    :param matrix: (numpy array) Matrix after initialization phase, first row and column are already filled.
+    :param matrix_is_match: (numpy array or QueryProfile) Match matrix.
+    :param gap: (int) Gap penalty value.
+    :param local: (bool) True clips the scores at zero like in Smith-Waterman algorithm.
+    :param pointers: (numpy array of uint8 or None) Pointer matrix of the same shape as the matrix, filled with the
+    moves giving each cell its value, None skips recording the moves.
+    :return matrix: (numpy array) Filled matrix.
+    """
+    if not isinstance(matrix, np.ndarray) or not isinstance(matrix_is_match, (np.ndarray, QueryProfile)):
+        raise TypeError('Matrix needs to be a numpy array and match matrix a numpy array or a QueryProfile.')
+    if not isinstance(gap, int):
+        raise TypeError('Gap penalty value needs to be an integer.')
+
+    rows, cols = matrix.shape
+    if matrix_is_match.shape != (rows - 1, cols - 1):
+        raise ValueError('Match matrix needs to be one row and one column smaller than the matrix.')
+    if pointers is not None and pointers.shape != matrix.shape:
+        raise ValueError('Pointer matrix needs to be of the same shape as the matrix.')
+    if rows < 2 or cols < 2:
+        return matrix
+
+    # The rows are computed in int64 - the running maximum of fill_row shifts the cells by up to m gap penalties, which
+    # could overflow the compact type of the matrix
+    steps = np.arange(cols, dtype=np.int64) * gap
+    row = matrix[0].astype(np.int64)
+    for x in range(1, rows):
+        row = fill_row(row, matrix_is_match[x - 1], gap, int(matrix[x, 0]), local, steps,
+                       None if pointers is None else pointers[x])
+        matrix[x, 1:] = row[1:]
+
+    return matrix